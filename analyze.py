@@ -1,60 +1,73 @@
 import argparse
-import pandas as pd
-import numpy as np
-from typing import Dict, Any
+import csv
+import json
+from typing import Dict, Any, Iterable, Iterator, AsyncIterator, Optional
 import asyncio
+import os
 from data_fetcher import SportDataFetcher
+from prizepicks_board import normalize_player_name, normalize_stat_type
+from resources import get_resources
+from instrumentation import request_timings, span
+from stat_defs import STAT_COMPONENTS
+
+DEFAULT_STAT_TYPES = {
+    'basketball': 'points',
+    'football': 'pass+rush yds',
+}
+
+# 'heuristic' (trend/consistency confidence) or 'probability' (simulated P(over))
+SCORING_MODE = os.getenv('SCORING_MODE', 'heuristic')
+
+# Computes the metrics behind a score: 'index' (lookups in the feature index),
+# 'frame' (one pandas pass over the batch's games) or 'parallel' (big batches
+# across the process pool, see scoring_engine); results are the same
+SCORING_ENGINE = os.getenv('SCORING_ENGINE', 'index')
 
 class PrizePicskAnalyzer:
-    def __init__(self, sport: str):
+    def __init__(self, sport: str, offline: bool = False, scoring_mode: str = SCORING_MODE,
+                 scoring_engine: str = SCORING_ENGINE, resources=None):
         """
         Initialize the analyzer for a specific sport
         
         :param sport: 'basketball' or 'football'
+        :param offline: Replay from the local game-log store without touching upstream sources
+        :param scoring_mode: Default for score_many: 'heuristic' or 'probability'
+        :param scoring_engine: How score_many computes metrics: 'index', 'frame' or 'parallel'
+        :param resources: ResourceManager to fetch and index through (default: the process-wide one)
         """
         self.sport = sport
-        self.data_fetcher = SportDataFetcher()
+        self.data_fetcher = SportDataFetcher(resources, offline=offline)
+        self.scoring_mode = scoring_mode
+        self.scoring_engine = scoring_engine
     
-    async def analyze_player_async(self, player_name: str, betting_line: float) -> Dict[str, Any]:
+    async def analyze_player_async(self, player_name: str, betting_line: float,
+                                   stat_type: Optional[str] = None,
+                                   include_timings: bool = False,
+                                   mode: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze player performance against betting line
         
         :param player_name: Name of the player
         :param betting_line: Current betting line for the player
+        :param stat_type: PrizePicks stat type (defaults to points / pass+rush yards)
+        :param include_timings: Add a per-stage 'timings' breakdown (seconds) to the result
+        :param mode: 'heuristic' or 'probability' (defaults to the analyzer's scoring_mode)
         :return: Analysis results
         """
         try:
-            # Fetch comprehensive player data
-            player_data = await self.data_fetcher.get_complete_player_data(player_name, self.sport)
-            
-            if not player_data:
-                return {
-                    'error': f'Could not fetch data for {player_name}',
-                    'success': False
-                }
-            
-            # Calculate performance metrics
-            metrics = self._calculate_metrics(player_data)
-            
-            # Compare to betting line
-            analysis = self._analyze_performance(metrics, betting_line)
-            
-            # Add injury and matchup analysis if available
-            injury_analysis = self._analyze_injury_status(player_data)
-            matchup_analysis = self._analyze_matchup(player_data)
-            
-            return {
-                'player_name': player_name,
-                'avg_performance': metrics['avg_performance'],
-                'betting_line': betting_line,
-                'performance_diff': metrics['avg_performance'] - betting_line,
-                'recommendation': analysis['recommendation'],
-                'confidence_score': analysis['confidence'],
-                'recent_games': metrics['recent_games'],
-                'injury_status': injury_analysis,
-                'matchup_analysis': matchup_analysis,
-                'success': True
-            }
+            with request_timings() as timings:
+                with span('analyze'):
+                    player, suggestions = await self.resolve_player(player_name)
+                    if player is None and suggestions:
+                        return unknown_player(player_name, suggestions)
+                    # Fetch comprehensive player data
+                    player_data = await self.data_fetcher.get_complete_player_data(player_name, self.sport, player)
+                    result = (await self.score_many_async(
+                        [(player_data['player_name'], player_data, betting_line, stat_type)], mode
+                    ))[0]
+            if include_timings:
+                result['timings'] = timings
+            return result
             
         except Exception as e:
             print(f"Error analyzing player: {e}")
@@ -62,80 +75,230 @@ class PrizePicskAnalyzer:
                 'error': str(e),
                 'success': False
             }
-    
-    def analyze_player(self, player_name: str, betting_line: float) -> Dict[str, Any]:
+
+    async def resolve_player(self, player_name: str) -> tuple:
         """
-        Synchronous wrapper for analyze_player_async
+        Look a player up in the crosswalk before anything is fetched
+
+        :param player_name: Name as typed or listed on the board
+        :return: (record, suggestions) as from SportDataFetcher.resolve_player
         """
-        return asyncio.run(self.analyze_player_async(player_name, betting_line))
-    
-    def _calculate_metrics(self, player_data: Dict) -> Dict[str, Any]:
-        """Calculate performance metrics from player data"""
-        metrics = {'recent_games': []}
+        return await self.data_fetcher.resolve_player(player_name, self.sport)
+
+    def score_player_data(self, player_name: str, player_data: Dict, betting_line: float,
+                          stat_type: Optional[str] = None, mode: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Score already-fetched player data against a betting line
+
+        :param player_name: Name of the player
+        :param player_data: Result of SportDataFetcher.get_complete_player_data
+        :param betting_line: Current betting line for the player
+        :param stat_type: PrizePicks stat type (defaults to points / pass+rush yards)
+        :param mode: 'heuristic' or 'probability' (defaults to the analyzer's scoring_mode)
+        :return: Analysis results
+        """
+        return self.score_many([(player_name, player_data, betting_line, stat_type)], mode)[0]
+
+    def score_many(self, entries: list, mode: Optional[str] = None) -> list:
+        """
+        Score many already-fetched props against the shared feature index
+
+        Each player's sources are indexed the first time they are seen; after
+        that a prop costs a lookup and a line comparison (or, with the 'frame'
+        and 'parallel' engines, the batch is scored from the indexed games in
+        one pandas pass or across the process pool). In 'probability'
+        mode each result also carries a simulated P(over)/P(under), which then
+        drives the recommendation and confidence. Code on the event loop should
+        use score_many_async, since a parallel batch blocks until it is scored.
+
+        :param entries: (player_name, player_data, betting_line, stat_type) tuples
+        :param mode: 'heuristic' or 'probability' (defaults to the analyzer's scoring_mode)
+        :return: Analysis results in the same order as entries
+        """
+        results, players, lines = self._collect_lines(entries)
+        with span('score'):
+            scores = self._score_lines(players, lines)
+        return self._build_results(entries, results, players, lines, scores, mode)
+
+    async def score_many_async(self, entries: list, mode: Optional[str] = None) -> list:
+        """
+        score_many for code on the event loop
+
+        The parallel engine's process-pool chunks are awaited instead of
+        blocked on, so fetches and streams on the loop keep going meanwhile.
+
+        :param entries: (player_name, player_data, betting_line, stat_type) tuples
+        :param mode: 'heuristic' or 'probability' (defaults to the analyzer's scoring_mode)
+        :return: Analysis results in the same order as entries
+        """
+        results, players, lines = self._collect_lines(entries)
+        with span('score'):
+            scores = await self._score_lines_async(players, lines)
+        return self._build_results(entries, results, players, lines, scores, mode)
+
+    def _collect_lines(self, entries: list) -> tuple:
+        """
+        Index each entry's player and turn the scorable entries into lines
+
+        :return: (results with errors filled in, {player key: PlayerFeatures}, lines)
+        """
+        results = [None] * len(entries)
+        index = self.data_fetcher.resources.feature_index()
+        players = {}
+        lines = []
+        for prop, (player_name, player_data, betting_line, stat_type) in enumerate(entries):
+            # Partial results are fine, but at least one stats source must have answered
+            if not player_data or not (player_data.get('yahoo_stats') or player_data.get('espn_stats')):
+                results[prop] = {
+                    'error': f'Could not fetch data for {player_name}',
+                    'success': False
+                }
+                continue
+            stat_key = normalize_stat_type(stat_type or DEFAULT_STAT_TYPES[self.sport])
+            if stat_key not in STAT_COMPONENTS:
+                results[prop] = {'error': f'Unsupported stat type: {stat_type}', 'success': False}
+                continue
+            key = normalize_player_name(player_name)
+            if key not in players:
+                players[key] = index.seed(self.sport, player_name, player_data)
+            lines.append({'prop': prop, 'key': key, 'stat_type': stat_key, 'line': float(betting_line)})
+        return results, players, lines
+
+    def _build_results(self, entries: list, results: list, players: Dict[str, Any], lines: list,
+                       scores: Dict[int, Dict[str, Any]], mode: Optional[str]) -> list:
+        """Fill in a result per line from its scores, plus probabilities in 'probability' mode"""
+        for line in lines:
+            prop = line['prop']
+            player_name, player_data = entries[prop][0], entries[prop][1]
+            features = players[line['key']]
+            row = scores.get(prop)
+            if row is None:
+                results[prop] = {
+                    'error': f"No games with {line['stat_type']} for {player_name}",
+                    'success': False
+                }
+                continue
+            
+            results[prop] = {
+                'player_name': player_name,
+                'stat_type': line['stat_type'],
+                'avg_performance': float(row['avg_performance']),
+                'betting_line': line['line'],
+                'performance_diff': float(row['performance_diff']),
+                'recommendation': row['recommendation'],
+                'confidence_score': float(row['confidence']),
+                'hit_rate': float(row['hit_rate']),
+                'avg_last_5': float(row['avg_last_5']),
+                'avg_last_10': float(row['avg_last_10']),
+                'recent_games': features.recent_games(line['stat_type']),  # Last 5 games
+                'features': features.summary(line['stat_type']),
+                # Add injury and matchup analysis if available
+                'injury_status': self._analyze_injury_status(player_data),
+                'matchup_analysis': self._analyze_matchup(player_data),
+                'source_timings': player_data['source_timings'],
+                'success': True
+            }
         
-        if self.sport == 'basketball':
-            # Combine stats from different sources
-            recent_games = (
-                player_data.get('yahoo_stats', {}).get('recent_games', []) +
-                player_data.get('espn_stats', {}).get('recent_games', [])
+        if (mode or self.scoring_mode) == 'probability':
+            from probability import get_model, over_probability, under_probability
+            scored = [line for line in lines if results[line['prop']]['success']]
+            distributions = self.outcome_distributions(
+                [(players[line['key']], line['stat_type']) for line in scored]
             )
-            
-            if recent_games:
-                # Calculate average points (or relevant stat based on betting type)
-                points = [game.get('points', 0) for game in recent_games if 'points' in game]
-                metrics['avg_performance'] = np.mean(points) if points else 0
-                metrics['recent_games'] = recent_games[:5]  # Last 5 games
-                
-        else:  # football
-            recent_games = player_data.get('espn_stats', {}).get('recent_games', [])
-            
-            if recent_games:
-                # Calculate average yards (or relevant stat based on betting type)
-                total_yards = [
-                    game.get('passing_yards', 0) + game.get('rushing_yards', 0)
-                    for game in recent_games
-                ]
-                metrics['avg_performance'] = np.mean(total_yards) if total_yards else 0
-                metrics['recent_games'] = recent_games[:5]
+            for line, (family, samples) in zip(scored, distributions):
+                over = float(over_probability(samples, line['line']))
+                under = float(under_probability(samples, line['line']))
+                results[line['prop']].update({
+                    'probability': {'over': over, 'under': under, 'model': family, 'draws': get_model().draws},
+                    'recommendation': 'Over' if over >= under else 'Under',
+                    'confidence_score': 100 * max(over, under),
+                })
         
-        return metrics
+        return results
+
+    def _score_lines(self, players: Dict[str, Any], lines: list) -> Dict[int, Dict[str, Any]]:
+        """
+        Metrics for each line from the analyzer's scoring engine
+
+        :param players: {player key: PlayerFeatures}
+        :param lines: Dicts with prop, key, stat_type and line
+        :return: {prop: metrics}; props with no games are left out
+        """
+        if lines and self.scoring_engine == 'frame':
+            import pandas as pd
+            from game_frame import build_game_log_frame, compute_metrics
+            frame = build_game_log_frame((key, features.history()) for key, features in players.items())
+            return compute_metrics(frame, pd.DataFrame(lines)).to_dict('index')
+        if lines and self.scoring_engine == 'parallel':
+            from scoring_engine import ScoringEngine
+            engine = ScoringEngine(self.data_fetcher.resources)
+            # Small batches are cheaper to look up than to fan out
+            if engine.wants(len(lines)):
+                return engine.score({key: features.history() for key, features in players.items()}, lines)
+        return self._lookup_lines(players, lines)
+
+    async def _score_lines_async(self, players: Dict[str, Any], lines: list) -> Dict[int, Dict[str, Any]]:
+        """_score_lines with the parallel engine's workers awaited on the loop"""
+        if lines and self.scoring_engine == 'parallel':
+            from scoring_engine import ScoringEngine
+            engine = ScoringEngine(self.data_fetcher.resources)
+            if engine.wants(len(lines)):
+                return await engine.score_async({key: features.history() for key, features in players.items()}, lines)
+            return self._lookup_lines(players, lines)
+        return self._score_lines(players, lines)
+
+    def _lookup_lines(self, players: Dict[str, Any], lines: list) -> Dict[int, Dict[str, Any]]:
+        """Metrics for each line straight from the feature index"""
+        scores = {}
+        for line in lines:
+            row = players[line['key']].score(line['stat_type'], line['line'])
+            if row is not None:
+                scores[line['prop']] = row
+        return scores
+
+    def outcome_distributions(self, entries: list) -> list:
+        """
+        Simulated outcome draws for each (PlayerFeatures, stat_type)
+
+        Draws are cached per stat and feature-index version, so a new line for
+        the same player reuses them until a new game lands.
+
+        :return: (model family, sorted draws) per entry, or None where there are no games
+        """
+        import numpy as np
+        from probability import get_model
+        requests, keys = {}, []
+        for features, stat_type in entries:
+            key = (features.version, stat_type)
+            if key not in requests:
+                totals = np.array(features.values(stat_type))
+                if not len(totals):
+                    keys.append(None)
+                    continue
+                requests[key] = (totals, stat_type)
+            keys.append(key)
+        distributions = get_model().distributions(requests)
+        return [distributions[key] if key is not None else None for key in keys]
     
-    def _analyze_performance(self, metrics: Dict, betting_line: float) -> Dict[str, Any]:
-        """Analyze performance metrics against betting line"""
-        avg_performance = metrics['avg_performance']
-        recent_games = metrics['recent_games']
-        
-        # Calculate consistency and trend
-        performances = [game.get('points', 0) for game in recent_games]
-        consistency = np.std(performances) if performances else 0
-        
-        # Simple trend analysis
-        trend = 0
-        if len(performances) >= 2:
-            trend = performances[0] - performances[-1]  # Positive means improving
-        
-        # Calculate confidence score (0-100)
-        confidence = 50  # Base confidence
-        
-        # Adjust based on consistency (lower std dev = higher confidence)
-        if consistency > 0:
-            confidence += (20 * (1 / consistency))
-        
-        # Adjust based on trend
-        confidence += (10 * (1 if trend > 0 else -1))
-        
-        # Clip confidence to 0-100 range
-        confidence = max(min(confidence, 100), 0)
-        
-        return {
-            'recommendation': 'Over' if avg_performance > betting_line else 'Under',
-            'confidence': confidence
-        }
+    def analyze_player(self, player_name: str, betting_line: float,
+                       stat_type: Optional[str] = None,
+                       timeout: Optional[float] = None,
+                       include_timings: bool = False,
+                       mode: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Synchronous wrapper for analyze_player_async
+
+        Runs on the shared fetcher loop rather than a new loop per call. On
+        timeout the analysis is cancelled and TimeoutError is raised.
+        """
+        return self.data_fetcher.resources.run(
+            self.analyze_player_async(player_name, betting_line, stat_type, include_timings, mode), timeout
+        )
     
     def _analyze_injury_status(self, player_data: Dict) -> Dict[str, Any]:
         """Analyze player injury status"""
         # Extract injury information from ESPN or Yahoo data
-        espn_stats = player_data.get('espn_stats', {})
+        espn_stats = player_data.get('espn_stats') or {}
         injury_status = espn_stats.get('injury_status', 'Unknown')
         
         return {
@@ -146,7 +309,7 @@ class PrizePicskAnalyzer:
     
     def _analyze_matchup(self, player_data: Dict) -> Dict[str, Any]:
         """Analyze player matchup"""
-        espn_stats = player_data.get('espn_stats', {})
+        espn_stats = player_data.get('espn_stats') or {}
         
         return {
             'opponent': espn_stats.get('next_opponent', 'Unknown'),
@@ -155,25 +318,226 @@ class PrizePicskAnalyzer:
             'rest_days': espn_stats.get('days_rest', 'Unknown')
         }
     
-    def __del__(self):
-        """Cleanup resources"""
-        if hasattr(self, 'data_fetcher'):
-            self.data_fetcher.close()
+def unknown_player(player_name: str, suggestions: list) -> Dict[str, Any]:
+    """Result for a name the crosswalk does not know but has close matches for (nothing is fetched)"""
+    return {'error': f'Unknown player: {player_name}', 'suggestions': suggestions, 'success': False}
+
+_analyzers = {}
+
+def get_analyzer(sport: str, offline: bool = False) -> PrizePicskAnalyzer:
+    """Shared analyzer per sport, so servers don't build one per request"""
+    key = (sport, offline)
+    if key not in _analyzers:
+        _analyzers[key] = PrizePicskAnalyzer(sport, offline=offline)
+    return _analyzers[key]
+
+async def analyze_many_async(props: Iterable[Dict[str, Any]], concurrency: int = 16,
+                             offline: bool = False,
+                             mode: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Analyze a board of props on one event loop, yielding results as they finish
+
+    Every name is resolved through the player crosswalk first; a player with
+    several props (under any of their names) is fetched once and scored once
+    per prop, and unknown names with close matches are answered right away
+    with suggestions.
+
+    :param props: Dicts with 'sport', 'player', 'stat' and 'line'
+    :param concurrency: Maximum number of players fetched at the same time
+    :param offline: Replay from the local game-log store
+    :param mode: 'heuristic' or 'probability' scoring
+    :return: Analysis results tagged with the prop's 'index' in the input
+    """
+    resolved, by_player = {}, {}
+    for index, prop in enumerate(props):
+        name_key = (prop['sport'], normalize_player_name(prop['player']))
+        if name_key not in resolved:
+            resolved[name_key] = await get_analyzer(prop['sport'], offline).resolve_player(prop['player'])
+        player, suggestions = resolved[name_key]
+        if player is None and suggestions:
+            yield {'index': index, 'sport': prop['sport'], 'player': prop['player'], 'stat': prop.get('stat'),
+                   **unknown_player(prop['player'], suggestions)}
+            continue
+        key = (prop['sport'], normalize_player_name(player['name'])) if player else name_key
+        by_player.setdefault(key, (player, []))[1].append((index, prop))
+    analyzers = {sport: get_analyzer(sport, offline) for sport, _ in by_player}
+    total = sum(len(player_props) for _, player_props in by_player.values())
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    fetched = asyncio.Queue()
+    
+    async def run_player(sport, player, player_props):
+        player_name = player_props[0][1]['player']
+        fetcher = analyzers[sport].data_fetcher
+        try:
+            async with semaphore:
+                player_data = await fetcher.get_complete_player_data(player_name, sport, player)
+        except Exception as e:
+            player_data = None
+            print(f"Error fetching {player_name}: {e}")
+        fetched.put_nowait((sport, player_props, player_data))
+    
+    tasks = [asyncio.ensure_future(run_player(sport, player, player_props))
+             for (sport, _), (player, player_props) in by_player.items()]
+    try:
+        remaining = total
+        while remaining:
+            # Score whatever has arrived since the last pass as one vectorized batch
+            ready = [await fetched.get()]
+            while not fetched.empty():
+                ready.append(fetched.get_nowait())
+            
+            for sport, analyzer in analyzers.items():
+                batch = [(index, prop, player_data)
+                         for batch_sport, player_props, player_data in ready if batch_sport == sport
+                         for index, prop in player_props]
+                if not batch:
+                    continue
+                scored = await analyzer.score_many_async([
+                    ((player_data or {}).get('player_name', prop['player']), player_data, prop['line'],
+                     prop.get('stat'))
+                    for _, prop, player_data in batch
+                ], mode)
+                for (index, prop, _), result in zip(batch, scored):
+                    remaining -= 1
+                    yield {'index': index, 'sport': sport, 'player': prop['player'],
+                           'stat': prop.get('stat'), **result}
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def analyze_many(props: Iterable[Dict[str, Any]], concurrency: int = 16,
+                 offline: bool = False, mode: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Synchronous, streaming wrapper for analyze_many_async
+    """
+    return get_resources().iterate(analyze_many_async(props, concurrency, offline, mode))
+
+async def evaluate_entry_async(legs: list, correlation: Optional[float] = None,
+                               offline: bool = False) -> Dict[str, Any]:
+    """
+    Estimate the chance that a multi-leg PrizePicks entry hits
+
+    Legs are simulated jointly; legs from the same game (an explicit 'game'
+    key, else the same ESPN team) are correlated.
+
+    :param legs: 2-6 dicts with 'sport', 'player', 'stat', 'line', 'pick' ('over'/'under')
+                 and optional 'game'
+    :param correlation: Copula correlation between same-game legs (default SAME_GAME_CORRELATION)
+    :param offline: Replay from the local game-log store
+    :return: Per-leg and joint hit probabilities, the independent-legs product and expected value
+    """
+    if not 2 <= len(legs) <= 6:
+        return {'error': 'An entry needs 2 to 6 legs', 'success': False}
+    import numpy as np
+    from probability import POWER_PLAY_PAYOUTS, SAME_GAME_CORRELATION, get_model
+    if correlation is None:
+        correlation = SAME_GAME_CORRELATION
+    
+    players = {}
+    for leg in legs:
+        key = (leg['sport'], normalize_player_name(leg['player']))
+        if key not in players:
+            player, suggestions = await get_analyzer(leg['sport'], offline).resolve_player(leg['player'])
+            if player is None and suggestions:
+                return unknown_player(leg['player'], suggestions)
+            players[key] = (leg['player'], player)
+    fetched = await asyncio.gather(*(
+        get_analyzer(sport, offline).data_fetcher.get_complete_player_data(player_name, sport, player)
+        for (sport, _), (player_name, player) in players.items()
+    ))
+    player_data = dict(zip(players, fetched))
+    
+    simulated, results = [], []
+    for leg in legs:
+        data = player_data[(leg['sport'], normalize_player_name(leg['player']))]
+        pick = (leg.get('pick') or 'over').lower()
+        if pick not in ('over', 'under'):
+            return {'error': f"Pick must be 'over' or 'under', not {leg.get('pick')}", 'success': False}
+        analyzer = get_analyzer(leg['sport'], offline)
+        line = float(leg['line'])
+        scored = (await analyzer.score_many_async(
+            [(data['player_name'], data, line, leg.get('stat'))], 'probability'
+        ))[0]
+        if not scored['success']:
+            return scored
+        # Cached by the scoring pass above
+        features = analyzer.data_fetcher.resources.feature_index().player(leg['sport'], data['player_name'])
+        family, samples = analyzer.outcome_distributions([(features, scored['stat_type'])])[0]
+        game = leg.get('game') or ((data.get('espn_stats') or {}).get('team') and
+                                   (leg['sport'], data['espn_stats']['team']))
+        simulated.append((samples, line, pick, game))
+        results.append({'sport': leg['sport'], 'player': leg['player'], 'stat': scored['stat_type'],
+                        'line': line, 'pick': pick, 'probability': scored['probability'][pick],
+                        'model': family})
+    
+    joint = get_model().entry_probability(simulated, correlation)
+    payout = POWER_PLAY_PAYOUTS[len(legs)]
+    return {
+        'legs': results,
+        'hit_probability': joint,
+        'independent_probability': float(np.prod([leg['probability'] for leg in results])),
+        'payout': payout,
+        'expected_value': joint * payout - 1,
+        'success': True
+    }
+
+def evaluate_entry(legs: list, correlation: Optional[float] = None,
+                   offline: bool = False, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Synchronous wrapper for evaluate_entry_async
+    """
+    return get_resources().run(evaluate_entry_async(legs, correlation, offline), timeout)
+
+def load_slate(path: str) -> list:
+    """Read props from a CSV with sport, player, stat and line columns (plus pick and game for entries)"""
+    with open(path, newline='') as f:
+        return [
+            {'sport': row['sport'], 'player': row['player'],
+             'stat': row.get('stat') or None, 'line': float(row['line']),
+             'pick': row.get('pick') or 'over', 'game': row.get('game') or None}
+            for row in csv.DictReader(f)
+        ]
 
 def main():
     parser = argparse.ArgumentParser(description='PrizePicks Performance Analyzer')
-    parser.add_argument('--sport', type=str, required=True, 
+    parser.add_argument('--sport', type=str, 
                         choices=['basketball', 'football'], 
                         help='Sport to analyze')
-    parser.add_argument('--player', type=str, required=True, 
+    parser.add_argument('--player', type=str, 
                         help='Player name to analyze')
-    parser.add_argument('--line', type=float, required=True, 
+    parser.add_argument('--line', type=float, 
                         help='Betting line for the player')
+    parser.add_argument('--stat', type=str,
+                        help='PrizePicks stat type (default: points / pass+rush yds)')
+    parser.add_argument('--slate', type=str,
+                        help='CSV of props (sport, player, stat, line) to analyze in one pass')
+    parser.add_argument('--concurrency', type=int, default=16,
+                        help='Players fetched at once in --slate mode')
+    parser.add_argument('--offline', action='store_true',
+                        help='Analyze from the local game-log store only')
+    parser.add_argument('--mode', type=str, choices=['heuristic', 'probability'],
+                        help=f'Scoring mode (default: {SCORING_MODE})')
+    parser.add_argument('--entry', type=str,
+                        help='CSV of 2-6 legs (sport, player, stat, line, pick[, game]) to evaluate as one entry')
     
     args = parser.parse_args()
     
-    analyzer = PrizePicskAnalyzer(args.sport)
-    result = analyzer.analyze_player(args.player, args.line)
+    if args.slate:
+        # One JSON line per prop, printed as soon as it is scored
+        for result in analyze_many(load_slate(args.slate), args.concurrency, args.offline, args.mode):
+            print(json.dumps(result, default=str), flush=True)
+        return
+    
+    if args.entry:
+        print(json.dumps(evaluate_entry(load_slate(args.entry), offline=args.offline), indent=2, default=str))
+        return
+    
+    if not (args.sport and args.player and args.line is not None):
+        parser.error('--sport, --player and --line are required unless --slate is given')
+    
+    analyzer = PrizePicskAnalyzer(args.sport, offline=args.offline)
+    result = analyzer.analyze_player(args.player, args.line, args.stat, mode=args.mode)
     
     print(f"Analysis Results for {args.player}:")
     for key, value in result.items():
@@ -1,10 +1,25 @@
-from flask import Flask, render_template, request, jsonify
-from analyze import PrizePicskAnalyzer
+import json
+import os
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
+from analyze import get_analyzer, analyze_many, evaluate_entry
+from live import stream_props, sse_event, parse_stream_request
+from prefetch import start_prefetch
+from resources import get_resources
+from instrumentation import metrics, span
 from flask_cors import CORS
 
 app = Flask(__name__)
 CORS(app)
 
+# Seconds an /analyze request may run before it is cancelled
+REQUEST_TIMEOUT = float(os.getenv('REQUEST_TIMEOUT', '30'))
+
+@app.before_request
+def start_background_prefetch():
+    # Once per process; under asgi.py the lifespan startup has already started it
+    start_prefetch()
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -15,11 +30,71 @@ def analyze():
     sport = data.get('sport')
     player = data.get('player')
     line = float(data.get('line', 0))
+    stat = data.get('stat')
+    include_timings = bool(data.get('timings'))
+    mode = data.get('mode')
 
-    analyzer = PrizePicskAnalyzer(sport)
-    result = analyzer.analyze_player(player, line)
+    analyzer = get_analyzer(sport)
+    try:
+        result = analyzer.analyze_player(player, line, stat, timeout=REQUEST_TIMEOUT,
+                                         include_timings=include_timings, mode=mode)
+    except FutureTimeoutError:
+        return jsonify({'error': 'Analysis timed out', 'success': False}), 504
     
+    with span('serialize', route='/analyze'):
+        return jsonify(result)
+
+@app.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    data = request.json
+    props = data.get('props', [])
+    concurrency = int(data.get('concurrency', 16))
+    mode = data.get('mode')
+
+    # Stream one JSON object per line as each prop is scored
+    def generate():
+        for result in analyze_many(props, concurrency, mode=mode):
+            yield json.dumps(result, default=str) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/entry', methods=['POST'])
+def entry():
+    data = request.json
+    try:
+        result = evaluate_entry(data.get('legs', []), timeout=REQUEST_TIMEOUT)
+    except FutureTimeoutError:
+        return jsonify({'error': 'Evaluation timed out', 'success': False}), 504
     return jsonify(result)
 
+@app.route('/analyze/stream')
+def analyze_stream():
+    props, follow = parse_stream_request(request.args)
+    resources = get_resources()
+
+    # Server-sent events: per-source progress, per-prop results, then live updates
+    def generate():
+        for event, payload in resources.iterate(stream_props(props, follow)):
+            if event == 'heartbeat':
+                yield ': keep-alive\n\n'
+            else:
+                yield sse_event(event, payload)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/cache/stats')
+def cache_stats():
+    return jsonify(get_resources().source_cache.stats())
+
+@app.route('/prefetch/stats')
+def prefetch_stats():
+    scheduler = start_prefetch()
+    return jsonify(scheduler.stats() if scheduler else {'enabled': False})
+
 if __name__ == '__main__':
     app.run(debug=True)
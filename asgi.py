@@ -0,0 +1,191 @@
+"""
+Async serving path: one event loop for the server, the fetcher and the pooled session
+
+    uvicorn asgi:app --workers 1
+
+/analyze, /analyze/batch and /analyze/stream are handled natively so many analyses run
+concurrently on one worker, each with a timeout and cancelled as soon as
+the client disconnects. Every other route (the page, static files,
+/cache/stats) is served by the Flask app.
+"""
+import asyncio
+import contextlib
+import json
+from urllib.parse import parse_qsl
+
+from asgiref.wsgi import WsgiToAsgi
+
+from analyze import get_analyzer, analyze_many_async, evaluate_entry_async
+from app import app as flask_app, REQUEST_TIMEOUT
+from live import stream_props, sse_event, parse_stream_request
+from prefetch import start_prefetch, stop_prefetch
+from resources import get_resources
+from instrumentation import span
+
+flask_asgi = WsgiToAsgi(flask_app)
+
+
+async def read_json(receive):
+    body = b''
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return json.loads(body or b'{}')
+
+
+async def send_json(send, payload, status=200):
+    with span('serialize', route='asgi'):
+        body = json.dumps(payload, default=str).encode()
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'application/json')]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def cancel_and_wait(task):
+    """Cancel a task and let it unwind, so the async generator it was driving can be closed"""
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+
+
+async def run_cancellable(coro, receive, timeout):
+    """
+    Run coro until it finishes, times out or the client goes away
+
+    :return: (result, reason) where reason is None, 'timeout' or 'disconnect'
+    """
+    work = asyncio.ensure_future(coro)
+    disconnect = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        done, _ = await asyncio.wait({work, disconnect}, timeout=timeout,
+                                     return_when=asyncio.FIRST_COMPLETED)
+        if work in done:
+            return work.result(), None
+        return None, 'disconnect' if disconnect in done else 'timeout'
+    finally:
+        work.cancel()
+        disconnect.cancel()
+
+
+async def analyze(scope, receive, send):
+    data = await read_json(receive)
+    if data is None:
+        return
+    analyzer = get_analyzer(data.get('sport'))
+    result, reason = await run_cancellable(
+        analyzer.analyze_player_async(data.get('player'), float(data.get('line', 0)), data.get('stat'),
+                                      bool(data.get('timings')), data.get('mode')),
+        receive, REQUEST_TIMEOUT
+    )
+    if reason == 'timeout':
+        await send_json(send, {'error': 'Analysis timed out', 'success': False}, status=504)
+    elif reason is None:
+        await send_json(send, result)
+
+
+async def analyze_batch(scope, receive, send):
+    data = await read_json(receive)
+    if data is None:
+        return
+    results = analyze_many_async(data.get('props', []), int(data.get('concurrency', 16)),
+                                 mode=data.get('mode'))
+    disconnect = asyncio.ensure_future(wait_for_disconnect(receive))
+
+    await send({'type': 'http.response.start', 'status': 200,
+                'headers': [(b'content-type', b'application/x-ndjson')]})
+    try:
+        # Stream one JSON object per line; stop fetching as soon as the client leaves
+        while True:
+            next_result = asyncio.ensure_future(anext(results))
+            done, _ = await asyncio.wait({next_result, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+            if next_result not in done:
+                await cancel_and_wait(next_result)
+                return
+            try:
+                result = next_result.result()
+            except StopAsyncIteration:
+                break
+            await send({'type': 'http.response.body',
+                        'body': (json.dumps(result, default=str) + '\n').encode(),
+                        'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        disconnect.cancel()
+        await results.aclose()
+
+
+async def entry(scope, receive, send):
+    data = await read_json(receive)
+    if data is None:
+        return
+    result, reason = await run_cancellable(evaluate_entry_async(data.get('legs', [])), receive, REQUEST_TIMEOUT)
+    if reason == 'timeout':
+        await send_json(send, {'error': 'Evaluation timed out', 'success': False}, status=504)
+    elif reason is None:
+        await send_json(send, result)
+
+
+async def analyze_stream(scope, receive, send):
+    props, follow = parse_stream_request(dict(parse_qsl(scope.get('query_string', b'').decode())))
+    events = stream_props(props, follow)
+    disconnect = asyncio.ensure_future(wait_for_disconnect(receive))
+
+    await send({'type': 'http.response.start', 'status': 200,
+                'headers': [(b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache')]})
+    try:
+        while True:
+            next_event = asyncio.ensure_future(anext(events))
+            done, _ = await asyncio.wait({next_event, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+            if next_event not in done:
+                await cancel_and_wait(next_event)
+                return
+            try:
+                event, payload = next_event.result()
+            except StopAsyncIteration:
+                break
+            body = ': keep-alive\n\n' if event == 'heartbeat' else sse_event(event, payload)
+            await send({'type': 'http.response.body', 'body': body.encode(), 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        disconnect.cancel()
+        await events.aclose()
+
+
+async def lifespan(scope, receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # Share the server's loop instead of hopping to a background thread per request
+            get_resources().adopt_loop(asyncio.get_running_loop())
+            start_prefetch()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            stop_prefetch()
+            await get_resources().aclose_http_session()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+ROUTES = {
+    ('POST', '/analyze'): analyze,
+    ('POST', '/analyze/batch'): analyze_batch,
+    ('POST', '/entry'): entry,
+    ('GET', '/analyze/stream'): analyze_stream,
+}
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(scope, receive, send)
+    handler = ROUTES.get((scope.get('method'), scope.get('path')))
+    if handler is None:
+        return await flask_asgi(scope, receive, send)
+    return await handler(scope, receive, send)
@@ -0,0 +1,302 @@
+"""
+Backtest the analyzer's recommendations against the games that followed
+
+    python backtest.py record --board board.json   # one board snapshot (the app records live
+                                                   # ones when BOARD_SNAPSHOT_DIR is set)
+    python backtest.py export                      # game-log store -> Parquet, one directory per season
+    python backtest.py replay --json report.json   # hit rate and calibration per stat type
+
+Board snapshots are Parquet files partitioned by capture date. Replay works
+one season at a time: the season's games are turned into what the analyzer
+knew before each game (season mean, recent-window spread and trend), then
+line snapshots are streamed through in batches and matched to the player's
+next game with that stat. Each distinct (player, stat, game, line) is scored
+once, however many snapshots carried it. Memory is bounded by one season of
+games plus one batch of lines.
+"""
+import argparse
+import glob
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from game_store import normalize_game_date
+from stat_defs import GAME_LOG_SOURCES, RECENT_GAMES, STAT_COMPONENTS, confidence_score, recommends_over
+from prizepicks_board import LEAGUE_SPORTS, normalize_player_name, normalize_stat_type
+
+BACKTEST_DIR = os.getenv('BACKTEST_DIR', 'data/backtest')
+FIELDS = sorted({field for components in STAT_COMPONENTS.values() for field in components})
+GROUP = ['sport', 'player', 'stat_type']
+
+# Confidence-score bins for calibration; the heuristic never goes below 40
+CALIBRATION_BINS = [0, 50, 60, 70, 80, 90, 100.001]
+CALIBRATION_LABELS = ['<50', '50-60', '60-70', '70-80', '80-90', '90-100']
+
+
+def record_snapshot(directory, projections, captured_at=None):
+    """
+    Write one board snapshot under directory/lines/date=YYYY-MM-DD/
+
+    :param projections: PrizePicks projections (player_name, league, stat_type, line, timestamp)
+    :return: Path of the written file, or None for an empty board
+    """
+    if not projections:
+        return None
+    captured_at = pd.Timestamp(captured_at or datetime.now(timezone.utc))
+    if captured_at.tzinfo is not None:
+        # Stored as naive UTC
+        captured_at = captured_at.tz_convert(None)
+    frame = pd.DataFrame({
+        'captured_at': captured_at,
+        'sport': [LEAGUE_SPORTS.get(p.get('league')) for p in projections],
+        'player': [normalize_player_name(p['player_name']) for p in projections],
+        'stat_type': [normalize_stat_type(p['stat_type']) for p in projections],
+        'line': [float(p['line']) for p in projections],
+        'projection_time': [p.get('timestamp') for p in projections],
+    })
+    partition = os.path.join(directory, 'lines', f'date={captured_at:%Y-%m-%d}')
+    os.makedirs(partition, exist_ok=True)
+    path = os.path.join(partition, f'{captured_at:%H%M%S%f}.parquet')
+    frame.to_parquet(path, index=False)
+    return path
+
+
+def export_game_logs(store, directory, chunk_size=50000):
+    """
+    Copy every stored game into directory/games/season=<season>/ as Parquet
+
+    :return: Number of games written
+    """
+    written = 0
+    for part, rows in enumerate(store.iter_rows(chunk_size)):
+        frame = pd.DataFrame.from_records(
+            [(sport, season, player, source, game_date, *(stats.get(f) for f in FIELDS), stats.get('location'))
+             for sport, season, player, source, game_date, stats in rows],
+            columns=['sport', 'season', 'player', 'source', 'game_date', *FIELDS, 'location'],
+        )
+        frame[FIELDS] = frame[FIELDS].apply(pd.to_numeric, errors='coerce')
+        for season, games in frame.groupby('season'):
+            partition = os.path.join(directory, 'games', f'season={season}')
+            os.makedirs(partition, exist_ok=True)
+            games.drop(columns='season').to_parquet(os.path.join(partition, f'part-{part:05d}.parquet'), index=False)
+        written += len(frame)
+    return written
+
+
+def merge_sources(games):
+    """One row per (sport, player, date); the source listed first in GAME_LOG_SOURCES wins each field"""
+    rank = {
+        (sport, source.replace('_stats', '')): i
+        for sport, sources in GAME_LOG_SOURCES.items() for i, source in enumerate(sources)
+    }
+    games = games.assign(
+        game_date=pd.to_datetime(games['game_date'].map(normalize_game_date), errors='coerce'),
+        rank=[rank.get(key) for key in zip(games['sport'], games['source'])],
+    ).dropna(subset=['game_date', 'rank'])
+    # groupby().first() takes the first non-null value per column, i.e. fills gaps from lower-ranked sources
+    return games.sort_values('rank').groupby(['sport', 'player', 'game_date'], as_index=False)[FIELDS].first()
+
+
+def season_features(games):
+    """
+    What the analyzer knew before each game, per stat type
+
+    :param games: Output of merge_sources
+    :return: DataFrame with sport, player, stat_type, game_date, value (the game's result) and
+             the as-of prior_games, avg_performance, consistency and trend
+    """
+    frames = []
+    for stat_type, components in STAT_COMPONENTS.items():
+        value = games[list(components)].sum(axis=1, min_count=len(components))
+        frames.append(games[['sport', 'player', 'game_date']].assign(stat_type=stat_type, value=value))
+    frame = pd.concat(frames, ignore_index=True).dropna(subset=['value'])
+    frame = frame.sort_values([*GROUP, 'game_date'], ignore_index=True)
+
+    by_player = frame.groupby(GROUP, sort=False)['value']
+    frame['prior_games'] = by_player.cumcount()
+    frame['avg_performance'] = (by_player.cumsum() - frame['value']) / frame['prior_games']
+    # Window statistics including each game, shifted so each row only sees earlier games
+    frame['window_std'] = (
+        by_player.rolling(RECENT_GAMES, min_periods=1).std(ddof=0).reset_index(level=[0, 1, 2], drop=True)
+    )
+    frame['consistency'] = frame.groupby(GROUP, sort=False)['window_std'].shift()
+    oldest = by_player.shift(RECENT_GAMES).fillna(by_player.transform('first'))
+    frame['trend'] = by_player.shift() - oldest
+    return frame[frame['prior_games'] > 0].drop(columns='window_std')
+
+
+def feature_confidence(consistency, trend):
+    """Each feature row's confidence, through the analyzer's own heuristic"""
+    return np.fromiter(map(confidence_score, consistency.tolist(), trend.tolist()), np.float64, len(consistency))
+
+
+def score_lines(avg_performance, line, value):
+    """Whether each recommendation was right, and which lines pushed, from as-of features"""
+    push = value == line
+    correct = ~push & ((value > line) == recommends_over(avg_performance, line))
+    return push, correct
+
+
+class Tally:
+    """Running hit and calibration counts per stat type and confidence bin"""
+
+    def __init__(self):
+        self.stat_types = list(STAT_COMPONENTS)
+        shape = (len(self.stat_types), len(CALIBRATION_LABELS))
+        self.lines = np.zeros(shape, dtype=np.int64)
+        self.decided = np.zeros(shape, dtype=np.int64)
+        self.correct = np.zeros(shape, dtype=np.int64)
+        self.confidence = np.zeros(shape)
+
+    def add(self, stat, confidence, push, correct):
+        """Count scored lines; stat holds indexes into self.stat_types"""
+        cell = stat * len(CALIBRATION_LABELS) + np.digitize(confidence, CALIBRATION_BINS[1:-1])
+        size = self.lines.size
+        self.lines += np.bincount(cell, minlength=size).reshape(self.lines.shape)
+        self.decided += np.bincount(cell, weights=~push, minlength=size).astype(np.int64).reshape(self.lines.shape)
+        self.correct += np.bincount(cell, weights=correct, minlength=size).astype(np.int64).reshape(self.lines.shape)
+        self.confidence += np.bincount(cell, weights=confidence, minlength=size).reshape(self.lines.shape)
+
+    def report(self):
+        """Per stat type hit rate (pushes excluded), and predicted vs actual by confidence bin"""
+        stats, calibration = {}, {}
+        for i, stat_type in enumerate(self.stat_types):
+            lines, decided, correct = self.lines[i].sum(), self.decided[i].sum(), self.correct[i].sum()
+            if not lines:
+                continue
+            stats[stat_type] = {
+                'lines': int(lines),
+                'pushes': int(lines - decided),
+                'hit_rate': correct / decided if decided else None,
+                'avg_confidence': self.confidence[i].sum() / lines,
+            }
+            calibration[stat_type] = [
+                {'bin': label, 'lines': int(self.lines[i, b]),
+                 'predicted': self.confidence[i, b] / self.lines[i, b] / 100,
+                 'actual': self.correct[i, b] / self.decided[i, b] if self.decided[i, b] else None}
+                for b, label in enumerate(CALIBRATION_LABELS) if self.lines[i, b]
+            ]
+        return {'stats': stats, 'calibration': calibration}
+
+
+def _days(values):
+    return values.astype('datetime64[D]').astype(np.int64)
+
+
+def line_batches(dataset, columns, row_filter, batch_rows):
+    """Record batches from many small snapshot files, coalesced into tables of about batch_rows"""
+    import pyarrow as pa
+
+    pending, rows = [], 0
+    for batch in dataset.to_batches(columns=columns, filter=row_filter, batch_size=batch_rows):
+        pending.append(batch)
+        rows += batch.num_rows
+        if rows >= batch_rows:
+            yield pa.Table.from_batches(pending)
+            pending, rows = [], 0
+    if pending:
+        yield pa.Table.from_batches(pending)
+
+
+def replay(directory, batch_rows=250000):
+    """
+    Score every recorded line against the game that followed it
+
+    :param directory: Holds lines/ (from record_snapshot) and games/ (from export_game_logs)
+    :param batch_rows: Line rows read per batch
+    :return: Report dict from Tally.report, plus how many line rows matched no later game
+    """
+    import pyarrow.dataset as ds
+
+    if not os.path.isdir(os.path.join(directory, 'lines')):
+        raise FileNotFoundError(f'No recorded board snapshots under {directory}/lines')
+    lines_dataset = ds.dataset(os.path.join(directory, 'lines'), format='parquet', partitioning='hive')
+    stat_index = {stat_type: i for i, stat_type in enumerate(STAT_COMPONENTS)}
+    tally = Tally()
+    unmatched = 0
+    previous_end = None
+    for season_dir in sorted(glob.glob(os.path.join(directory, 'games', 'season=*'))):
+        features = season_features(merge_sources(pd.read_parquet(season_dir)))
+        if features.empty:
+            continue
+        # One integer code per (sport, player, stat type); features are sorted by code, then date
+        codes, groups = pd.MultiIndex.from_frame(features[GROUP]).factorize()
+        features = features.assign(code=codes).sort_values(['code', 'game_date'], ignore_index=True)
+        # code << 20 | day orders every game of a group together, by date
+        feature_keys = (features['code'].to_numpy(np.int64) << 20) | _days(features['game_date'].to_numpy())
+        feature_stat = features['stat_type'].map(stat_index).to_numpy()
+        columns = {name: features[name].to_numpy(np.float64)
+                   for name in ('avg_performance', 'consistency', 'trend', 'value')}
+        # Confidence depends on the game's features only, so it is computed once per row, not per line
+        confidence = feature_confidence(columns['consistency'], columns['trend'])
+        seen = set()
+        end = features['game_date'].max()
+
+        # Lines captured after the previous season ended and up to this season's last game
+        window = ds.field('date') <= f'{end:%Y-%m-%d}'
+        if previous_end is not None:
+            window &= ds.field('date') > f'{previous_end:%Y-%m-%d}'
+        previous_end = end
+
+        for table in line_batches(lines_dataset, ['captured_at', *GROUP, 'line'], window, batch_rows):
+            lines = table.to_pandas()
+            line_codes = groups.get_indexer(pd.MultiIndex.from_frame(lines[GROUP]))
+            line_keys = (line_codes.astype(np.int64) << 20) | _days(lines['captured_at'].to_numpy())
+            # The next game on or after the capture date: its result, and the features known before it
+            game = np.searchsorted(feature_keys, line_keys)
+            matched = (line_codes >= 0) & (game < len(feature_keys))
+            matched[matched] &= (feature_keys[game[matched]] >> 20) == line_codes[matched]
+            unmatched += int((~matched).sum())
+            game, line = game[matched], lines['line'].to_numpy(np.float64)[matched]
+
+            # Each distinct (game, line) once, however many snapshots carried it
+            pairs = np.unique((game.astype(np.int64) << 32) | line.astype(np.float32).view(np.uint32))
+            fresh = np.array([pair not in seen for pair in pairs.tolist()], dtype=bool)
+            pairs = pairs[fresh]
+            seen.update(pairs.tolist())
+            game = (pairs >> 32).astype(np.intp)
+            line = (pairs & 0xFFFFFFFF).astype(np.uint32).view(np.float32).astype(np.float64)
+            if len(game):
+                tally.add(feature_stat[game], confidence[game], *score_lines(
+                    columns['avg_performance'][game], line, columns['value'][game]
+                ))
+
+    report = tally.report()
+    report['unmatched_lines'] = unmatched
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backtest analyzer recommendations on recorded lines')
+    parser.add_argument('command', choices=['record', 'export', 'replay'])
+    parser.add_argument('--dir', default=BACKTEST_DIR, help='Backtest data directory')
+    parser.add_argument('--board', help='record: PrizePicks board JSON file to snapshot')
+    parser.add_argument('--batch-rows', type=int, default=250000, help='replay: line rows read per batch')
+    parser.add_argument('--json', help='replay: also write the report to this file')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        if not args.board:
+            parser.error('record needs --board')
+        with open(args.board) as f:
+            print(record_snapshot(args.dir, json.load(f).get('projections', [])))
+    elif args.command == 'export':
+        from resources import get_resources
+        print(f"{export_game_logs(get_resources().game_store(), args.dir)} games exported to {args.dir}/games")
+    else:
+        report = replay(args.dir, args.batch_rows)
+        print(f"{'stat type':<18}{'lines':>9}{'pushes':>8}{'hit rate':>10}{'avg conf':>10}")
+        for stat_type, row in sorted(report['stats'].items()):
+            hit_rate = f"{row['hit_rate']:.1%}" if row['hit_rate'] is not None else '-'
+            print(f"{stat_type:<18}{row['lines']:>9}{row['pushes']:>8}{hit_rate:>10}{row['avg_confidence']:>10.1f}")
+        print(f"\n{report['unmatched_lines']} line rows had no later game in the store")
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(report, f, indent=2, default=str)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+"""
+Benchmark the whole analyze pipeline offline against recorded fixtures
+
+    python benchmarks/bench_pipeline.py --runs 5
+    python benchmarks/bench_pipeline.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_pipeline.py --compare benchmarks/baseline.json --tolerance 0.2
+
+Yahoo pages, ESPN player records and the PrizePicks board are replayed from
+benchmarks/fixtures through an in-process stand-in for the shared
+ResourceManager, so nothing touches the network. For 1-, 100- and 1000-prop
+slates taken from the recorded board this reports per-prop latency
+percentiles, throughput and peak traced memory for the end-to-end run, plus
+separate fetch, parse and score timings. --compare exits non-zero when a
+metric is worse than the baseline by more than the tolerance.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import zlib
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_fetcher  # noqa: E402
+from analyze import analyze_many_async, get_analyzer  # noqa: E402
+from game_store import GameLogStore  # noqa: E402
+from player_index import PlayerIndex  # noqa: E402
+from prizepicks_board import LEAGUE_SPORTS  # noqa: E402
+from resources import HttpResponse, ResourceManager, set_resources  # noqa: E402
+from yahoo_parser import parse_yahoo_stats  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+SLATE_SIZES = (1, 100, 1000)
+
+# Metric -> whether a larger value is better, for --compare
+METRICS = {
+    'p50_ms': False, 'p95_ms': False, 'p99_ms': False, 'props_per_sec': True, 'peak_mb': False,
+    'fetch_ms': False, 'parse_ms': False, 'score_ms': False,
+}
+
+
+def load_fixtures():
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES, 'yahoo', '*.html'))):
+        with open(path, encoding='utf-8') as f:
+            pages.append(f.read())
+    with open(os.path.join(FIXTURES, 'espn', 'players.json')) as f:
+        espn_players = json.load(f)
+    with open(os.path.join(FIXTURES, 'prizepicks', 'board.json')) as f:
+        board = json.load(f)
+    return pages, espn_players, board
+
+
+def recorded(records, name):
+    """Deterministically map any player name onto one of the recorded fixtures"""
+    return records[zlib.crc32(name.encode()) % len(records)]
+
+
+class ReplayEspnClient:
+    """Stands in for espn_api's Basketball/Football clients"""
+
+    def __init__(self, players, latency):
+        self.players = players
+        self.latency = latency
+
+    def player_info(self, name):
+        if self.latency:
+            time.sleep(self.latency)
+        record = recorded(self.players, name)
+        games = [SimpleNamespace(**game) for game in record['stats']['2023']]
+        return SimpleNamespace(name=name, team=record['team'], position=record['position'],
+                               injuryStatus=record['injuryStatus'],
+                               stats={data_fetcher.CURRENT_SEASON: games})
+
+
+class ReplayResources(ResourceManager):
+    """ResourceManager whose upstreams are the recorded fixtures, with optional simulated latency"""
+
+    def __init__(self, fixtures, latency=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.pages, self.espn_players, self.board = fixtures
+        self.latency = latency
+        # Measure the pipeline, not the outbound pacing meant for real upstreams
+        self.rate_limit = self.rate_burst = 1e9
+
+    async def http_get(self, url, headers=None, as_json=False, paced=False):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if url == data_fetcher.PRIZEPICKS_URL:
+            return HttpResponse(200, {}, self.board)
+        return HttpResponse(200, {}, recorded(self.pages, url.rsplit('/', 1)[-1]))
+
+    def espn_client(self, sport, base_url=None):
+        return ReplayEspnClient(self.espn_players[sport], self.latency)
+
+    def game_store(self):
+        with self._lock:
+            if self._game_store is None:
+                self._game_store = GameLogStore(':memory:')
+            return self._game_store
+
+    def player_index(self):
+        with self._lock:
+            if self._player_index is None:
+                self._player_index = PlayerIndex(path=None)
+            return self._player_index
+
+    def reset(self):
+        """Start a run cold: empty caches, store, feature index and crosswalk, board not yet loaded"""
+        async def clear():
+            self.source_cache.clear()
+        self.run(clear())
+        with self._lock:
+            if self._game_store is not None:
+                self._game_store.close()
+            self._game_store = None
+            self._feature_index = None
+            self._player_index = None
+            self._boards = {}
+
+
+def build_slate(board, size):
+    projections = board['projections'][:size]
+    return [
+        {'sport': LEAGUE_SPORTS[p['league']], 'player': p['player_name'], 'stat': p['stat_type'],
+         'line': p['line']}
+        for p in projections
+    ]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def slate_players(slate):
+    return list(dict.fromkeys((prop['sport'], prop['player']) for prop in slate))
+
+
+async def run_pipeline(slate, concurrency):
+    """End to end: per-prop completion latency (seconds) and wall time"""
+    start = time.perf_counter()
+    latencies = []
+    async for _ in analyze_many_async(slate, concurrency):
+        latencies.append(time.perf_counter() - start)
+    return latencies, time.perf_counter() - start
+
+
+async def run_fetch(slate, concurrency):
+    """Fetch stage only (includes parsing and the store sync, as the fetcher does them)"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(sport, player):
+        async with semaphore:
+            return (sport, player), await get_analyzer(sport).data_fetcher.get_complete_player_data(player, sport)
+
+    start = time.perf_counter()
+    data = dict(await asyncio.gather(*(fetch(sport, player) for sport, player in slate_players(slate))))
+    return data, time.perf_counter() - start
+
+
+def run_parse(resources, slate):
+    """Parse stage only: every Yahoo page and ESPN record the slate needs, serially"""
+    fetcher = get_analyzer('basketball').data_fetcher
+    start = time.perf_counter()
+    for sport, player in slate_players(slate):
+        parse_yahoo_stats(recorded(resources.pages, player.replace(' ', '-').lower()), sport)
+        record = resources.espn_client(sport).player_info(player)
+        if sport == 'basketball':
+            fetcher._parse_espn_basketball_stats(record)
+        else:
+            fetcher._parse_espn_football_stats(record)
+    return time.perf_counter() - start
+
+
+def run_score(slate, data):
+    """Score stage only: one score_many pass per sport over already-fetched data"""
+    start = time.perf_counter()
+    for sport in {prop['sport'] for prop in slate}:
+        get_analyzer(sport).score_many([
+            (prop['player'], data[(sport, prop['player'])], prop['line'], prop['stat'])
+            for prop in slate if prop['sport'] == sport
+        ])
+    return time.perf_counter() - start
+
+
+def bench_slate(resources, slate, runs, concurrency):
+    latencies, walls, fetches, parses, scores = [], [], [], [], []
+    for _ in range(runs):
+        resources.reset()
+        run_latencies, wall = resources.run(run_pipeline(slate, concurrency))
+        latencies.extend(run_latencies)
+        walls.append(wall)
+
+        resources.reset()
+        data, fetch_time = resources.run(run_fetch(slate, concurrency))
+        fetches.append(fetch_time)
+        parses.append(run_parse(resources, slate))
+        scores.append(run_score(slate, data))
+
+    # One extra traced run, kept apart because tracemalloc slows everything down
+    resources.reset()
+    tracemalloc.start()
+    resources.run(run_pipeline(slate, concurrency))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'props_per_sec': len(slate) / statistics.median(walls),
+        'peak_mb': peak / 2 ** 20,
+        'fetch_ms': statistics.median(fetches) * 1000,
+        'parse_ms': statistics.median(parses) * 1000,
+        'score_ms': statistics.median(scores) * 1000,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Print metrics that got worse than the baseline by more than tolerance; return how many"""
+    regressions = 0
+    for size, metrics in results.items():
+        for name, value in metrics.items():
+            before = baseline.get(size, {}).get(name)
+            if not before:
+                continue
+            change = (value - before) / before
+            worse = -change if METRICS[name] else change
+            if worse > tolerance:
+                regressions += 1
+                print(f'REGRESSION {size}-prop {name}: {before:.2f} -> {value:.2f} ({change:+.0%})')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Analyze pipeline benchmark on recorded fixtures')
+    parser.add_argument('--runs', type=int, default=5, help='Timed runs per slate size')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SLATE_SIZES), help='Slate sizes in props')
+    parser.add_argument('--concurrency', type=int, default=16, help='Players fetched at the same time')
+    parser.add_argument('--latency', type=float, default=0.0, help='Simulated upstream latency in seconds')
+    parser.add_argument('--save-baseline', help='Write results to this JSON file')
+    parser.add_argument('--compare', help='Compare against a baseline JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative slowdown for --compare')
+    args = parser.parse_args()
+
+    fixtures = load_fixtures()
+    resources = set_resources(ReplayResources(fixtures, latency=args.latency))
+    # Fixtures answer instantly, so source timeouts only matter with --latency
+    data_fetcher.SOURCE_TIMEOUTS.update({source: max(timeout, args.latency * 4)
+                                         for source, timeout in data_fetcher.SOURCE_TIMEOUTS.items()})
+
+    results = {}
+    print(f"{'props':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'props/s':>10}{'peak MB':>9}"
+          f"{'fetch ms':>10}{'parse ms':>10}{'score ms':>10}")
+    for size in args.sizes:
+        slate = build_slate(fixtures[2], size)
+        metrics = bench_slate(resources, slate, args.runs, args.concurrency)
+        results[str(size)] = metrics
+        print(f"{size:>6}{metrics['p50_ms']:>10.1f}{metrics['p95_ms']:>10.1f}{metrics['p99_ms']:>10.1f}"
+              f"{metrics['props_per_sec']:>10.0f}{metrics['peak_mb']:>9.1f}{metrics['fetch_ms']:>10.1f}"
+              f"{metrics['parse_ms']:>10.1f}{metrics['score_ms']:>10.1f}")
+    print('\nlatency = time from slate start until each prop is yielded; fetch includes parsing')
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Baseline written to {args.save_baseline}')
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            sys.exit(f'{regressions} metric(s) regressed by more than {args.tolerance:.0%}')
+        print(f'No regressions beyond {args.tolerance:.0%} against {args.compare}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Import-time budget and cold-start latency of the CLI
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --budget-ms 150 --runs 5 -- --sport football --player "Josh Allen" --line 250.5
+
+Imports analyze in fresh interpreters under `python -X importtime` and
+prints the slowest modules by cumulative import time. Exits non-zero when
+the import takes longer than the budget, or when it loads a dependency that
+should only be loaded once its source or feature is used. Then it times
+`python analyze.py <args>` (by default an offline single-player analysis)
+from process start until the first result line is printed, and until exit.
+The CLI runs against a game-log store and crosswalk in a temporary
+directory, seeded with a recorded Yahoo page from benchmarks/fixtures, so
+the offline run times a real analysis and nothing is written to data/.
+"""
+import argparse
+import glob
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+DEFAULT_PLAYER = 'LeBron James'
+DEFAULT_ARGS = ['--sport', 'basketball', '--player', DEFAULT_PLAYER, '--line', '25.5', '--offline']
+
+# Loaded on first use only: browser automation, HTTP clients, .env, ESPN, HTML parsers, dataframes and numpy
+DEFERRED = ('aiohttp', 'bs4', 'dotenv', 'espn_api', 'lxml', 'numpy', 'pandas', 'pyarrow', 'requests', 'selectolax',
+            'selenium', 'webdriver_manager')
+
+
+def import_profile(module):
+    """({module: cumulative microseconds}, top-level packages loaded) for one fresh import"""
+    probe = f"import sys, {module}; print(' '.join(sorted({{m.split('.')[0] for m in sys.modules}})))"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', probe], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times, set(result.stdout.split())
+
+
+def seed_store(directory):
+    """Environment for CLI runs whose store and crosswalk live in directory, with the default player's games"""
+    sys.path.insert(0, ROOT)
+    from data_fetcher import CURRENT_SEASON
+    from game_store import GameLogStore
+    from yahoo_parser import parse_yahoo_stats
+
+    path = os.path.join(directory, 'game_logs.sqlite3')
+    with open(sorted(glob.glob(os.path.join(FIXTURES, 'yahoo', '*.html')))[0], encoding='utf-8') as f:
+        stats = parse_yahoo_stats(f.read(), 'basketball')
+    store = GameLogStore(path)
+    store.upsert_games('basketball', CURRENT_SEASON, DEFAULT_PLAYER, 'yahoo', stats['recent_games'])
+    store.close()
+    return {**os.environ, 'GAME_STORE_PATH': path, 'PREFETCH_ENABLED': '0',
+            'PLAYER_INDEX_PATH': os.path.join(directory, 'player_index.json')}
+
+
+def first_result(args, env):
+    """Seconds from spawning the CLI until its first line of output, and until it exits"""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, 'analyze.py', *args], cwd=ROOT, env=env, text=True,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    first = None
+    for line in process.stdout:
+        if first is None and line.strip():
+            first = time.perf_counter() - start
+    process.wait()
+    total = time.perf_counter() - start
+    return (first if first is not None else total), total, process.returncode
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import-time budget and CLI cold-start benchmark')
+    parser.add_argument('--module', default='analyze', help='Module whose import is measured')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per measurement')
+    parser.add_argument('--budget-ms', type=float, default=200.0, help='Allowed median import time')
+    parser.add_argument('--top', type=int, default=15, help='Slowest modules to list')
+    parser.add_argument('cli_args', nargs='*', help='Arguments for analyze.py (after --)')
+    args = parser.parse_args()
+
+    # The first run also writes bytecode caches, so it is not counted
+    import_profile(args.module)
+    profiles = [import_profile(args.module) for _ in range(args.runs)]
+    import_ms = statistics.median(times[args.module] for times, _ in profiles) / 1000
+    times, loaded = profiles[-1]
+    print(f'import {args.module}: {import_ms:.1f} ms median of {args.runs} (budget {args.budget_ms:.0f} ms)')
+    for name, micros in sorted(times.items(), key=lambda item: -item[1])[:args.top]:
+        print(f'{micros / 1000:>10.1f} ms  {name}')
+
+    cli_args = args.cli_args or DEFAULT_ARGS
+    with tempfile.TemporaryDirectory(prefix='bench-startup-') as directory:
+        env = seed_store(directory)
+        runs = [first_result(cli_args, env) for _ in range(args.runs)]
+    print(f'\npython analyze.py {shlex.join(cli_args)}')
+    print(f'first result: {statistics.median(r[0] for r in runs) * 1000:.0f} ms median, '
+          f'exit: {statistics.median(r[1] for r in runs) * 1000:.0f} ms median')
+    if any(r[2] for r in runs):
+        print(f'(exit status {runs[-1][2]})')
+
+    problems = []
+    if import_ms > args.budget_ms:
+        problems.append(f'import {args.module} took {import_ms:.1f} ms, over the {args.budget_ms:.0f} ms budget')
+    eager = sorted(loaded.intersection(DEFERRED))
+    if eager:
+        problems.append(f"import {args.module} loaded deferred dependencies: {', '.join(eager)}")
+    for problem in problems:
+        print(f'BUDGET {problem}')
+    if problems:
+        sys.exit(f'{len(problems)} startup budget check(s) failed')
+    print('Startup within budget')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Compare Yahoo stats parser backends on the saved fixture pages
+
+    python benchmarks/bench_yahoo_parser.py --repeat 200
+
+For each installed backend this reports the time to parse a page with the
+player-stats fragment cut out first (what the fetcher does) and the time to
+parse the full page, plus the speedup over the pure-Python html.parser path.
+"""
+import argparse
+import glob
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from yahoo_parser import PARSERS, stats_fragment  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'yahoo')
+
+
+def load_pages():
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES, '*.html'))):
+        with open(path, encoding='utf-8') as f:
+            pages.append(f.read())
+    return pages
+
+
+def time_per_page(fn, pages, repeat):
+    """Best-of-3 milliseconds per page"""
+    runs = timeit.repeat(lambda: [fn(page) for page in pages], number=repeat, repeat=3)
+    return min(runs) / (repeat * len(pages)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Yahoo parser backend micro-benchmark')
+    parser.add_argument('--repeat', type=int, default=100, help='Parses per page per run')
+    args = parser.parse_args()
+
+    pages = load_pages()
+    if not pages:
+        sys.exit(f'No fixture pages found in {FIXTURES}')
+    print(f'{len(pages)} fixture pages, avg {sum(map(len, pages)) // len(pages)} bytes\n')
+
+    backends = [cls() for cls in PARSERS.values() if cls.available()]
+    reference = [PARSERS['html.parser']().parse(page, 'basketball') for page in pages]
+
+    results = {}
+    for backend in backends:
+        # Every backend must agree with the reference parser before its timing counts
+        if [backend.parse(page, 'basketball') for page in pages] != reference:
+            print(f'{backend.name}: output differs from html.parser, skipping')
+            continue
+        results[backend.name] = (
+            time_per_page(lambda page: backend.parse(page, 'basketball'), pages, args.repeat),
+            time_per_page(backend.table_rows, pages, max(1, args.repeat // 10)),
+        )
+
+    baseline = results.get('html.parser', (None, None))[1]
+    print(f"{'backend':<14}{'fragment ms':>14}{'full page ms':>15}{'speedup':>10}")
+    for name, (fragment_ms, full_ms) in results.items():
+        speedup = f'{baseline / fragment_ms:.1f}x' if baseline else '-'
+        print(f'{name:<14}{fragment_ms:>14.3f}{full_ms:>15.3f}{speedup:>10}')
+    print('\nspeedup = html.parser on the full page / backend on the fragment')
+    print(f'fragment is {len(stats_fragment(pages[0])) * 100 // len(pages[0])}% of the first page')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+"""
+Drive POST /analyze at fixed request rates and find where the server saturates
+
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --rps 5 10 20 40 80 --duration 20
+    python benchmarks/load_test.py --rps 50 --duration 60 --arrivals uniform --json load.json
+
+Run it against the Flask app or the async server pointed at
+benchmarks/mock_upstream.py, so nothing reaches the real sources. Props are
+drawn from the recorded PrizePicks board. Each step sends requests open-loop
+at the target rate (Poisson arrivals by default), whether or not earlier
+ones have finished, so a server that falls behind shows up as growing
+latency rather than a slower send rate. Per step it reports the offered and
+achieved throughput (successful responses per second), latency percentiles
+and failures (HTTP errors, error results and timeouts). Saturation
+throughput is the highest achieved rate of a step that kept up with what it
+offered, stayed under the p99 limit and within the error budget.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pipeline import load_fixtures  # noqa: E402
+from prizepicks_board import LEAGUE_SPORTS  # noqa: E402
+
+# A step keeps up when it achieves at least this share of the rate it offered
+KEEP_UP = 0.95
+
+
+def board_props(board):
+    """/analyze payloads for every prop on the recorded board"""
+    return [
+        {'sport': LEAGUE_SPORTS[p['league']], 'player': p['player_name'], 'line': p['line'], 'stat': p['stat_type']}
+        for p in board['projections'] if p['league'] in LEAGUE_SPORTS
+    ]
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def send(session, url, payload, timeout, results):
+    start = time.perf_counter()
+    try:
+        async with session.post(url, json=payload, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            body = await response.json(content_type=None)
+            ok = response.status == 200 and isinstance(body, dict) and 'error' not in body
+            outcome = 'ok' if ok else f'http {response.status}' if response.status != 200 else 'error result'
+    except asyncio.TimeoutError:
+        outcome = 'timeout'
+    except (aiohttp.ClientError, ValueError) as e:
+        outcome = type(e).__name__
+    results.append((outcome, time.perf_counter() - start, time.perf_counter()))
+
+
+async def run_step(session, url, props, rps, duration, args, rng):
+    """Send at rps for duration seconds and wait for the stragglers; returns the step's metrics"""
+    results = []
+    tasks = set()
+    dropped = 0
+    start = time.perf_counter()
+    due = start
+    while True:
+        due += rng.expovariate(rps) if args.arrivals == 'poisson' else 1 / rps
+        if due - start >= duration:
+            break
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        if len(tasks) >= args.max_in_flight:
+            # The client would be measuring its own backlog from here on
+            dropped += 1
+            continue
+        task = asyncio.create_task(send(session, url, rng.choice(props), args.timeout, results))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    if tasks:
+        await asyncio.wait(set(tasks))
+    end = max([finished for _, _, finished in results], default=time.perf_counter())
+    latencies = [elapsed * 1000 for outcome, elapsed, _ in results if outcome == 'ok']
+    failures = {}
+    for outcome, _, _ in results:
+        if outcome != 'ok':
+            failures[outcome] = failures.get(outcome, 0) + 1
+    sent = len(results)
+    return {
+        'target_rps': rps,
+        'sent': sent,
+        'ok': len(latencies),
+        'failed': sent - len(latencies),
+        'dropped': dropped,
+        'failures': failures,
+        # Poisson arrivals wander around the target, so keeping up is judged against what was offered
+        'offered_rps': (sent + dropped) / duration,
+        'achieved_rps': len(latencies) / max(end - start, duration),
+        'p50_ms': percentile(latencies, 0.50),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+        'max_ms': max(latencies, default=None),
+        'mean_ms': statistics.fmean(latencies) if latencies else None,
+    }
+
+
+def kept_up(step, args):
+    attempted = step['sent'] + step['dropped']
+    return (
+        step['achieved_rps'] >= KEEP_UP * step['offered_rps']
+        and step['p99_ms'] is not None and step['p99_ms'] <= args.p99_limit_ms
+        and (step['failed'] + step['dropped']) <= args.error_budget * attempted
+    )
+
+
+def fmt(value):
+    return f'{value:.0f}' if value is not None else '-'
+
+
+async def run(args):
+    props = board_props(load_fixtures()[2])
+    rng = random.Random(args.seed)
+    url = args.url.rstrip('/') + '/analyze'
+    connector = aiohttp.TCPConnector(limit=args.max_in_flight)
+    steps = []
+    async with aiohttp.ClientSession(connector=connector) as session:
+        if args.warmup:
+            print(f'Warming up for {args.warmup:g}s at {args.rps[0]:g} req/s')
+            await run_step(session, url, props, args.rps[0], args.warmup, args, rng)
+        print(f"{'target':>8}{'offered':>9}{'sent':>7}{'ok':>7}{'failed':>7}{'dropped':>8}{'achieved':>10}"
+              f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+        for rps in args.rps:
+            step = await run_step(session, url, props, rps, args.duration, args, rng)
+            step['kept_up'] = kept_up(step, args)
+            steps.append(step)
+            print(f"{rps:>8g}{step['offered_rps']:>9.1f}{step['sent']:>7}{step['ok']:>7}{step['failed']:>7}"
+                  f"{step['dropped']:>8}{step['achieved_rps']:>10.1f}{fmt(step['p50_ms']):>9}{fmt(step['p95_ms']):>9}"
+                  f"{fmt(step['p99_ms']):>9}{fmt(step['max_ms']):>9}"
+                  f"{'' if step['kept_up'] else '  saturated'}")
+            if step['failures']:
+                print(' ' * 8 + ', '.join(f'{outcome}: {count}' for outcome, count in sorted(step['failures'].items())))
+            if not step['kept_up'] and args.stop_at_saturation:
+                break
+        upstream = None
+        if args.upstream_stats:
+            async with session.get(args.upstream_stats) as response:
+                upstream = await response.json()
+    return steps, upstream
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Open-loop load generator for POST /analyze')
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the app under test')
+    parser.add_argument('--rps', type=float, nargs='+', default=[5, 10, 20, 40, 80],
+                        help='Target request rates, one step each, in order')
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds per step')
+    parser.add_argument('--warmup', type=float, default=0.0, help='Unmeasured seconds at the first rate')
+    parser.add_argument('--arrivals', choices=('poisson', 'uniform'), default='poisson')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Seconds before a request counts as timed out')
+    parser.add_argument('--max-in-flight', type=int, default=1000, help='Requests outstanding before new ones are dropped')
+    parser.add_argument('--p99-limit-ms', type=float, default=2000.0, help='p99 latency a step must stay under')
+    parser.add_argument('--error-budget', type=float, default=0.01, help='Share of failed requests a step may have')
+    parser.add_argument('--stop-at-saturation', action='store_true', help='Skip the remaining steps once one saturates')
+    parser.add_argument('--upstream-stats', help='Print this JSON URL at the end (e.g. the mock\'s /_stats)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for arrivals and prop choice')
+    parser.add_argument('--json', help='Write every step\'s metrics to this file')
+    args = parser.parse_args()
+
+    steps, upstream = asyncio.run(run(args))
+    sustained = [step for step in steps if step['kept_up']]
+    if sustained:
+        best = max(sustained, key=lambda step: step['achieved_rps'])
+        print(f"\nSaturation throughput: {best['achieved_rps']:.1f} req/s "
+              f"(p99 {fmt(best['p99_ms'])} ms at a {best['target_rps']:g} req/s target)")
+        if len(sustained) == len(steps):
+            print('Every step kept up; raise --rps to find the limit')
+    else:
+        print(f'\nNo step kept up (achieved >= {KEEP_UP:.0%} of offered, p99 <= {args.p99_limit_ms:.0f} ms, '
+              f'failures <= {args.error_budget:.0%})')
+    if upstream is not None:
+        print(f'Upstream requests: {json.dumps(upstream)}')
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'steps': steps, 'upstream': upstream}, f, indent=2)
+        print(f'Results written to {args.json}')
+
+
+if __name__ == '__main__':
+    main()
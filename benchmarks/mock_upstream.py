@@ -0,0 +1,188 @@
+"""
+Local stand-in for Yahoo, ESPN and PrizePicks, for load tests that never touch the real hosts
+
+    python benchmarks/mock_upstream.py --port 9000
+    python benchmarks/mock_upstream.py --latency 0.05:0.6 --latency espn=0.2:0.8 --error-rate yahoo=0.02 \\
+        --rate-limit 50
+
+Serves the recorded fixtures in benchmarks/fixtures: any Yahoo player page
+slug maps onto one of the saved pages, any ESPN player onto one of the saved
+records (with a stable playerId per name) and /projections returns the saved
+board with an ETag. Point the app at it with
+
+    YAHOO_BASE_URL=http://127.0.0.1:9000
+    ESPN_BASE_URL=http://127.0.0.1:9000/espn
+    PRIZEPICKS_URL=http://127.0.0.1:9000/projections
+
+Each source can be given its own latency distribution (MEDIAN[:SIGMA]
+seconds, log-normal; no sigma means a fixed delay), error rate (answered
+with HTTP 500) and rate limit (requests per second with one second of burst;
+the excess gets HTTP 429 with Retry-After). Options without SOURCE= apply to
+every source. GET /_stats returns the requests served per source and status.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import zlib
+from collections import Counter
+
+from aiohttp import web
+
+from bench_pipeline import load_fixtures, recorded
+
+SOURCES = ('yahoo', 'espn', 'prizepicks')
+
+
+class Quota:
+    """Requests per second with one second of burst; unlike a TokenBucket, the excess is refused"""
+
+    def __init__(self, rate):
+        self.rate = float(rate)
+        self.burst = max(self.rate, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+
+    def take(self):
+        """0.0 when the request may proceed, else the seconds until a token is free"""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+
+def per_source(values, parse, default):
+    """{source: value} from repeated [SOURCE=]VALUE options; a bare VALUE applies to every source"""
+    settings = dict.fromkeys(SOURCES, default)
+    for value in values or ():
+        source, _, setting = value.rpartition('=')
+        if source and source not in SOURCES:
+            raise argparse.ArgumentTypeError(f'unknown source {source!r} in {value!r}')
+        for name in ((source,) if source else SOURCES):
+            settings[name] = parse(setting)
+    return settings
+
+
+def parse_latency(value):
+    """'MEDIAN[:SIGMA]' -> (median, sigma)"""
+    median, _, sigma = value.partition(':')
+    return float(median), float(sigma or 0)
+
+
+class MockUpstream:
+    """Serves the fixtures with the configured latency, errors and rate limits per source"""
+
+    def __init__(self, fixtures, latency, error_rate, rate_limit, seed=None):
+        self.pages, self.espn_players, board = fixtures
+        self.board = json.dumps(board)
+        self.board_etag = f'"{zlib.crc32(self.board.encode()):08x}"'
+        self.latency = latency
+        self.error_rate = error_rate
+        self.quotas = {source: Quota(rate) for source, rate in rate_limit.items() if rate}
+        self.random = random.Random(seed)
+        self.counts = Counter()
+        # playerId -> the name it was first handed out for, so lookups by ID stay consistent
+        self.espn_names = {}
+
+    def delay(self, source):
+        median, sigma = self.latency[source]
+        if median <= 0:
+            return 0.0
+        return median * math.exp(self.random.gauss(0, sigma)) if sigma else median
+
+    async def serve(self, source, respond):
+        """Apply the rate limit, latency and error rate of a source before answering"""
+        quota = self.quotas.get(source)
+        retry_after = quota.take() if quota else 0.0
+        if retry_after:
+            self.counts[(source, 429)] += 1
+            return web.Response(status=429, headers={'Retry-After': str(math.ceil(retry_after))})
+        await asyncio.sleep(self.delay(source))
+        if self.random.random() < self.error_rate[source]:
+            self.counts[(source, 500)] += 1
+            return web.Response(status=500, text='injected error')
+        response = respond()
+        self.counts[(source, response.status)] += 1
+        return response
+
+    async def yahoo(self, request):
+        slug = request.match_info['slug']
+        return await self.serve('yahoo', lambda: web.Response(text=recorded(self.pages, slug),
+                                                              content_type='text/html'))
+
+    async def espn(self, request):
+        sport = request.match_info['sport']
+        if sport not in self.espn_players:
+            return web.Response(status=404)
+        name = request.query.get('name')
+        if name is None:
+            try:
+                player_id = int(request.query['playerId'])
+            except (KeyError, ValueError):
+                return web.Response(status=400)
+            name = self.espn_names.get(player_id)
+            if name is None:
+                return await self.serve('espn', lambda: web.Response(status=404))
+        player_id = zlib.crc32(name.encode()) & 0x7fffffff
+        self.espn_names.setdefault(player_id, name)
+        record = recorded(self.espn_players[sport], name)
+        return await self.serve('espn', lambda: web.json_response({**record, 'name': name, 'playerId': player_id}))
+
+    async def projections(self, request):
+        def respond():
+            if request.headers.get('If-None-Match') == self.board_etag:
+                return web.Response(status=304, headers={'ETag': self.board_etag})
+            return web.Response(text=self.board, content_type='application/json',
+                                headers={'ETag': self.board_etag})
+        return await self.serve('prizepicks', respond)
+
+    async def stats(self, request):
+        counts = {}
+        for (source, status), count in sorted(self.counts.items()):
+            counts.setdefault(source, {})[str(status)] = count
+        return web.json_response(counts)
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get('/{sport_code:nba|nfl}/players/{slug}', self.yahoo)
+        app.router.add_get('/espn/{sport}/players', self.espn)
+        app.router.add_get('/projections', self.projections)
+        app.router.add_get('/_stats', self.stats)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock Yahoo, ESPN and PrizePicks upstreams serving recorded fixtures')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--latency', action='append', metavar='[SOURCE=]MEDIAN[:SIGMA]',
+                        help='Response delay in seconds, log-normal when SIGMA is given (repeatable)')
+    parser.add_argument('--error-rate', action='append', metavar='[SOURCE=]RATE',
+                        help='Fraction of requests answered with HTTP 500 (repeatable)')
+    parser.add_argument('--rate-limit', action='append', metavar='[SOURCE=]RPS',
+                        help='Requests per second before HTTP 429, 0 for none (repeatable)')
+    parser.add_argument('--seed', type=int, help='Seed for latencies and injected errors')
+    args = parser.parse_args()
+
+    try:
+        latency = per_source(args.latency, parse_latency, (0.0, 0.0))
+        error_rate = per_source(args.error_rate, float, 0.0)
+        rate_limit = per_source(args.rate_limit, float, 0.0)
+    except (argparse.ArgumentTypeError, ValueError) as e:
+        parser.error(str(e))
+
+    upstream = MockUpstream(load_fixtures(), latency, error_rate, rate_limit, seed=args.seed)
+    for source in SOURCES:
+        median, sigma = latency[source]
+        print(f"{source:>10}: latency {median * 1000:.0f} ms (sigma {sigma:g}), "
+              f"errors {error_rate[source]:.1%}, rate limit {rate_limit[source] or 'none'}")
+    web.run_app(upstream.app(), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
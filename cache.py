@@ -0,0 +1,134 @@
+import asyncio
+import pickle
+import time
+from collections import OrderedDict
+
+
+class _Entry:
+    __slots__ = ('value', 'size', 'fresh_until', 'stale_until')
+
+    def __init__(self, value, size, fresh_until, stale_until):
+        self.value = value
+        self.size = size
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+class SourceCache:
+    """
+    LRU cache for per-player source data with TTLs and stale-while-revalidate
+
+    Keys are (source, sport, player) tuples. Entries are fresh for ``ttl``
+    seconds, then served as-is for up to ``stale_ttl`` more seconds while a
+    single background refresh runs. Concurrent misses for one key share the
+    same upstream fetch. Not thread-safe: use it from one event loop.
+    """
+
+    def __init__(self, max_entries=2048, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._counters = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'refreshes': 0,
+            'evictions': 0,
+        }
+
+    async def get_or_fetch(self, key, fetch, ttl, stale_ttl=0.0):
+        """Return the cached value for key, calling fetch() (a coroutine factory) when needed"""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if now < entry.fresh_until:
+                self._counters['hits'] += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            if now < entry.stale_until:
+                self._counters['stale_hits'] += 1
+                self._entries.move_to_end(key)
+                if key not in self._inflight:
+                    self._counters['refreshes'] += 1
+                    self._start_fetch(key, fetch, ttl, stale_ttl, background=True)
+                return entry.value
+
+        if key in self._inflight:
+            self._counters['coalesced'] += 1
+            task = self._inflight[key]
+        else:
+            self._counters['misses'] += 1
+            task = self._start_fetch(key, fetch, ttl, stale_ttl)
+        # Shield so a caller timing out does not cancel the fetch other callers share
+        return await asyncio.shield(task)
+
+    async def refresh(self, key, fetch, ttl, stale_ttl=0.0):
+        """Fetch key again now, ahead of its TTL; the current entry is served until the new value lands"""
+        task = self._inflight.get(key)
+        if task is None:
+            self._counters['refreshes'] += 1
+            task = self._start_fetch(key, fetch, ttl, stale_ttl)
+        return await asyncio.shield(task)
+
+    def _start_fetch(self, key, fetch, ttl, stale_ttl, background=False):
+        task = asyncio.ensure_future(self._load(key, fetch, ttl, stale_ttl))
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._fetch_done(key, t, background))
+        return task
+
+    def _fetch_done(self, key, task, background):
+        self._inflight.pop(key, None)
+        # Background refreshes have no awaiting caller, so report their errors here
+        if not task.cancelled() and task.exception() is not None and background:
+            print(f"Error refreshing {key[0]} data for {key[2]}: {task.exception()}")
+
+    async def _load(self, key, fetch, ttl, stale_ttl):
+        value = await fetch()
+        # Failed fetches come back as None and are never cached
+        if value is not None:
+            self.set(key, value, ttl, stale_ttl)
+        return value
+
+    def set(self, key, value, ttl, stale_ttl=0.0):
+        """Store a value, evicting least recently used entries past the size bounds"""
+        size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return
+        self.invalidate(key)
+        now = time.monotonic()
+        self._entries[key] = _Entry(value, size, now + ttl, now + ttl + stale_ttl)
+        self.total_bytes += size
+        while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.total_bytes -= evicted.size
+            self._counters['evictions'] += 1
+
+    def peek(self, key):
+        """Return a cached value regardless of age, or None"""
+        entry = self._entries.get(key)
+        return entry.value if entry is not None else None
+
+    def invalidate(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry.size
+
+    def clear(self):
+        self._entries.clear()
+        self.total_bytes = 0
+
+    def stats(self):
+        """Hit/miss/eviction counters plus current size, for sizing the cache"""
+        lookups = self._counters['hits'] + self._counters['stale_hits'] + self._counters['misses']
+        return {
+            **self._counters,
+            'entries': len(self._entries),
+            'bytes': self.total_bytes,
+            'hit_rate': (self._counters['hits'] + self._counters['stale_hits']) / lookups if lookups else 0.0,
+        }
+
+    def __len__(self):
+        return len(self._entries)
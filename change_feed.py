@@ -0,0 +1,33 @@
+import asyncio
+
+
+class ChangeFeed:
+    """Fan-out of data-change events (board updates, injury changes) to asyncio subscribers"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._subscribers = set()
+        self._loop = None
+
+    def subscribe(self):
+        """Return a queue that receives every event published from now on"""
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(self.maxsize)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+
+    def publish(self, event):
+        """Deliver an event to every subscriber; call from the subscribers' loop"""
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                pass  # a stalled subscriber misses events rather than blocking everyone
+
+    def publish_threadsafe(self, event):
+        """Publish from a worker thread (e.g. the ESPN executor)"""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self.publish, event)
@@ -1,132 +1,244 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from espn_api.basketball import Basketball
-from espn_api.football import Football
-import aiohttp
 import asyncio
+import contextvars
 import json
+import time
 from datetime import datetime, timedelta
 import os
-from dotenv import load_dotenv
+from urllib.parse import urlsplit
+from resources import get_resources, RETRY_STATUSES
+from ratelimit import CircuitOpenError, CLOSED
+from prizepicks_board import normalize_player_name
+from game_store import normalize_game_date
+from yahoo_parser import parse_yahoo_stats
+from player_index import yahoo_slug
+from instrumentation import metrics, span
 
-load_dotenv()
+# Seconds each source's upstream may take before the analysis continues without it.
+# Waiting for the host's rate limiter comes first and does not count.
+SOURCE_TIMEOUTS = {
+    'yahoo': 8.0,
+    'espn': 10.0,
+    'prizepicks': 5.0,
+}
+
+# (ttl, stale_ttl) in seconds. Game logs only change after a game finishes, so
+# stale data is served while a background refresh catches up.
+SOURCE_CACHE_TTLS = {
+    'yahoo': (float(os.getenv('YAHOO_CACHE_TTL', '900')), 3600.0),
+    'espn': (float(os.getenv('ESPN_CACHE_TTL', '900')), 3600.0),
+}
+
+# Season key for ESPN stats and for rows in the game-log store
+CURRENT_SEASON = os.getenv('CURRENT_SEASON', '2023')
+
+# ESPN fields whose change should re-score live streams for that player
+INJURY_FIELDS = ('injury_status', 'injury_details', 'injury_update_date')
+
+# espn_api talks to ESPN with its own HTTP client; its requests share this host's rate limit
+ESPN_HOST = 'fantasy.espn.com'
+
+PRIZEPICKS_URL = os.getenv('PRIZEPICKS_URL', "https://api.prizepicks.com/projections")  # Replace with actual API endpoint
+# The whole board is downloaded at most once per interval and shared by every lookup
+PRIZEPICKS_REFRESH_INTERVAL = float(os.getenv('PRIZEPICKS_REFRESH_INTERVAL', '60'))
+
+# Where each source is fetched from; point these at a stand-in server (benchmarks/mock_upstream.py)
+# to run without the real hosts. ESPN goes through espn_api unless an HTTP base URL is set.
+ENDPOINTS = {
+    'yahoo': os.getenv('YAHOO_BASE_URL', "https://sports.yahoo.com"),
+    'espn': os.getenv('ESPN_BASE_URL') or None,
+    'prizepicks': PRIZEPICKS_URL,
+}
+
+_dotenv_loaded = False
+
+
+def prizepicks_api_key():
+    """The PrizePicks API key, reading .env the first time a key is needed rather than at import"""
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _dotenv_loaded = True
+    return os.getenv('PRIZEPICKS_API_KEY')
 
 class SportDataFetcher:
-    def __init__(self):
-        self.setup_selenium()
-        self.setup_espn_api()
-        
-    def setup_selenium(self):
-        """Setup Selenium WebDriver with headless mode"""
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        
-        self.driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()),
-            options=chrome_options
-        )
-        
-    def setup_espn_api(self):
-        """Setup ESPN API clients"""
-        self.espn_nba = Basketball()
-        self.espn_nfl = Football()
-        
-    async def fetch_yahoo_stats(self, player_name, sport):
-        """Fetch player stats from Yahoo Sports"""
+    def __init__(self, resources=None, source_timeouts=None, offline=False, endpoints=None):
+        # Chrome, ESPN clients and HTTP sessions are process-wide and created on first use
+        self.resources = resources or get_resources()
+        self.source_timeouts = {**SOURCE_TIMEOUTS, **(source_timeouts or {})}
+        self.endpoints = {**ENDPOINTS, **(endpoints or {})}
+        # Offline mode answers entirely from the local game-log store
+        self.offline = offline
+
+    @property
+    def espn_nba(self):
+        return self.resources.espn_client("basketball", self.endpoints['espn'])
+
+    @property
+    def espn_nfl(self):
+        return self.resources.espn_client("football", self.endpoints['espn'])
+
+    async def fetch_yahoo_stats(self, player_name, sport, slug=None):
+        """Fetch player stats from Yahoo Sports, by the crosswalk's page slug when it has one"""
         sport_code = "nba" if sport == "basketball" else "nfl"
-        url = f"https://sports.yahoo.com/{sport_code}/players/{player_name.replace(' ', '-').lower()}"
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    stats = self._parse_yahoo_stats(soup, sport)
-                    return stats
+        slug = slug or yahoo_slug(player_name)
+        url = f"{self.endpoints['yahoo']}/{sport_code}/players/{slug}"
+
+        with self.resources.cpu_job():
+            with span('upstream', source='yahoo'):
+                response = await self.resources.http_get(url, paced=True)
+            if response.status in RETRY_STATUSES:
+                # Still throttled or failing after retries: let the circuit breaker see it
+                raise RuntimeError(f"Yahoo returned HTTP {response.status}")
+            if response.status != 200:
                 return None
-                
-    def fetch_espn_stats(self, player_name, sport):
-        """Fetch player stats from ESPN"""
-        try:
+            with span('parse', source='yahoo'):
+                stats = await self.resources.run_cpu(parse_yahoo_stats, response.body, sport)
+        if stats.get('recent_games'):
+            self.resources.player_index().link(sport, [player_name], yahoo=slug)
+        return await self._in_executor(self._sync_store, 'yahoo', player_name, sport, stats)
+
+    def fetch_espn_stats(self, player_name, sport, espn_id=None):
+        """
+        Fetch player stats from ESPN, by the crosswalk's player ID when it has one
+
+        Blocking; the caller takes ESPN's rate-limit token first (see
+        _upstream). Errors propagate to the caller's source status.
+        """
+        # Only games newer than what is already stored need to be parsed and written
+        since = self.resources.game_store().latest_date(sport, CURRENT_SEASON, player_name, 'espn')
+        client = self.espn_nba if sport == "basketball" else self.espn_nfl
+        with span('upstream', source='espn'):
+            if espn_id is not None:
+                player = client.player_info(playerId=espn_id)
+            else:
+                player = client.player_info(player_name)
+        with span('parse', source='espn'):
             if sport == "basketball":
-                player = self.espn_nba.player_info(player_name)
-                return self._parse_espn_basketball_stats(player)
+                stats = self._parse_espn_basketball_stats(player, since)
             else:
-                player = self.espn_nfl.player_info(player_name)
-                return self._parse_espn_football_stats(player)
-        except Exception as e:
-            print(f"Error fetching ESPN stats: {e}")
+                stats = self._parse_espn_football_stats(player, since)
+        # ESPN's spelling of the name becomes one more way to find this player
+        self.resources.player_index().link(sport, [player_name, player.name],
+                                           espn=getattr(player, 'playerId', None))
+        return self._sync_store('espn', player_name, sport, stats)
+
+    async def fetch_espn_stats_async(self, player_name, sport, espn_id=None):
+        """Fetch ESPN stats on the shared executor so the blocking client never stalls the loop"""
+        return await self._in_executor(self.fetch_espn_stats, player_name, sport, espn_id)
+
+    async def _in_executor(self, fn, *args):
+        """Run blocking work on the shared executor, keeping the caller's request timings"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.resources.executor, contextvars.copy_context().run, fn, *args
+        )
+
+    def _sync_store(self, source, player_name, sport, stats):
+        """Write newly fetched games to the store and read back the full history"""
+        with span('store', source=source):
+            store = self.resources.game_store()
+            store.upsert_games(sport, CURRENT_SEASON, player_name, source, stats.get('recent_games', []))
+            self.resources.feature_index().add_games(sport, player_name, source, stats.get('recent_games', []))
+            if source == 'espn':
+                info = {k: v for k, v in stats.items() if k != 'recent_games'}
+                previous = store.load_player_info(sport, player_name)
+                store.save_player_info(sport, player_name, info)
+                if previous is not None and any(
+                    previous.get(field) != info.get(field) for field in INJURY_FIELDS
+                ):
+                    self.resources.changes.publish_threadsafe(
+                        {'type': 'injury', 'sport': sport, 'player': normalize_player_name(player_name)}
+                    )
+            stats['recent_games'] = store.load_games(sport, player_name, source=source, season=CURRENT_SEASON)
+            return stats
+
+    def _load_from_store(self, source, player_name, sport):
+        """Stats for one source built only from the store, for offline runs"""
+        store = self.resources.game_store()
+        games = store.load_games(sport, player_name, source=source)
+        if not games:
             return None
-            
-    def fetch_prizepicks_odds(self, player_name):
+        stats = (store.load_player_info(sport, player_name) or {}) if source == 'espn' else {}
+        stats['recent_games'] = games
+        return stats
+
+    async def fetch_prizepicks_odds(self, player_name, stat_type=None):
         """Fetch current PrizePicks odds"""
         # Note: This is a placeholder. You would need to implement the actual
         # PrizePicks API integration or web scraping logic
-        url = "https://api.prizepicks.com/projections"  # Replace with actual API endpoint
-        headers = {"Authorization": f"Bearer {os.getenv('PRIZEPICKS_API_KEY')}"}
-        
-        try:
-            response = requests.get(url, headers=headers)
-            if response.status_code == 200:
-                data = response.json()
-                # Parse the response to find the player's odds
-                return self._parse_prizepicks_data(data, player_name)
-        except Exception as e:
-            print(f"Error fetching PrizePicks odds: {e}")
+        board = await self.refresh_board()
+        if not board.loaded:
             return None
+        return board.lookup(player_name, stat_type)
+
+    async def board_odds(self, player_name):
+        """
+        A player's current board projections, refreshing the board first if it is stale
+
+        :return: (projections, status) with the same status fields iter_player_data yields
+        """
+        return await self._run_source('prizepicks', self.fetch_prizepicks_odds(player_name))
             
-    def _parse_yahoo_stats(self, soup, sport):
-        """Parse Yahoo Sports HTML for player stats"""
-        stats = {}
-        
-        if sport == "basketball":
-            # Find the stats table
-            stats_table = soup.find('div', class_='player-stats')
-            if stats_table:
-                # Extract recent game stats
-                recent_games = []
-                for row in stats_table.find_all('tr')[1:6]:  # Last 5 games
-                    cols = row.find_all('td')
-                    if len(cols) >= 3:
-                        game_stats = {
-                            'date': cols[0].text.strip(),
-                            'points': float(cols[2].text.strip()),
-                            'rebounds': float(cols[3].text.strip()),
-                            'assists': float(cols[4].text.strip())
-                        }
-                        recent_games.append(game_stats)
-                
-                stats['recent_games'] = recent_games
-                
-                # Calculate averages
-                if recent_games:
-                    stats['avg_points'] = sum(g['points'] for g in recent_games) / len(recent_games)
-                    stats['avg_rebounds'] = sum(g['rebounds'] for g in recent_games) / len(recent_games)
-                    stats['avg_assists'] = sum(g['assists'] for g in recent_games) / len(recent_games)
-        
-        return stats
-        
-    def _parse_espn_basketball_stats(self, player_data):
-        """Parse ESPN basketball stats"""
+    def board(self):
+        """The shared PrizePicks board snapshot"""
+        headers = {"Authorization": f"Bearer {prizepicks_api_key()}"}
+        return self.resources.prizepicks_board(self.endpoints['prizepicks'], PRIZEPICKS_REFRESH_INTERVAL, headers)
+
+    async def refresh_board(self, force=False):
+        """
+        Re-download the shared board if it is stale and return it
+
+        Goes through the same rate limiter and circuit breaker as the sources.
+        """
+        board = self.board()
+        await board.refresh(self._board_get, force)
+        return board
+
+    async def _board_get(self, url, headers=None, as_json=False):
+        """http_get for board refreshes, paced and guarded like the other upstream calls"""
+        async def fetch():
+            response = await self.resources.http_get(url, headers=headers, as_json=as_json, paced=True)
+            if response.status in RETRY_STATUSES:
+                raise RuntimeError(f"PrizePicks returned HTTP {response.status}")
+            return response
+        return await self._upstream('prizepicks', fetch)
+
+    async def resolve_player(self, player_name, sport):
+        """
+        Look a player up in the crosswalk before anything is fetched
+
+        Online, a stale board is refreshed first (it is shared, so this costs
+        at most one request per interval) so that every listed player resolves.
+
+        :return: (record, suggestions); record is None for an unknown name and
+                 suggestions then holds the closest known names
+        """
+        return await self.resources.on_loop(self._resolve(player_name, sport))
+
+    async def _resolve(self, player_name, sport):
+        breaker = self.resources.circuit_breaker('prizepicks')
+        if not self.offline and breaker.state == CLOSED:
+            # A failed refresh resolves against the last board (or the persisted index) instead
+            await self.refresh_board()
+        index = self.resources.player_index()
+        record = index.resolve(sport, player_name)
+        return record, ([] if record else index.suggest(sport, player_name))
+
+    def _parse_espn_basketball_stats(self, player_data, since=None):
+        """Parse ESPN basketball stats, skipping games on or before since"""
         stats = {
             'name': player_data.name,
             'team': player_data.team,
             'position': player_data.position,
+            'injury_status': getattr(player_data, 'injuryStatus', 'Unknown'),
             'recent_games': []
         }
         
         # Get recent game stats
-        for game in player_data.stats['2023']:  # Current season
+        for game in player_data.stats[CURRENT_SEASON]:
+            if since is not None and normalize_game_date(game.date) <= since:
+                continue
             game_stats = {
                 'date': game.date,
                 'points': game.points,
@@ -138,64 +250,200 @@ class SportDataFetcher:
             
         return stats
         
-    def _parse_espn_football_stats(self, player_data):
-        """Parse ESPN football stats"""
+    def _parse_espn_football_stats(self, player_data, since=None):
+        """Parse ESPN football stats, skipping games on or before since"""
         stats = {
             'name': player_data.name,
             'team': player_data.team,
             'position': player_data.position,
+            'injury_status': getattr(player_data, 'injuryStatus', 'Unknown'),
             'recent_games': []
         }
         
         # Get recent game stats
-        for game in player_data.stats['2023']:  # Current season
+        for game in player_data.stats[CURRENT_SEASON]:
+            if since is not None and normalize_game_date(game.date) <= since:
+                continue
             game_stats = {
                 'date': game.date,
                 'passing_yards': game.passing_yards,
                 'rushing_yards': game.rushing_yards,
+                'receiving_yards': getattr(game, 'receiving_yards', None),
+                'receptions': getattr(game, 'receptions', None),
                 'touchdowns': game.touchdowns
             }
             stats['recent_games'].append(game_stats)
             
         return stats
         
-    def _parse_prizepicks_data(self, data, player_name):
-        """Parse PrizePicks API response"""
-        projections = []
-        
-        for projection in data.get('projections', []):
-            if projection['player_name'].lower() == player_name.lower():
-                projections.append({
-                    'stat_type': projection['stat_type'],
-                    'line': projection['line'],
-                    'timestamp': projection['timestamp']
-                })
-                
-        return projections
-        
-    async def get_complete_player_data(self, player_name, sport):
-        """Get comprehensive player data from multiple sources"""
-        # Fetch data from multiple sources concurrently
-        yahoo_stats_task = asyncio.create_task(self.fetch_yahoo_stats(player_name, sport))
-        espn_stats = self.fetch_espn_stats(player_name, sport)
-        prizepicks_odds = self.fetch_prizepicks_odds(player_name)
-        
-        # Wait for async tasks to complete
-        yahoo_stats = await yahoo_stats_task
-        
-        # Combine data from all sources
-        combined_data = {
+    async def get_complete_player_data(self, player_name, sport, player=None, refresh=()):
+        """
+        Get comprehensive player data from multiple sources
+
+        :param player: The player's crosswalk record from resolve_player; its
+                       display name then keys the cache, store and results
+        :param refresh: Sources ('yahoo', 'espn') to re-fetch now even if cached
+        """
+        if player is not None:
+            player_name = player['name']
+        # Sources share the manager's loop, so hop onto it if called from elsewhere
+        return await self.resources.on_loop(self._gather_sources(player_name, sport, player, refresh))
+
+    def _source_fetches(self, player_name, sport, player=None, refresh=()):
+        """One awaitable per source, reading the local store instead in offline mode"""
+        if self.offline:
+            loop = asyncio.get_running_loop()
+            return {
+                source: asyncio.wait_for(loop.run_in_executor(
+                    self.resources.executor, self._load_from_store, source, player_name, sport
+                ), self.source_timeouts[source])
+                for source in ('yahoo', 'espn')
+            }
+        if player is None:
+            player = self.resources.player_index().resolve(sport, player_name) or {}
+        # Only cache misses reach _upstream, so hits never count towards a circuit breaker
+        return {
+            'yahoo': self._cached('yahoo', player_name, sport, lambda: self._upstream(
+                'yahoo', lambda: self.fetch_yahoo_stats(player_name, sport, player.get('yahoo'))
+            ), 'yahoo' in refresh),
+            'espn': self._cached('espn', player_name, sport, lambda: self._upstream(
+                'espn', lambda: self.fetch_espn_stats_async(player_name, sport, player.get('espn'))
+            ), 'espn' in refresh),
+            'prizepicks': self.fetch_prizepicks_odds(player_name),
+        }
+
+    async def iter_player_data(self, player_name, sport, player=None, refresh=()):
+        """
+        Yield (source, data, status) for each source as soon as it finishes
+
+        Sources are asked by the keys in player (a crosswalk record), looked up
+        by name when it is not given; sources in refresh skip the cache.
+
+        Must be iterated on resources.loop; get_complete_player_data is the
+        all-at-once version that can be awaited from anywhere.
+        """
+        async def run(name, fetch):
+            fallback = lambda: self._last_known(name, player_name, sport)  # noqa: E731
+            return (name, *await self._run_source(name, fetch, fallback))
+
+        pending = {
+            asyncio.ensure_future(run(name, fetch))
+            for name, fetch in self._source_fetches(player_name, sport, player, refresh).items()
+        }
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _gather_sources(self, player_name, sport, player=None, refresh=()):
+        """Fetch every source concurrently; slow or failing sources contribute None"""
+        data, source_timings = {}, {}
+        async for name, result, status in self.iter_player_data(player_name, sport, player, refresh):
+            data[name] = result
+            source_timings[name] = status
+        return self.combine_player_data(player_name, sport, data, source_timings)
+
+    def combine_player_data(self, player_name, sport, data, source_timings):
+        """Combine data from all sources (missing ones count as None)"""
+        return {
             'player_name': player_name,
             'sport': sport,
-            'yahoo_stats': yahoo_stats,
-            'espn_stats': espn_stats,
-            'prizepicks_odds': prizepicks_odds,
+            'yahoo_stats': data.get('yahoo'),
+            'espn_stats': data.get('espn'),
+            'prizepicks_odds': data.get('prizepicks'),
+            'source_timings': source_timings,
+            'partial': any(d is None for d in data.values()),
+            'offline': self.offline,
             'last_updated': datetime.now().isoformat()
         }
-        
-        return combined_data
+
+    async def _cached(self, source, player_name, sport, fetch, refresh=False):
+        """Serve a source from the shared cache, fetching on a miss (or right away with refresh)"""
+        ttl, stale_ttl = SOURCE_CACHE_TTLS[source]
+        key = (source, sport, normalize_player_name(player_name))
+        if refresh:
+            return await self.resources.source_cache.refresh(key, fetch, ttl, stale_ttl)
+        return await self.resources.source_cache.get_or_fetch(key, fetch, ttl, stale_ttl)
+
+    def cache_stats(self):
+        """Hit, miss and eviction counters for the shared source cache"""
+        return self.resources.source_cache.stats()
+
+    def _last_known(self, source, player_name, sport):
+        """Whatever we last had for a source, served while its circuit is open"""
+        if source == 'prizepicks':
+            board = self.resources.prizepicks_board(self.endpoints['prizepicks'], PRIZEPICKS_REFRESH_INTERVAL)
+            return board.lookup(player_name) if board.loaded else None
+        return self.resources.source_cache.peek((source, sport, normalize_player_name(player_name)))
+
+    def _host(self, source):
+        """The host whose rate limit a source's requests count against"""
+        if source == 'espn' and self.endpoints['espn'] is None:
+            return ESPN_HOST
+        return urlsplit(self.endpoints[source]).hostname
+
+    async def _upstream(self, source, fetch):
+        """
+        Make one call to a source's upstream and report it to the source's circuit breaker
+
+        The host's rate-limit token is taken before the source timeout starts,
+        so waiting our turn is never mistaken for a slow upstream. Raises
+        CircuitOpenError while the breaker turns calls away.
+        """
+        breaker = self.resources.circuit_breaker(source)
+        if not breaker.allow():
+            raise CircuitOpenError(source)
+        await self.resources.pace(self._host(source))
+        try:
+            result = await asyncio.wait_for(fetch(), self.source_timeouts[source])
+        except Exception:
+            breaker.record(False)
+            raise
+        breaker.record(True)
+        return result
+
+    async def _run_source(self, name, coro, fallback=None):
+        """
+        Await one source and record how it went
+
+        Timeouts and circuit breaking happen where the upstream is called (see
+        _upstream). While the source's circuit is open fallback() (e.g. stale
+        cached data) is returned instead.
+        """
+        status = {'elapsed': 0.0, 'timed_out': False, 'error': None, 'circuit_open': False}
+        breaker = None if self.offline else self.resources.circuit_breaker(name)
+        if breaker is not None and breaker.blocked():
+            coro.close()
+            return self._circuit_open(name, fallback, status)
+
+        start = time.perf_counter()
+        try:
+            with span('fetch', source=name):
+                result = await coro
+        except CircuitOpenError:
+            # The circuit opened while this fetch was waiting
+            return self._circuit_open(name, fallback, status)
+        except asyncio.TimeoutError:
+            result = None
+            status['timed_out'] = True
+            metrics.inc('prizepicks_source_timeouts_total', source=name)
+        except Exception as e:
+            print(f"Error fetching {name} data: {e}")
+            result = None
+            status['error'] = str(e)
+            metrics.inc('prizepicks_source_errors_total', source=name)
+        status['elapsed'] = round(time.perf_counter() - start, 4)
+        return result, status
+
+    def _circuit_open(self, name, fallback, status):
+        metrics.inc('prizepicks_circuit_rejections_total', source=name)
+        status['circuit_open'] = True
+        return (fallback() if fallback else None), status
         
     def close(self):
-        """Clean up resources"""
-        if hasattr(self, 'driver'):
-            self.driver.quit()
+        """Clean up per-fetcher state; shared resources are closed at process exit"""
+        pass
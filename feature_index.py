@@ -0,0 +1,304 @@
+"""
+Per-player rolling features, kept current as new games land
+
+Each player's game logs from every source are merged into one list with one
+entry per date, oldest first; a source listed earlier in GAME_LOG_SOURCES
+wins when two disagree. For every stat type the index keeps running
+count/sum/sum-of-squares for the season, the last 5 and last 10 games,
+home/away splits and rest-day buckets, plus the values in sorted order for
+hit rates. A game newer than the last one indexed is added in O(1) (the
+sorted values take a binary-search insert); a backfilled or corrected game
+makes that player's features be rebuilt. Scoring a prop is then a lookup.
+"""
+import bisect
+import itertools
+import threading
+from collections import deque
+from datetime import date
+
+from game_store import normalize_game_date
+from stat_defs import GAME_LOG_SOURCES, RECENT_GAMES, STAT_COMPONENTS, prop_metrics
+from prizepicks_board import normalize_player_name
+
+WINDOWS = (RECENT_GAMES, 10)
+
+_versions = itertools.count(1)
+
+
+def rest_bucket(days_off):
+    """'0' is a back-to-back; three or more days off share one bucket"""
+    return str(days_off) if days_off < 3 else '3+'
+
+
+def _days_off(previous, day):
+    try:
+        return (date.fromisoformat(day) - date.fromisoformat(previous)).days - 1
+    except ValueError:
+        return None
+
+
+class Moments:
+    """Running count, sum and sum of squares"""
+
+    __slots__ = ('games', 'total', 'squares')
+
+    def __init__(self):
+        self.games = 0
+        self.total = 0.0
+        self.squares = 0.0
+
+    @classmethod
+    def of(cls, values):
+        moments = cls()
+        moments.games = len(values)
+        moments.total = float(sum(values))
+        moments.squares = float(sum(value * value for value in values))
+        return moments
+
+    def add(self, value, sign=1):
+        self.games += sign
+        self.total += sign * value
+        self.squares += sign * value * value
+
+    def mean(self):
+        return self.total / self.games if self.games else None
+
+    def std(self):
+        """Population standard deviation"""
+        if not self.games:
+            return None
+        mean = self.total / self.games
+        return max(self.squares / self.games - mean * mean, 0.0) ** 0.5
+
+    def to_dict(self):
+        return {'games': self.games, 'mean': self.mean(), 'std': self.std()}
+
+
+class StatFeatures:
+    """Rolling features of one stat type for one player"""
+
+    def __init__(self):
+        self.season = Moments()
+        # Window values oldest first, so [-1] is the latest game
+        self.windows = {size: (deque(maxlen=size), Moments()) for size in WINDOWS}
+        self.splits = {}
+        self.rest = {}
+        self.sorted_values = []
+
+    @classmethod
+    def from_history(cls, values, locations, rests):
+        """Features of a whole history at once, oldest game first"""
+        stat = cls()
+        stat.season = Moments.of(values)
+        for size, (window, _) in stat.windows.items():
+            window.extend(values[-size:])
+            stat.windows[size] = (window, Moments.of(window))
+        for groups, keys in ((stat.splits, locations), (stat.rest, rests)):
+            grouped = {}
+            for key, value in zip(keys, values):
+                if key is not None:
+                    grouped.setdefault(key, []).append(value)
+            groups.update((key, Moments.of(group)) for key, group in grouped.items())
+        stat.sorted_values = sorted(values)
+        return stat
+
+    def add(self, value, location, days_off):
+        self.season.add(value)
+        for size, (window, moments) in self.windows.items():
+            if len(window) == size:
+                moments.add(window[0], -1)
+            window.append(value)
+            moments.add(value)
+        if location is not None:
+            self.splits.setdefault(location, Moments()).add(value)
+        if days_off is not None:
+            self.rest.setdefault(rest_bucket(days_off), Moments()).add(value)
+        bisect.insort(self.sorted_values, value)
+
+    def score(self, line):
+        """Metrics for a line from the running windows (see stat_defs.prop_metrics)"""
+        window, recent = self.windows[RECENT_GAMES]
+        consistency = recent.std()
+        # Positive means the latest game beat the oldest of the recent window
+        trend = window[-1] - window[0]
+        over = self.season.games - bisect.bisect_right(self.sorted_values, line)
+        return prop_metrics(line, self.season.games, self.season.mean(), over / self.season.games,
+                            recent.mean(), self.windows[10][1].mean(), consistency, trend)
+
+    def summary(self):
+        return {
+            'season': self.season.to_dict(),
+            **{f'last_{size}': moments.to_dict() for size, (_, moments) in self.windows.items()},
+            'splits': {location: moments.to_dict() for location, moments in sorted(self.splits.items())},
+            'rest_days': {bucket: moments.to_dict() for bucket, moments in sorted(self.rest.items())},
+        }
+
+
+class PlayerFeatures:
+    """One player's merged, date-ordered games and the rolling features built from them"""
+
+    def __init__(self, sport):
+        self.sport = sport
+        self.sources = [source.replace('_stats', '') for source in GAME_LOG_SOURCES[sport]]
+        # Unique across every player and renewed on each change, so derived caches can key on it
+        self.version = next(_versions)
+        self.indexed = set()
+        self._dates = []
+        self._by_source = []
+        self.games = []
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def _merge(self, by_source):
+        game = {}
+        for source in reversed(self.sources):
+            game.update({k: v for k, v in (by_source.get(source) or {}).items() if v is not None})
+        return game
+
+    def _features_of(self, game):
+        """The stat values and location that feed the rolling features"""
+        totals = {}
+        for stat_type, components in STAT_COMPONENTS.items():
+            values = [game.get(c) for c in components]
+            if None in values:
+                continue
+            try:
+                totals[stat_type] = float(sum(map(float, values)))
+            except (TypeError, ValueError):
+                continue
+        return totals, game.get('location')
+
+    def _days_off(self, position):
+        return _days_off(self._dates[position - 1], self._dates[position]) if position else None
+
+    def _index(self, position):
+        """Add the latest game to the running features"""
+        totals, location = self._features_of(self.games[position])
+        days_off = self._days_off(position)
+        for stat_type, value in totals.items():
+            stat = self.stats.get(stat_type)
+            if stat is None:
+                stat = self.stats[stat_type] = StatFeatures()
+            stat.add(value, location, days_off)
+
+    def _rebuild(self):
+        """Recompute every stat's features from the merged games"""
+        columns = {}
+        for position, game in enumerate(self.games):
+            totals, location = self._features_of(game)
+            days_off = self._days_off(position)
+            for stat_type, value in totals.items():
+                column = columns.get(stat_type)
+                if column is None:
+                    column = columns[stat_type] = ([], [], [])
+                column[0].append(value)
+                column[1].append(location)
+                column[2].append(None if days_off is None else rest_bucket(days_off))
+        self.stats = {stat_type: StatFeatures.from_history(*column) for stat_type, column in columns.items()}
+
+    def add_games(self, source, games):
+        """Merge one source's games in; returns whether anything changed"""
+        if source not in self.sources:
+            return False
+        with self._lock:
+            self.indexed.add(source)
+            rebuild = changed = False
+            indexed = len(self.games)
+            for game in sorted(games, key=lambda g: normalize_game_date(g['date'])):
+                day = normalize_game_date(game['date'])
+                position = bisect.bisect_left(self._dates, day)
+                if position < len(self._dates) and self._dates[position] == day:
+                    if self._by_source[position].get(source) == game:
+                        continue
+                    before = self._features_of(self.games[position])
+                    self._by_source[position][source] = game
+                    self.games[position] = {**self._merge(self._by_source[position]), 'date': day}
+                    # Extra fields (minutes, ...) from a second source don't touch the features
+                    rebuild = rebuild or self._features_of(self.games[position]) != before
+                else:
+                    self._dates.insert(position, day)
+                    self._by_source.insert(position, {source: game})
+                    self.games.insert(position, {**self._merge({source: game}), 'date': day})
+                    # Games newer than everything indexed are added to the running features below
+                    rebuild = rebuild or position < indexed
+                changed = True
+            # A history mostly made of new games (a player's first load) is cheaper to build in bulk
+            if rebuild or len(self.games) - indexed > indexed:
+                self._rebuild()
+            else:
+                for position in range(indexed, len(self.games)):
+                    self._index(position)
+            if changed:
+                self.version = next(_versions)
+            return changed
+
+    def score(self, stat_type, line):
+        """Metrics for one prop, or None when no game has that stat"""
+        with self._lock:
+            stat = self.stats.get(stat_type)
+            return stat.score(line) if stat is not None else None
+
+    def summary(self, stat_type):
+        with self._lock:
+            stat = self.stats.get(stat_type)
+            return stat.summary() if stat is not None else None
+
+    def values(self, stat_type):
+        """Every game's value for a stat type, ascending"""
+        with self._lock:
+            stat = self.stats.get(stat_type)
+            return list(stat.sorted_values) if stat is not None else []
+
+    def history(self):
+        """Every merged game, most recent first, for scoring a batch outside the index"""
+        with self._lock:
+            return self.games[::-1]
+
+    def recent_games(self, stat_type, count=RECENT_GAMES):
+        """The latest games that have every component of a stat type, most recent first"""
+        components = STAT_COMPONENTS[stat_type]
+        recent = []
+        with self._lock:
+            for game in reversed(self.games):
+                if all(game.get(c) is not None for c in components):
+                    recent.append(game)
+                    if len(recent) == count:
+                        break
+        return recent
+
+
+class FeatureIndex:
+    """PlayerFeatures per (sport, player)"""
+
+    def __init__(self):
+        self._players = {}
+        self._lock = threading.Lock()
+
+    def player(self, sport, player_name):
+        key = (sport, normalize_player_name(player_name))
+        with self._lock:
+            features = self._players.get(key)
+            if features is None:
+                features = self._players[key] = PlayerFeatures(sport)
+            return features
+
+    def add_games(self, sport, player_name, source, games):
+        """
+        Add newly landed games for a source
+
+        Ignored until that source's history has been indexed for the player
+        (see seed); the full history then already includes these games.
+        """
+        features = self.player(sport, player_name)
+        if source in features.indexed:
+            features.add_games(source, games)
+
+    def seed(self, sport, player_name, player_data):
+        """Index the history of every source in player_data not indexed yet, and return the features"""
+        features = self.player(sport, player_name)
+        for source_key in GAME_LOG_SOURCES[sport]:
+            source = source_key.replace('_stats', '')
+            games = (player_data.get(source_key) or {}).get('recent_games')
+            if games and source not in features.indexed:
+                features.add_games(source, games)
+        return features
@@ -0,0 +1,84 @@
+"""
+Batch scoring through one columnar game-log frame
+
+The pandas counterpart of scoring straight from the feature index: a batch's
+game logs become one long frame and every prop is scored in a few group-by
+passes, with the same fields as StatFeatures.score and the same stat_defs
+heuristic. Games come from the feature index, already merged across sources
+with one per date.
+"""
+import numpy as np
+import pandas as pd
+
+from stat_defs import RECENT_GAMES, STAT_COMPONENTS, confidence_score, recommends_over
+
+
+def build_game_log_frame(players):
+    """
+    Normalize game logs for a batch into one long, columnar frame
+
+    :param players: Iterable of (key, games) with each player's games most recent first
+                    (PlayerFeatures.history)
+    :return: DataFrame with key, game_order, stat_type and value columns, where
+             game_order 0 is each player's most recent game with that stat
+    """
+    rows = [
+        {**game, 'key': key, 'source_order': order}
+        for key, games in players
+        for order, game in enumerate(games)
+    ]
+    if not rows:
+        return pd.DataFrame(columns=['key', 'game_order', 'stat_type', 'value'])
+    games = pd.DataFrame.from_records(rows)
+
+    # Every stat type (including combos) becomes one vectorized column sum
+    stat_columns = {}
+    for stat_type, components in STAT_COMPONENTS.items():
+        if all(c in games.columns for c in components):
+            values = games[list(components)].apply(pd.to_numeric, errors='coerce')
+            stat_columns[stat_type] = values.sum(axis=1, min_count=len(components))
+    stats = pd.DataFrame(stat_columns, index=games.index)
+    stats['key'] = games['key']
+    stats['source_order'] = games['source_order']
+
+    frame = stats.melt(id_vars=['key', 'source_order'], var_name='stat_type', value_name='value')
+    frame = frame.dropna(subset=['value']).sort_values(['key', 'stat_type', 'source_order'])
+    frame['game_order'] = frame.groupby(['key', 'stat_type']).cumcount()
+    return frame[['key', 'game_order', 'stat_type', 'value']].reset_index(drop=True)
+
+
+def compute_metrics(frame, lines):
+    """
+    Score every prop in one set of group-by passes
+
+    :param frame: Output of build_game_log_frame
+    :param lines: DataFrame with prop, key, stat_type and line columns
+    :return: DataFrame indexed by prop with averages, rolling windows, consistency,
+             trend, hit rate, confidence and recommendation; props with no games are left out
+    """
+    data = lines.merge(frame, on=['key', 'stat_type'])
+    data['hit'] = data['value'] > data['line']
+
+    by_prop = data.groupby('prop')
+    recent = data[data['game_order'] < RECENT_GAMES].sort_values(['prop', 'game_order'])
+    by_recent = recent.groupby('prop')['value']
+
+    scores = pd.DataFrame({
+        'line': by_prop['line'].first(),
+        'games': by_prop['value'].size(),
+        'avg_performance': by_prop['value'].mean(),
+        'hit_rate': by_prop['hit'].mean(),
+        'avg_last_5': by_recent.mean(),
+        'avg_last_10': data[data['game_order'] < 10].groupby('prop')['value'].mean(),
+        'consistency': by_recent.std(ddof=0),
+        # Positive means the most recent game beat the oldest of the recent window
+        'trend': by_recent.first() - by_recent.last(),
+    })
+
+    # The shared heuristic; one call per prop is small next to the group-bys
+    scores['confidence'] = [
+        confidence_score(consistency, trend) for consistency, trend in zip(scores['consistency'], scores['trend'])
+    ]
+    scores['recommendation'] = np.where(recommends_over(scores['avg_performance'], scores['line']), 'Over', 'Under')
+    scores['performance_diff'] = scores['avg_performance'] - scores['line']
+    return scores
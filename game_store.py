@@ -0,0 +1,135 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, datetime
+
+from prizepicks_board import normalize_player_name
+
+DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%b %d, %Y', '%B %d, %Y', '%a %m/%d/%Y')
+
+
+def normalize_game_date(value):
+    """Return an ISO date string so stored games sort and compare chronologically"""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    text = str(value).strip()
+    try:
+        return datetime.fromisoformat(text).date().isoformat()
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return text
+
+
+class GameLogStore:
+    """SQLite store of normalized game logs, one row per (sport, season, player, source, date)"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS game_logs (
+            sport TEXT NOT NULL,
+            season TEXT NOT NULL,
+            player TEXT NOT NULL,
+            source TEXT NOT NULL,
+            game_date TEXT NOT NULL,
+            stats TEXT NOT NULL,
+            PRIMARY KEY (sport, season, player, source, game_date)
+        );
+        CREATE TABLE IF NOT EXISTS players (
+            sport TEXT NOT NULL,
+            player TEXT NOT NULL,
+            info TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (sport, player)
+        );
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+
+    def latest_date(self, sport, season, player_name, source):
+        """Most recent stored game date for a player/source, or None on a cold start"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT MAX(game_date) FROM game_logs WHERE sport=? AND season=? AND player=? AND source=?',
+                (sport, season, normalize_player_name(player_name), source)
+            ).fetchone()
+        return row[0]
+
+    def upsert_games(self, sport, season, player_name, source, games):
+        """Insert or replace games; each game dict must carry a 'date'"""
+        rows = [
+            (sport, season, normalize_player_name(player_name), source,
+             normalize_game_date(game['date']),
+             json.dumps({k: v for k, v in game.items() if k != 'date'}, default=str))
+            for game in games
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO game_logs VALUES (?, ?, ?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def load_games(self, sport, player_name, source=None, season=None, limit=None):
+        """Stored games for a player, most recent first"""
+        query = 'SELECT game_date, stats FROM game_logs WHERE sport=? AND player=?'
+        params = [sport, normalize_player_name(player_name)]
+        if source is not None:
+            query += ' AND source=?'
+            params.append(source)
+        if season is not None:
+            query += ' AND season=?'
+            params.append(season)
+        query += ' ORDER BY game_date DESC'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [{'date': game_date, **json.loads(stats)} for game_date, stats in rows]
+
+    def iter_rows(self, chunk_size=50000):
+        """Every stored game as (sport, season, player, source, game_date, stats), chunk_size rows at a time"""
+        last = 0
+        while True:
+            # One short query per chunk, so fetches can write between chunks
+            with self._lock:
+                rows = self._conn.execute(
+                    'SELECT rowid, sport, season, player, source, game_date, stats FROM game_logs '
+                    'WHERE rowid > ? ORDER BY rowid LIMIT ?', (last, chunk_size)
+                ).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            yield [(*row[1:6], json.loads(row[6])) for row in rows]
+
+    def save_player_info(self, sport, player_name, info):
+        """Remember non-game fields (team, position, ...) for offline runs"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO players VALUES (?, ?, ?, ?)',
+                (sport, normalize_player_name(player_name), json.dumps(info, default=str),
+                 datetime.now().isoformat())
+            )
+
+    def load_player_info(self, sport, player_name):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT info FROM players WHERE sport=? AND player=?',
+                (sport, normalize_player_name(player_name))
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,155 @@
+"""
+Process-wide counters, stage timers and a per-request timing breakdown
+
+    with span('parse', source='yahoo'):
+        ...
+
+Every span feeds the prizepicks_stage_seconds histogram. Inside
+request_timings() it is also added to that request's breakdown, which
+follows the request into the asyncio tasks it starts.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds, Prometheus style (+Inf is implied)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+def _key(name, labels):
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+def _label_text(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(f'{name}="{str(value).replace(chr(34), chr(39))}"' for name, value in labels)
+    return '{' + pairs + '}'
+
+
+class Metrics:
+    """Thread-safe counters and histograms rendered in the Prometheus text format"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._help = {}
+        self._kinds = {}
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+
+    def describe(self, name, help_text, kind=None):
+        """Set a metric's HELP text and, for collected series, its TYPE (default gauge)"""
+        self._help[name] = help_text
+        if kind is not None:
+            self._kinds[name] = kind
+
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += 1
+            histogram[2] += value
+
+    def add_collector(self, collect):
+        """Register a callable returning (name, labels dict, value) samples, read at scrape time"""
+        self._collectors.append(collect)
+
+    def remove_collector(self, collect):
+        self._collectors = [c for c in self._collectors if c != collect]
+
+    def counter(self, name, **labels):
+        return self._counters.get(_key(name, labels), 0)
+
+    def render(self):
+        """Everything in the Prometheus text exposition format"""
+        lines = []
+
+        def header(name, kind):
+            if name in self._help:
+                lines.append(f'# HELP {name} {self._help[name]}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (list(b), n, s)) for key, (b, n, s) in self._histograms.items())
+
+        seen = None
+        for (name, labels), value in counters:
+            if name != seen:
+                header(name, 'counter')
+                seen = name
+            lines.append(f'{name}{_label_text(labels)} {value}')
+
+        for (name, labels), (buckets, count, total) in histograms:
+            if name != seen:
+                header(name, 'histogram')
+                seen = name
+            for bound, bucket_count in zip(self.buckets, buckets):
+                lines.append(f'{name}_bucket{_label_text(labels + (("le", bound),))} {bucket_count}')
+            lines.append(f'{name}_bucket{_label_text(labels + (("le", "+Inf"),))} {count}')
+            lines.append(f'{name}_count{_label_text(labels)} {count}')
+            lines.append(f'{name}_sum{_label_text(labels)} {total}')
+
+        for collect in self._collectors:
+            for name, labels, value in sorted(collect(), key=lambda sample: sample[0]):
+                if name != seen:
+                    header(name, self._kinds.get(name, 'gauge'))
+                    seen = name
+                lines.append(f'{name}{_label_text(_key(name, labels)[1])} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+metrics.describe('prizepicks_stage_seconds', 'Time spent per pipeline stage (fetch, parse, store, score, serialize)')
+metrics.describe('prizepicks_source_timeouts_total', 'Source fetches abandoned at their timeout')
+metrics.describe('prizepicks_source_errors_total', 'Source fetches that raised')
+metrics.describe('prizepicks_http_responses_total', 'Upstream HTTP responses by host and status code')
+metrics.describe('prizepicks_http_retries_total', 'Upstream HTTP attempts that were retried')
+metrics.describe('prizepicks_cache_events_total', 'Source cache hits, misses and evictions', 'counter')
+metrics.describe('prizepicks_ratelimit_wait_seconds_total', 'Time requests spent waiting for a rate-limit token')
+metrics.describe('prizepicks_circuit_rejections_total', 'Source calls short-circuited by an open breaker')
+metrics.describe('prizepicks_circuit_open', 'Whether a source circuit breaker is open or half-open')
+metrics.describe('prizepicks_cache_entries', 'Entries currently in the source cache')
+metrics.describe('prizepicks_cache_bytes', 'Approximate size of the source cache')
+metrics.describe('prizepicks_prefetch_total', 'Players fetched ahead of time by the prefetch scheduler')
+
+
+@contextmanager
+def span(stage, **labels):
+    """Time a block as one pipeline stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.observe('prizepicks_stage_seconds', elapsed, stage=stage, **labels)
+        timings = _timings.get()
+        if timings is not None:
+            key = '.'.join([stage, *map(str, labels.values())])
+            timings[key] = round(timings.get(key, 0.0) + elapsed, 6)
+
+
+@contextmanager
+def request_timings():
+    """Collect the spans of everything done inside the block into one dict"""
+    timings = {}
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
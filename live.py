@@ -0,0 +1,244 @@
+"""
+Live slate scoring: stream per-source progress and per-prop results, then keep
+re-scoring as the PrizePicks board or injury data changes
+
+Events are (name, payload) pairs:
+
+    source     one source finished for a player (timing/status only)
+    result     a prop was scored; 'partial' is true until every source answered
+               (unknown names are answered up front with suggestions)
+    done       the first full pass is complete
+    heartbeat  nothing changed for a while (follow mode only)
+"""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Iterable, Tuple
+
+from analyze import get_analyzer, unknown_player
+from prizepicks_board import normalize_player_name, normalize_stat_type
+from resources import get_resources
+
+HEARTBEAT_INTERVAL = 15
+REFRESH_INTERVAL = 60
+STATS_SOURCES = ('yahoo', 'espn')
+
+
+def board_line(player_data, stat_type):
+    """Current board line for a stat, if the board lists one"""
+    for projection in (player_data or {}).get('prizepicks_odds') or []:
+        if stat_type is None or normalize_stat_type(projection['stat_type']) == normalize_stat_type(stat_type):
+            return projection['line']
+    return None
+
+
+class LiveSlate:
+    """Per-stream state: the props, the latest data for each player and how to score them"""
+
+    def __init__(self, offline: bool = False):
+        self.offline = offline
+        self.players = {}
+        # Crosswalk record per player (None when unknown), so every name a player goes by shares one key
+        self.records = {}
+        # Results for props whose names are unknown but close to known players; nothing is fetched for them
+        self.unknown = []
+        self.analyzers = {}
+        self.data = {}
+
+    async def add(self, props: Iterable[Dict[str, Any]]):
+        """Resolve each prop's player the way /analyze does and group the props by player"""
+        resolved = {}
+        for index, prop in enumerate(props):
+            sport = prop['sport']
+            analyzer = self.analyzers.setdefault(sport, get_analyzer(sport, self.offline))
+            name_key = (sport, normalize_player_name(prop['player']))
+            if name_key not in resolved:
+                resolved[name_key] = await analyzer.resolve_player(prop['player'])
+            player, suggestions = resolved[name_key]
+            if player is None and suggestions:
+                self.unknown.append({'id': prop.get('id', index), 'index': index, 'sport': sport,
+                                     'player': prop['player'], 'stat': prop.get('stat'),
+                                     **unknown_player(prop['player'], suggestions)})
+                continue
+            key = (sport, normalize_player_name(player['name'])) if player else name_key
+            self.players.setdefault(key, []).append((index, prop))
+            self.records.setdefault(key, player)
+
+    def player_name(self, key):
+        """Name the player is fetched and scored under"""
+        player = self.records[key]
+        return player['name'] if player else self.players[key][0][1]['player']
+
+    async def score(self, key, partial=None):
+        """Score every prop for one player against its data so far"""
+        sport, _ = key
+        player_data = self.data.get(key)
+        if partial is None:
+            partial = bool((player_data or {}).get('partial'))
+        player_props = self.players[key]
+        entries = []
+        for _, prop in player_props:
+            # Props without a line follow the board
+            line = prop.get('line')
+            if line is None:
+                line = board_line(player_data, prop.get('stat'))
+            entries.append((self.player_name(key), player_data, line if line is not None else 0, prop.get('stat')))
+        scored = await self.analyzers[sport].score_many_async(entries)
+        return [
+            {'id': prop.get('id', index), 'index': index, 'sport': sport, 'player': prop['player'],
+             'stat': prop.get('stat'), 'board_line': board_line(player_data, prop.get('stat')),
+             'partial': partial, **result}
+            for (index, prop), result in zip(player_props, scored)
+        ]
+
+    async def fetch(self, key, events, progress=True):
+        """Fetch one player source by source, pushing progress and partial scores to events"""
+        sport, _ = key
+        fetcher = self.analyzers[sport].data_fetcher
+        player_name = self.player_name(key)
+        data, source_timings = {}, {}
+        async for name, result, status in fetcher.iter_player_data(player_name, sport, self.records[key]):
+            data[name] = result
+            source_timings[name] = status
+            if not progress:
+                continue
+            self.data[key] = fetcher.combine_player_data(player_name, sport, data, source_timings)
+            events.put_nowait(('source', {'sport': sport, 'player': player_name, 'source': name, **status}))
+            if name in STATS_SOURCES and result is not None:
+                for scored in await self.score(key, partial=True):
+                    events.put_nowait(('result', scored))
+        self.data[key] = fetcher.combine_player_data(player_name, sport, data, source_timings)
+        for scored in await self.score(key):
+            events.put_nowait(('result', scored))
+
+    async def refresh_board(self):
+        """Re-read board lines for every player; return the keys whose lines moved"""
+        moved = []
+        for key in self.players:
+            player_data = self.data.get(key)
+            if player_data is None:
+                continue
+            fetcher = self.analyzers[key[0]].data_fetcher
+            odds, status = await fetcher.board_odds(self.player_name(key))
+            if status['timed_out'] or status['error'] or status['circuit_open']:
+                continue
+            if odds != player_data.get('prizepicks_odds'):
+                self.data[key] = {**player_data, 'prizepicks_odds': odds}
+                moved.append(key)
+        return moved
+
+
+def _changed(result, sent):
+    """Whether a result differs from the last one sent for its prop, ignoring timings"""
+    previous = sent.get(result['id'])
+    sent[result['id']] = result
+    if previous is None:
+        return True
+    return any(previous.get(k) != v for k, v in result.items() if k != 'source_timings')
+
+
+def sse_event(event, payload):
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+
+def parse_stream_request(args):
+    """Read props and follow from /analyze/stream query parameters"""
+    props = json.loads(args.get('props') or '[]')
+    if not props and args.get('player'):
+        # Single-player shorthand used by the form: ?sport=..&player=..&line=..&stat=..
+        line = args.get('line')
+        props = [{'sport': args.get('sport'), 'player': args.get('player'), 'stat': args.get('stat'),
+                  'line': float(line) if line else None}]
+    return props, args.get('follow', '1') not in ('0', 'false')
+
+
+async def stream_props(props: Iterable[Dict[str, Any]], follow: bool = True, offline: bool = False,
+                       heartbeat: float = HEARTBEAT_INTERVAL,
+                       refresh_interval: float = REFRESH_INTERVAL) -> AsyncIterator[Tuple[str, Dict]]:
+    """
+    Score a slate as data arrives and, with follow, keep it up to date
+
+    Must be iterated on resources.loop (use resources.iterate from sync code).
+
+    :param props: Dicts with 'sport', 'player', 'stat', optional 'line' (defaults to
+                  the board line) and optional client 'id'
+    :param follow: Keep streaming board and injury updates after the first pass
+    :param offline: Replay from the local game-log store
+    :param heartbeat: Seconds of silence before a heartbeat event
+    :param refresh_interval: Seconds between background refreshes of every player
+    :return: (event, payload) pairs
+    """
+    resources = get_resources()
+    slate = LiveSlate(offline)
+    await slate.add(props)
+    for result in slate.unknown:
+        yield 'result', result
+    events = asyncio.Queue()
+    # Subscribe before fetching so no change made during the first pass is missed
+    changes = resources.changes.subscribe()
+
+    async def forward_changes():
+        while True:
+            events.put_nowait(('change', await changes.get()))
+
+    async def fetch_player(key, progress=True):
+        try:
+            await slate.fetch(key, events, progress)
+        except Exception as e:
+            print(f"Error streaming {key[1]}: {e}")
+        events.put_nowait(('fetched', key))
+
+    tasks = {asyncio.ensure_future(fetch_player(key)) for key in slate.players}
+    forwarder = asyncio.ensure_future(forward_changes())
+    loop = asyncio.get_running_loop()
+    sent = {}
+    try:
+        remaining = len(slate.players)
+        first_pass = bool(remaining)
+        if not first_pass:
+            # Every name was unknown (or there were no props): nothing to wait for
+            yield 'done', {'players': 0}
+        next_refresh = loop.time() + refresh_interval
+        while remaining or follow:
+            try:
+                event, payload = await asyncio.wait_for(events.get(), heartbeat)
+            except asyncio.TimeoutError:
+                event, payload = 'heartbeat', {}
+
+            if event == 'fetched':
+                remaining -= 1
+                if first_pass and not remaining:
+                    first_pass = False
+                    yield 'done', {'players': len(slate.players)}
+            elif event == 'result':
+                if _changed(payload, sent):
+                    yield event, payload
+            elif event == 'source':
+                yield event, payload
+            elif event == 'heartbeat' or (event == 'change' and payload['type'] == 'board'):
+                # Quiet periods double as board polls; the board only refetches once stale
+                for key in await slate.refresh_board():
+                    for result in await slate.score(key):
+                        if _changed(result, sent):
+                            yield 'result', result
+                if event == 'heartbeat':
+                    yield event, payload
+            elif event == 'change' and payload['type'] == 'injury':
+                key = (payload['sport'], payload['player'])
+                if key in slate.players:
+                    remaining += 1
+                    tasks.add(asyncio.ensure_future(fetch_player(key, progress=False)))
+
+            if follow and not remaining and loop.time() >= next_refresh:
+                # Refetching through the cache revalidates stale sources, which in
+                # turn publishes any injury change it finds
+                next_refresh = loop.time() + refresh_interval
+                remaining += len(slate.players)
+                tasks.update(asyncio.ensure_future(fetch_player(key, progress=False))
+                             for key in slate.players)
+            tasks = {task for task in tasks if not task.done()}
+    finally:
+        forwarder.cancel()
+        for task in tasks:
+            task.cancel()
+        resources.changes.unsubscribe(changes)
@@ -0,0 +1,231 @@
+"""
+Player crosswalk shared by every source
+
+Yahoo knows a player by URL slug, ESPN by player ID and PrizePicks by board
+name (and ID, when the board carries one). The crosswalk keeps one record per
+player with every source key and every name the player has been seen under,
+so a name is resolved once, before anything is fetched, and each source is
+then asked with its own key. Resolving a name is a dict lookup on the
+normalized name; unknown names get suggestions from a prefix search over the
+sorted names, a single-deletion index (typos one edit away) and a surname
+index (nicknames). Records are persisted as JSON and the lookup tables are
+rebuilt from them on load.
+"""
+import bisect
+import difflib
+import json
+import os
+import threading
+
+from prizepicks_board import LEAGUE_SPORTS, normalize_player_name
+
+PLAYER_INDEX_PATH = os.getenv('PLAYER_INDEX_PATH', 'data/player_index.json')
+MAX_SUGGESTIONS = 5
+# Source key fields of a record
+SOURCE_KEYS = ('yahoo', 'espn', 'prizepicks')
+
+
+def yahoo_slug(name):
+    """Yahoo player page slug guessed from a display name"""
+    return name.replace(' ', '-').lower()
+
+
+def _deletions(key):
+    """key itself and key with any one character removed"""
+    return {key} | {key[:i] + key[i + 1:] for i in range(len(key))}
+
+
+def _extends(short, long):
+    """Whether one first name is a shortened form of the other ('nic', 'nicolas')"""
+    short, long = sorted((short, long), key=len)
+    return len(short) >= 2 and long.startswith(short)
+
+
+class PlayerIndex:
+    """Crosswalk records plus name, source-key, prefix and typo lookups"""
+
+    def __init__(self, path=PLAYER_INDEX_PATH):
+        self.path = path
+        self.dirty = False
+        self._records = []
+        self._names = {}     # (sport, name key) -> record number
+        self._spellings = {}  # (sport, name exactly as seen) -> record number
+        self._keys = {}      # (sport, source, source key) -> record number
+        self._sorted = {}    # sport -> sorted name keys
+        self._deleted = {}   # (sport, name key minus one character) -> name keys
+        self._surnames = {}  # (sport, last name token) -> name keys
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._records)
+
+    def load(self):
+        """Read the persisted records, if any; returns how many were loaded"""
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path) as f:
+                records = json.load(f).get('players', [])
+        except (OSError, ValueError) as e:
+            print(f"Error loading player index: {e}")
+            return 0
+        with self._lock:
+            for record in records:
+                number = self._add_record(record['sport'], record['name'])
+                for name in record.get('names', []):
+                    self._add_name(number, name)
+                for source in SOURCE_KEYS:
+                    self._set_key(number, source, record.get(source))
+        return len(records)
+
+    def save(self):
+        """Write the records if anything changed since the last save; returns whether it wrote"""
+        with self._save_lock:
+            with self._lock:
+                if not self.dirty or not self.path:
+                    return False
+                payload = json.dumps({'players': self._records})
+                self.dirty = False
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Replace in one step so a crash never leaves a half-written index
+            with open(self.path + '.tmp', 'w') as f:
+                f.write(payload)
+            os.replace(self.path + '.tmp', self.path)
+            return True
+
+    def _add_record(self, sport, name):
+        self._records.append({'sport': sport, 'name': name, 'names': [], **dict.fromkeys(SOURCE_KEYS)})
+        number = len(self._records) - 1
+        self._add_name(number, name)
+        return number
+
+    def _add_name(self, number, name):
+        record = self._records[number]
+        sport = record['sport']
+        if self._spellings.get((sport, name)) == number:
+            return
+        key = normalize_player_name(name)
+        if not key:
+            return
+        self._spellings.setdefault((sport, name), number)
+        record['names'].append(name)
+        self.dirty = True
+        if (sport, key) in self._names:
+            # Another record (or this one) already answers to this key; the first one keeps it
+            return
+        self._names[(sport, key)] = number
+        bisect.insort(self._sorted.setdefault(sport, []), key)
+        for deletion in _deletions(key):
+            self._deleted.setdefault((sport, deletion), set()).add(key)
+        self._surnames.setdefault((sport, key.split()[-1]), set()).add(key)
+
+    def _set_key(self, number, source, value):
+        record = self._records[number]
+        if value is None or record[source] == value:
+            return
+        self._keys.pop((record['sport'], source, record[source]), None)
+        record[source] = value
+        self._keys[(record['sport'], source, value)] = number
+        self.dirty = True
+
+    def link(self, sport, names, display=False, **keys):
+        """
+        Record that names and source keys (yahoo=, espn=, prizepicks=) belong to one player
+
+        A source key already on file identifies the player; otherwise a known
+        name does, unless that record holds a different key for the same source
+        (two players sharing a name). With display, the first name becomes the
+        record's display name.
+
+        :return: A copy of the record, or None when there was nothing to link
+        """
+        keys = {source: value for source, value in keys.items() if value is not None}
+        names = [name for name in names if name]
+        with self._lock:
+            number = next((self._keys[(sport, source, value)] for source, value in keys.items()
+                           if (sport, source, value) in self._keys), None)
+            if number is None:
+                for name in names:
+                    number = self._spellings.get((sport, name))
+                    if number is None:
+                        number = self._names.get((sport, normalize_player_name(name)))
+                    if number is not None:
+                        break
+                if number is not None and any(self._records[number][source] not in (None, value)
+                                              for source, value in keys.items()):
+                    number = None
+            if number is None:
+                names = [name for name in names if normalize_player_name(name)]
+                if not names:
+                    return None
+                number = self._add_record(sport, names[0])
+            record = self._records[number]
+            for name in names:
+                self._add_name(number, name)
+            for source, value in keys.items():
+                self._set_key(number, source, value)
+            if display and names and record['name'] != names[0]:
+                record['name'] = names[0]
+                self.dirty = True
+            return {**record, 'names': list(record['names'])}
+
+    def add_board(self, projections):
+        """Link every player on a PrizePicks board; board names become display names"""
+        # A player has a projection per stat type, but only needs linking once
+        players = {(projection.get('league'), projection['player_name'], projection.get('player_id'))
+                   for projection in projections}
+        for league, name, player_id in players:
+            sport = LEAGUE_SPORTS.get(league)
+            if sport is not None:
+                self.link(sport, [name], display=True, prizepicks=player_id)
+
+    def resolve(self, sport, name):
+        """
+        The record a name belongs to, or None
+
+        Besides any name the player has been seen under, a shortened or
+        lengthened first name with the same surname resolves when only one
+        player fits ('Nic Claxton' -> 'Nicolas Claxton').
+        """
+        key = normalize_player_name(name)
+        with self._lock:
+            number = self._names.get((sport, key))
+            if number is None and ' ' in key:
+                first, surname = key.split(' ', 1)[0], key.split()[-1]
+                numbers = {
+                    self._names[(sport, candidate)]
+                    for candidate in self._surnames.get((sport, surname), ())
+                    if len(candidate.split()) == len(key.split())
+                    and _extends(first, candidate.split(' ', 1)[0])
+                }
+                number = numbers.pop() if len(numbers) == 1 else None
+            if number is None:
+                return None
+            record = self._records[number]
+            return {**record, 'names': list(record['names'])}
+
+    def suggest(self, sport, name, limit=MAX_SUGGESTIONS):
+        """Display names of known players closest to name, best first"""
+        key = normalize_player_name(name)
+        if not key:
+            return []
+        with self._lock:
+            candidates = set()
+            for deletion in _deletions(key):
+                candidates.update(self._deleted.get((sport, deletion), ()))
+            ordered = self._sorted.get(sport, [])
+            position = bisect.bisect_left(ordered, key)
+            while position < len(ordered) and ordered[position].startswith(key):
+                candidates.add(ordered[position])
+                position += 1
+            candidates.update(self._surnames.get((sport, key.split()[-1]), ()))
+            names = {}
+            for candidate in candidates:
+                number = self._names[(sport, candidate)]
+                score = difflib.SequenceMatcher(None, key, candidate).ratio()
+                names[number] = max(names.get(number, 0.0), score)
+            ranked = sorted(names, key=lambda number: -names[number])
+            return [self._records[number]['name'] for number in ranked[:limit]]
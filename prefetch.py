@@ -0,0 +1,210 @@
+"""
+Background prefetching of every player on the PrizePicks board
+
+Analyses are pull-based, so without this the first request for a player pays
+for every upstream round trip, usually right before lock when everyone asks
+at once. The scheduler runs on the shared loop next to the web apps. Every
+pass it re-reads the board and fetches the players that are due, nearest
+game start first, a few at a time. The fetches go through the same cache,
+rate limiters and circuit breakers as interactive requests, and each
+player's board props are scored to warm the feature index. ESPN (the injury
+source) is re-fetched ahead of its cache TTL more often as the game gets
+closer. Players whose game has started drop out of the schedule.
+"""
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from analyze import PrizePicskAnalyzer
+from data_fetcher import SOURCE_CACHE_TTLS, SportDataFetcher
+from instrumentation import metrics
+from prizepicks_board import LEAGUE_SPORTS, normalize_player_name
+from resources import get_resources
+
+PREFETCH_ENABLED = os.getenv('PREFETCH_ENABLED', '1') not in ('0', 'false')
+# Seconds between scheduling passes
+PREFETCH_INTERVAL = float(os.getenv('PREFETCH_INTERVAL', '30'))
+# Players fetched at the same time, kept low to leave rate-limit room for interactive requests
+PREFETCH_CONCURRENCY = int(os.getenv('PREFETCH_CONCURRENCY', '4'))
+
+# (seconds until the game starts, seconds between injury refreshes); the first row the start is beyond applies
+INJURY_REFRESH = (
+    (6 * 3600, 1800),
+    (2 * 3600, 600),
+    (30 * 60, 180),
+    (0, 60),
+)
+
+
+def parse_start_time(value):
+    """Epoch seconds of a board start time (ISO 8601, naive taken as UTC), or None"""
+    if not value:
+        return None
+    try:
+        start = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    return start.timestamp()
+
+
+def injury_interval(until_start):
+    """Seconds between injury refreshes for a game starting in until_start seconds (None: unknown)"""
+    if until_start is None:
+        return INJURY_REFRESH[0][1]
+    for threshold, interval in INJURY_REFRESH:
+        if until_start > threshold:
+            return interval
+    return INJURY_REFRESH[-1][1]
+
+
+class PrefetchScheduler:
+    """Keeps every upcoming player on the board fetched and scored ahead of their game"""
+
+    def __init__(self, resources=None, interval=PREFETCH_INTERVAL, concurrency=PREFETCH_CONCURRENCY):
+        self.resources = resources or get_resources()
+        # Reads the shared board through this scheduler's resources, paced and guarded like any fetch
+        self.fetcher = SportDataFetcher(self.resources)
+        # One analyzer per sport on the same resources, so fetches, scores and lookups share a cache
+        self.analyzers = {}
+        self.interval = interval
+        self.concurrency = concurrency
+        # (sport, name key) -> {'name', 'start', 'props', 'fetched_at', 'injury_at'}
+        self.players = {}
+        self.counters = {'passes': 0, 'fetches': 0, 'injury_refreshes': 0, 'errors': 0}
+        self._future = None
+
+    def update_slate(self, projections, now):
+        """Track every player whose game has not started, with their board props"""
+        slate = {}
+        for projection in projections:
+            sport = LEAGUE_SPORTS.get(projection.get('league'))
+            if sport is None:
+                continue
+            start = parse_start_time(projection.get('start_time'))
+            if start is not None and start <= now:
+                continue
+            key = (sport, normalize_player_name(projection['player_name']))
+            entry = slate.get(key)
+            if entry is None:
+                entry = slate[key] = {'name': projection['player_name'], 'start': start, 'props': []}
+            elif start is not None and (entry['start'] is None or start < entry['start']):
+                entry['start'] = start
+            entry['props'].append((projection['stat_type'], projection['line']))
+        for key, entry in slate.items():
+            previous = self.players.get(key) or {}
+            entry['fetched_at'] = previous.get('fetched_at')
+            entry['injury_at'] = previous.get('injury_at')
+        self.players = slate
+
+    def due(self, now):
+        """Keys to fetch now, nearest game start first (unknown starts last)"""
+        logs_ttl = min(ttl for ttl, _ in SOURCE_CACHE_TTLS.values())
+        ready = []
+        for key, entry in self.players.items():
+            until_start = entry['start'] - now if entry['start'] is not None else None
+            every = min(logs_ttl, injury_interval(until_start))
+            if entry['fetched_at'] is None or now - entry['fetched_at'] >= every:
+                ready.append(key)
+        starts = {key: self.players[key]['start'] for key in ready}
+        return sorted(ready, key=lambda key: (starts[key] is None, starts[key] or 0))
+
+    def analyzer(self, sport):
+        if sport not in self.analyzers:
+            self.analyzers[sport] = PrizePicskAnalyzer(sport, resources=self.resources)
+        return self.analyzers[sport]
+
+    async def prefetch(self, key, now):
+        """Fetch one player (forcing ESPN when an injury refresh is due) and score their props"""
+        sport, _ = key
+        entry = self.players[key]
+        until_start = entry['start'] - now if entry['start'] is not None else None
+        refresh = ()
+        if entry['injury_at'] is not None and now - entry['injury_at'] >= injury_interval(until_start):
+            refresh = ('espn',)
+        analyzer = self.analyzer(sport)
+        player = self.resources.player_index().resolve(sport, entry['name'])
+        player_data = await analyzer.data_fetcher.get_complete_player_data(entry['name'], sport, player, refresh)
+        await analyzer.score_many_async([
+            (player_data['player_name'], player_data, line, stat_type) for stat_type, line in entry['props']
+        ])
+        entry['fetched_at'] = now
+        if refresh or entry['injury_at'] is None:
+            entry['injury_at'] = now
+        self.counters['fetches'] += 1
+        metrics.inc('prizepicks_prefetch_total', kind='injury' if refresh else 'players')
+        if refresh:
+            self.counters['injury_refreshes'] += 1
+
+    async def run_once(self):
+        """One scheduling pass: refresh the board, then fetch whoever is due"""
+        board = await self.fetcher.refresh_board()
+        if not board.loaded:
+            return 0
+        now = time.time()
+        self.update_slate(board.projections, now)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(key):
+            async with semaphore:
+                try:
+                    await self.prefetch(key, now)
+                except Exception as e:
+                    self.counters['errors'] += 1
+                    print(f"Error prefetching {key[1]}: {e}")
+
+        # Waiters on a semaphore are woken in order, so nearer games are fetched first
+        due = self.due(now)
+        await asyncio.gather(*(run(key) for key in due))
+        self.counters['passes'] += 1
+        return len(due)
+
+    async def run(self):
+        """Schedule passes until cancelled"""
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Error in prefetch pass: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Run on the shared loop in the background (from any thread)"""
+        if self._future is None:
+            self._future = asyncio.run_coroutine_threadsafe(self.run(), self.resources.loop)
+        return self
+
+    def stop(self):
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
+
+    def stats(self):
+        """Counters plus how many players are tracked, for /prefetch/stats"""
+        return {**self.counters, 'players': len(self.players)}
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def start_prefetch():
+    """Start the process-wide scheduler once; returns it, or None when PREFETCH_ENABLED is off"""
+    global _scheduler
+    if not PREFETCH_ENABLED:
+        return None
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = PrefetchScheduler().start()
+        return _scheduler
+
+
+def stop_prefetch():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is not None:
+            _scheduler.stop()
+            _scheduler = None
@@ -0,0 +1,108 @@
+import asyncio
+import re
+import time
+import unicodedata
+
+NAME_SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv', 'v'}
+# Board league -> sport name used everywhere else
+LEAGUE_SPORTS = {'NBA': 'basketball', 'NFL': 'football'}
+
+
+def normalize_player_name(name):
+    """Fold case, accents, punctuation and generational suffixes out of a player name"""
+    text = unicodedata.normalize('NFKD', name)
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    # "D'Angelo" -> "dangelo", "P.J." -> "pj"
+    tokens = re.findall(r"[a-z0-9]+", re.sub(r"['.`]", "", text))
+    while len(tokens) > 1 and tokens[-1] in NAME_SUFFIXES:
+        tokens.pop()
+    return ' '.join(tokens)
+
+
+def normalize_stat_type(stat_type):
+    """Case- and whitespace-insensitive stat type key"""
+    return ' '.join(stat_type.lower().split())
+
+
+class PrizePicksBoard:
+    """In-memory snapshot of the projections board, indexed by player name and stat type"""
+
+    def __init__(self, url, refresh_interval=60.0, headers=None):
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.headers = headers or {}
+        self.version = 0
+        # Called with the board after every new snapshot
+        self.on_change = None
+        # Raw projections of the current snapshot, lines and timestamps included
+        self.projections = []
+        self._index = {}
+        self._fetched_at = None
+        self._etag = None
+        self._last_modified = None
+        self._lock = asyncio.Lock()
+
+    def is_stale(self):
+        """True until the board has been fetched, then once per refresh interval"""
+        return self._fetched_at is None or time.monotonic() - self._fetched_at >= self.refresh_interval
+
+    async def refresh(self, http_get, force=False):
+        """Re-download the board if it is stale, using a conditional request"""
+        if not force and not self.is_stale():
+            return
+        async with self._lock:
+            # Another caller may have refreshed while we waited for the lock
+            if not force and not self.is_stale():
+                return
+
+            headers = dict(self.headers)
+            if self._etag:
+                headers['If-None-Match'] = self._etag
+            if self._last_modified:
+                headers['If-Modified-Since'] = self._last_modified
+
+            try:
+                response = await http_get(self.url, headers=headers, as_json=True)
+                if response.status == 200:
+                    self.load(response.body)
+                    self._etag = response.headers.get('ETag')
+                    self._last_modified = response.headers.get('Last-Modified')
+                elif response.status != 304:
+                    raise RuntimeError(f"HTTP {response.status}")
+            except Exception as e:
+                # Keep serving the last good snapshot (if any) and retry next interval
+                print(f"Error refreshing PrizePicks board: {e}")
+            finally:
+                self._fetched_at = time.monotonic()
+
+    @property
+    def loaded(self):
+        """Whether any snapshot has been downloaded yet"""
+        return self.version > 0
+
+    def load(self, data):
+        """Replace the snapshot with a freshly downloaded board"""
+        index = {}
+        for projection in data.get('projections', []):
+            name_key = normalize_player_name(projection['player_name'])
+            index.setdefault(name_key, {})[normalize_stat_type(projection['stat_type'])] = {
+                'stat_type': projection['stat_type'],
+                'line': projection['line'],
+                'timestamp': projection['timestamp']
+            }
+        self._index = index
+        self.projections = data.get('projections', [])
+        self.version += 1
+        if self.on_change is not None:
+            self.on_change(self)
+
+    def lookup(self, player_name, stat_type=None):
+        """Return a player's projections, optionally only the one for stat_type"""
+        by_stat = self._index.get(normalize_player_name(player_name), {})
+        if stat_type is None:
+            return list(by_stat.values())
+        projection = by_stat.get(normalize_stat_type(stat_type))
+        return [projection] if projection else []
+
+    def __len__(self):
+        return len(self._index)
@@ -0,0 +1,158 @@
+"""
+Distributional hit probabilities by vectorized simulation
+
+Each (player, stat) game log is fitted to a distribution (negative binomial
+or Poisson for counting stats, a normal clipped at zero for yardage) and
+simulated once; an evenly spaced grid of quantiles from the sorted draws is
+cached, so a new line only costs a binary search. Multi-leg entries are simulated jointly, with legs from the
+same game correlated through a Gaussian copula.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from stat_defs import STAT_COMPONENTS
+
+DRAWS = int(os.getenv('SIMULATION_DRAWS', '20000'))
+# Sorted draws kept per distribution (~8 KB each as float32)
+QUANTILES = int(os.getenv('SIMULATION_QUANTILES', '2000'))
+CACHE_ENTRIES = int(os.getenv('PROBABILITY_CACHE_ENTRIES', '4096'))
+# Correlation between legs from the same game (teammates, or an explicit shared 'game')
+SAME_GAME_CORRELATION = float(os.getenv('SAME_GAME_CORRELATION', '0.2'))
+
+# Fields that only take whole-number values; stats built from them are simulated as counts
+COUNT_FIELDS = {'points', 'rebounds', 'assists', 'receptions', 'touchdowns'}
+
+# Power Play payout multipliers by number of picks (all legs must hit)
+POWER_PLAY_PAYOUTS = {2: 3.0, 3: 5.0, 4: 10.0, 5: 20.0, 6: 37.5}
+
+
+def is_count_stat(stat_type):
+    return all(field in COUNT_FIELDS for field in STAT_COMPONENTS[stat_type])
+
+
+def fit(totals, count_like):
+    """
+    Method-of-moments fit of one game log
+
+    :return: (family, params) with family 'negbin' (n, p), 'poisson' (lam) or 'normal' (mean, sd)
+    """
+    mean = float(np.mean(totals))
+    var = float(np.var(totals, ddof=1)) if len(totals) > 1 else mean
+    if not count_like:
+        return 'normal', (mean, var ** 0.5)
+    if var > mean > 0:
+        return 'negbin', (mean * mean / (var - mean), mean / var)
+    return 'poisson', (mean,)
+
+
+def over_probability(samples, line):
+    """P(stat > line) from sorted draws"""
+    return 1.0 - np.searchsorted(samples, line, side='right') / len(samples)
+
+
+def under_probability(samples, line):
+    """P(stat < line) from sorted draws; what is left over is a push"""
+    return np.searchsorted(samples, line, side='left') / len(samples)
+
+
+class ProbabilityModel:
+    """Fitted, simulated and cached per-(player, stat) outcome distributions"""
+
+    def __init__(self, draws=DRAWS, quantiles=QUANTILES, max_entries=CACHE_ENTRIES, seed=None):
+        self.draws = draws
+        # Evenly spaced ranks of the sorted draws that are kept
+        self.keep = np.linspace(0, draws - 1, min(quantiles, draws)).round().astype(np.intp)
+        self.max_entries = max_entries
+        # Each call draws from its own child generator: a numpy Generator is not
+        # thread-safe and the model is shared by web threads, the executor and the prefetcher
+        self._seed = np.random.SeedSequence(seed)
+        self._samples = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _generator(self):
+        with self._lock:
+            child = self._seed.spawn(1)[0]
+        return np.random.default_rng(child)
+
+    def distributions(self, requests):
+        """
+        Sorted draws for many (player, stat) game logs, simulating the uncached ones together
+
+        :param requests: {key: (totals, stat_type)}; key should change when the game log does
+        :return: {key: (family, sorted float32 quantiles of the draws)}
+        """
+        found, missing = {}, {}
+        with self._lock:
+            for key, request in requests.items():
+                if key in self._samples:
+                    self._samples.move_to_end(key)
+                    found[key] = self._samples[key]
+                else:
+                    missing[key] = request
+
+        rng = self._generator() if missing else None
+        by_family = {}
+        for key, (totals, stat_type) in missing.items():
+            family, params = fit(totals, is_count_stat(stat_type))
+            by_family.setdefault(family, []).append((key, params))
+
+        for family, fitted in by_family.items():
+            # One (props x draws) array per family for the whole batch
+            params = np.array([p for _, p in fitted], dtype=np.float64).T[:, :, None]
+            size = (len(fitted), self.draws)
+            if family == 'negbin':
+                draws = rng.negative_binomial(params[0], params[1], size=size)
+            elif family == 'poisson':
+                draws = rng.poisson(params[0], size=size)
+            else:
+                draws = np.clip(rng.normal(params[0], params[1], size=size), 0, None)
+            draws = np.sort(draws.astype(np.float32), axis=1)[:, self.keep]
+            for (key, _), row in zip(fitted, draws):
+                found[key] = (family, row)
+
+        with self._lock:
+            for key in missing:
+                self._samples[key] = found[key]
+            while len(self._samples) > self.max_entries:
+                self._samples.popitem(last=False)
+        return found
+
+    def entry_probability(self, legs, correlation=SAME_GAME_CORRELATION):
+        """
+        Probability that every leg of an entry hits
+
+        :param legs: (sorted draws, line, pick, game) tuples; pick is 'over' or 'under'
+                     and legs sharing a game are correlated
+        :param correlation: Copula correlation between same-game legs
+        :return: Joint hit probability
+        """
+        k = len(legs)
+        sigma = np.eye(k)
+        for i in range(k):
+            for j in range(i + 1, k):
+                if legs[i][3] is not None and legs[i][3] == legs[j][3]:
+                    sigma[i, j] = sigma[j, i] = correlation
+        z = self._generator().standard_normal((self.draws, k)) @ np.linalg.cholesky(sigma).T
+        # Rank-based copula: each column's ranks pick from that leg's own sorted draws
+        ranks = z.argsort(axis=0).argsort(axis=0)
+        hits = np.ones(self.draws, dtype=bool)
+        for column, (samples, line, pick, _) in enumerate(legs):
+            values = samples[ranks[:, column] * len(samples) // self.draws]
+            hits &= values > line if pick == 'over' else values < line
+        return float(hits.mean())
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """Process-wide ProbabilityModel, so cached draws are shared by every analyzer"""
+    global _model
+    with _model_lock:
+        if _model is None:
+            _model = ProbabilityModel()
+        return _model
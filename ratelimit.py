@@ -0,0 +1,117 @@
+import asyncio
+import threading
+import time
+from collections import deque
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a source whose circuit breaker is open"""
+
+    def __init__(self, source):
+        super().__init__(f"circuit open for {source}")
+        self.source = source
+
+
+class TokenBucket:
+    """
+    Token bucket shared by every caller of one upstream host
+
+    Tokens are reserved up front, so concurrent callers queue up behind each
+    other at the configured rate instead of all retrying at once.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take one token and return how many seconds to wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def wait(self):
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+        return delay
+
+
+class CircuitBreaker:
+    """
+    Per-source breaker over a sliding window of recent calls
+
+    Opens once at least min_calls have been seen and the failure rate reaches
+    error_rate; while open every call is rejected. After reset_timeout one
+    probe is let through (half-open): success closes the circuit, failure
+    opens it for another reset_timeout.
+    """
+
+    def __init__(self, name, error_rate=0.5, window=20, min_calls=5, reset_timeout=30.0):
+        self.name = name
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self._results = deque(maxlen=window)
+        self._opened_at = None
+        # When the current half-open probe started; a probe that never reports back expires
+        self._probe_started = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may go to the source now"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and (
+                self._probe_started is None or time.monotonic() - self._probe_started >= self.reset_timeout
+            ):
+                self._probe_started = time.monotonic()
+                return True
+            return False
+
+    def blocked(self):
+        """Whether allow() would turn a call away now, without taking the half-open probe"""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                return now - self._opened_at < self.reset_timeout
+            if self.state == HALF_OPEN:
+                return self._probe_started is not None and now - self._probe_started < self.reset_timeout
+            return False
+
+    def record(self, success):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probe_started = None
+                if success:
+                    self.state = CLOSED
+                    self._results.clear()
+                else:
+                    self._open()
+                return
+            if self.state == OPEN:
+                # A late answer from a call made before the circuit opened
+                return
+            self._results.append(success)
+            failures = self._results.count(False)
+            if len(self._results) >= self.min_calls and failures / len(self._results) >= self.error_rate:
+                self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._results.clear()
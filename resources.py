@@ -0,0 +1,597 @@
+import asyncio
+import atexit
+import concurrent.futures
+import importlib.util
+import os
+import queue
+import random
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from types import SimpleNamespace
+from urllib.parse import quote, urlsplit
+
+from cache import SourceCache
+from change_feed import ChangeFeed
+from feature_index import FeatureIndex
+from game_store import GameLogStore
+from instrumentation import metrics
+from player_index import PlayerIndex
+from prizepicks_board import PrizePicksBoard
+from ratelimit import CircuitBreaker, TokenBucket
+
+# aiohttp, selenium, webdriver_manager and espn_api are imported where they are
+# first used, so CLI runs and cold starts only load what their sources need
+
+
+# aiohttp only decodes brotli when a brotli package is installed, so only ask for it then
+ACCEPT_ENCODING = (
+    "gzip, deflate, br"
+    if importlib.util.find_spec("brotli") or importlib.util.find_spec("brotlicffi")
+    else "gzip, deflate"
+)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+HttpResponse = namedtuple('HttpResponse', ['status', 'headers', 'body'])
+
+
+def retry_delay(attempt, base=0.25, cap=8.0, retry_after=None):
+    """Full-jitter exponential backoff, never shorter than a server's Retry-After"""
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    if retry_after:
+        try:
+            delay = max(delay, min(cap, float(retry_after)))
+        except ValueError:
+            pass  # HTTP-date form; fall back to our own backoff
+    return delay
+
+
+class DriverPool:
+    """Bounded pool of headless Chrome drivers, created on first checkout"""
+
+    def __init__(self, max_size=2, checkout_timeout=30):
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self._idle = queue.LifoQueue()
+        self._drivers = []
+        self._size = 0
+        self._driver_path = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _create_driver(self):
+        """Launch a new headless Chrome instance"""
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        chrome_options = Options()
+        chrome_options.add_argument("--headless")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+
+        # ChromeDriverManager checks for updates on every install(), so only once per process
+        if self._driver_path is None:
+            self._driver_path = ChromeDriverManager().install()
+
+        return webdriver.Chrome(
+            service=Service(self._driver_path),
+            options=chrome_options
+        )
+
+    def acquire(self):
+        """Check out an idle driver, launching one if the pool is not full yet"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Driver pool is closed")
+            # Reserve the slot before launching so concurrent callers respect max_size
+            can_create = self._size < self.max_size
+            if can_create:
+                self._size += 1
+
+        if can_create:
+            try:
+                driver = self._create_driver()
+            except Exception:
+                with self._lock:
+                    self._size -= 1
+                raise
+            with self._lock:
+                self._drivers.append(driver)
+            return driver
+
+        try:
+            return self._idle.get(timeout=self.checkout_timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No Chrome driver available after {self.checkout_timeout}s")
+
+    def release(self, driver):
+        """Return a driver to the pool"""
+        if self._closed:
+            self._quit(driver)
+        else:
+            self._idle.put(driver)
+
+    def discard(self, driver):
+        """Drop a broken driver so its slot can be refilled"""
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+                self._size -= 1
+        self._quit(driver)
+
+    @contextmanager
+    def driver(self):
+        """Borrow a driver for the duration of a with-block"""
+        from selenium.common.exceptions import WebDriverException
+
+        driver = self.acquire()
+        try:
+            yield driver
+        except WebDriverException:
+            self.discard(driver)
+            raise
+        except BaseException:
+            self.release(driver)
+            raise
+        else:
+            self.release(driver)
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"Error closing Chrome driver: {e}")
+
+    def close(self):
+        """Quit every driver the pool has launched"""
+        with self._lock:
+            self._closed = True
+            drivers, self._drivers = self._drivers, []
+            self._size = 0
+        for driver in drivers:
+            self._quit(driver)
+
+
+class EspnHttpClient:
+    """
+    ESPN player lookups against a JSON endpoint, in place of espn_api's clients
+
+    Used when ESPN_BASE_URL points at a stand-in server. Requests go through
+    the shared session (pooling, pacing and retries), and the JSON record is
+    returned with the attributes the espn_api player objects have.
+    """
+
+    def __init__(self, resources, base_url, sport):
+        self.resources = resources
+        self.base_url = base_url.rstrip('/')
+        self.sport = sport
+
+    def player_info(self, name=None, playerId=None):
+        if playerId is not None:
+            url = f"{self.base_url}/{self.sport}/players?playerId={quote(str(playerId))}"
+        else:
+            url = f"{self.base_url}/{self.sport}/players?name={quote(name)}"
+        # The fetcher takes the host's rate-limit token before handing the lookup to a thread
+        response = self.resources.run(self.resources.http_get(url, as_json=True, paced=True))
+        if response.status != 200:
+            raise RuntimeError(f"ESPN returned HTTP {response.status}")
+        record = response.body
+        stats = {season: [SimpleNamespace(**game) for game in games]
+                 for season, games in (record.get('stats') or {}).items()}
+        return SimpleNamespace(**{**record, 'stats': stats})
+
+
+class ResourceManager:
+    """Process-wide, lazily created clients shared by every SportDataFetcher"""
+
+    def __init__(self, max_drivers=None, max_workers=None, http_limit=None,
+                 http_limit_per_host=None, keepalive_timeout=None, dns_cache_ttl=None,
+                 max_retries=None):
+        if max_drivers is None:
+            max_drivers = int(os.getenv('MAX_CHROME_DRIVERS', '2'))
+        if max_workers is None:
+            max_workers = int(os.getenv('FETCHER_WORKERS', '8'))
+        self.drivers = DriverPool(max_size=max_drivers)
+        self.max_workers = max_workers
+        # CPU-bound work (HTML parsing) moves to a process pool once more than this many jobs are in flight
+        self.inline_cpu_limit = int(os.getenv('INLINE_PARSE_LIMIT', '2'))
+        self.max_processes = int(os.getenv('PARSER_PROCESSES', str(os.cpu_count() or 2)))
+        self._cpu_in_flight = 0
+        self._process_pool = None
+
+        # Connection pool settings for the shared aiohttp session
+        self.http_limit = http_limit or int(os.getenv('HTTP_POOL_LIMIT', '100'))
+        self.http_limit_per_host = http_limit_per_host or int(os.getenv('HTTP_POOL_LIMIT_PER_HOST', '10'))
+        self.keepalive_timeout = keepalive_timeout or float(os.getenv('HTTP_KEEPALIVE_TIMEOUT', '60'))
+        self.dns_cache_ttl = dns_cache_ttl or int(os.getenv('HTTP_DNS_CACHE_TTL', '300'))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('HTTP_MAX_RETRIES', '3'))
+
+        # Outbound pacing per upstream host, and per-source circuit breakers
+        self.rate_limit = float(os.getenv('RATE_LIMIT_PER_HOST', '10'))
+        self.rate_burst = float(os.getenv('RATE_LIMIT_BURST', '20'))
+        self.breaker_settings = {
+            'error_rate': float(os.getenv('CIRCUIT_ERROR_RATE', '0.5')),
+            'window': int(os.getenv('CIRCUIT_WINDOW', '20')),
+            'min_calls': int(os.getenv('CIRCUIT_MIN_CALLS', '5')),
+            'reset_timeout': float(os.getenv('CIRCUIT_RESET_TIMEOUT', '30')),
+        }
+        self._rate_limiters = {}
+        self._breakers = {}
+
+        # Board and injury change notifications for live streams
+        self.changes = ChangeFeed()
+        # Where every new board snapshot is written for backtesting (off when unset)
+        self.snapshot_dir = os.getenv('BOARD_SNAPSHOT_DIR')
+
+        # Per-player source data shared by every fetcher; only touched from self.loop
+        self.source_cache = SourceCache(
+            max_entries=int(os.getenv('SOURCE_CACHE_MAX_ENTRIES', '2048')),
+            max_bytes=int(os.getenv('SOURCE_CACHE_MAX_BYTES', str(64 * 1024 * 1024))),
+        )
+
+        self._espn_clients = {}
+        self._boards = {}
+        self._game_store = None
+        self._feature_index = None
+        self._player_index = None
+        self._http_session = None
+        self._executor = None
+        self._loop = None
+        self._loop_thread = None
+        self._owns_loop = True
+        self._lock = threading.Lock()
+        metrics.add_collector(self.collect_metrics)
+
+    def collect_metrics(self):
+        """Source cache counters for the /metrics scrape"""
+        stats = self.source_cache.stats()
+        samples = [
+            ('prizepicks_cache_events_total', {'event': event}, stats[event])
+            for event in ('hits', 'stale_hits', 'misses', 'coalesced', 'refreshes', 'evictions')
+        ]
+        samples.append(('prizepicks_cache_entries', {}, stats['entries']))
+        samples.append(('prizepicks_cache_bytes', {}, stats['bytes']))
+        samples.extend(
+            ('prizepicks_circuit_open', {'source': source}, int(breaker.state != 'closed'))
+            for source, breaker in list(self._breakers.items())
+        )
+        return samples
+
+    @property
+    def loop(self):
+        """Background event loop that owns the shared aiohttp session"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever, name="fetcher-loop", daemon=True
+                )
+                self._loop_thread.start()
+            return self._loop
+
+    @property
+    def executor(self):
+        """Thread pool for blocking clients (ESPN) so they never run on the loop"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="fetcher-io"
+                )
+            return self._executor
+
+    @property
+    def process_pool(self):
+        """Process pool for CPU-bound parsing, started on first use"""
+        with self._lock:
+            if self._process_pool is None:
+                self._process_pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_processes)
+            return self._process_pool
+
+    @contextmanager
+    def cpu_job(self):
+        """Mark a unit of CPU-bound work (e.g. a page being fetched for parsing) as in flight"""
+        self._cpu_in_flight += 1
+        try:
+            yield
+        finally:
+            self._cpu_in_flight -= 1
+
+    async def run_cpu(self, fn, *args):
+        """
+        Run a picklable CPU-bound function, inline when quiet and in the process pool under load
+
+        A lone call is cheaper inline than paying the pickling round trip, but
+        once many pages are in flight, parsing them on the loop thread would
+        stall every other fetch, so they go to other cores instead.
+        """
+        if self._cpu_in_flight <= self.inline_cpu_limit:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.process_pool, fn, *args)
+
+    def adopt_loop(self, loop):
+        """
+        Use an already-running loop (e.g. an ASGI server's) instead of a background thread
+
+        Must be called from that loop before anything has created the shared loop,
+        so the server, the fetcher and the pooled session all share one loop.
+        """
+        with self._lock:
+            if self._loop is not None and self._loop is not loop:
+                raise RuntimeError("ResourceManager already runs its own event loop")
+            self._loop = loop
+            self._loop_thread = threading.current_thread()
+            self._owns_loop = False
+
+    async def aclose_http_session(self):
+        """Close the pooled session from its loop (for servers that own the loop)"""
+        if self._http_session is not None:
+            await self._http_session.close()
+            self._http_session = None
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the shared loop from synchronous code"""
+        if threading.current_thread() is self._loop_thread:
+            raise RuntimeError("run() would deadlock when called from the fetcher loop")
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def iterate(self, agen):
+        """Drive an async generator on the shared loop from synchronous code"""
+        async def next_item():
+            return await agen.__anext__()
+
+        try:
+            while True:
+                try:
+                    yield self.run(next_item())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self.run(agen.aclose())
+
+    async def on_loop(self, coro):
+        """Await a coroutine on the shared loop, hopping over from another loop if needed"""
+        loop = self.loop
+        if asyncio.get_running_loop() is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    def espn_client(self, sport, base_url=None):
+        """Return the shared ESPN client for a sport (an EspnHttpClient for a base URL)"""
+        with self._lock:
+            client = self._espn_clients.get((sport, base_url))
+            if client is None:
+                if base_url:
+                    client = EspnHttpClient(self, base_url, sport)
+                elif sport == "basketball":
+                    from espn_api.basketball import Basketball
+                    client = Basketball()
+                else:
+                    from espn_api.football import Football
+                    client = Football()
+                self._espn_clients[(sport, base_url)] = client
+            return client
+
+    def prizepicks_board(self, url, refresh_interval, headers=None):
+        """Return the shared projections snapshot for a board URL"""
+        with self._lock:
+            board = self._boards.get(url)
+            if board is None:
+                board = PrizePicksBoard(url, refresh_interval=refresh_interval, headers=headers)
+                board.on_change = self._board_changed
+                self._boards[url] = board
+            return board
+
+    def rate_limiter(self, host):
+        """Return the token bucket shared by every request to a host"""
+        with self._lock:
+            bucket = self._rate_limiters.get(host)
+            if bucket is None:
+                bucket = self._rate_limiters[host] = TokenBucket(self.rate_limit, self.rate_burst)
+            return bucket
+
+    def circuit_breaker(self, source):
+        """Return the circuit breaker for a data source"""
+        with self._lock:
+            breaker = self._breakers.get(source)
+            if breaker is None:
+                breaker = self._breakers[source] = CircuitBreaker(source, **self.breaker_settings)
+            return breaker
+
+    def _board_changed(self, board):
+        # Linked before anyone is told, so every listed player resolves; written to disk off the loop
+        index = self.player_index()
+        index.add_board(board.projections)
+        if index.dirty:
+            self.executor.submit(self._save_player_index, index)
+        self.changes.publish({'type': 'board', 'url': board.url, 'version': board.version})
+        if self.snapshot_dir:
+            self.executor.submit(self._record_snapshot, board.projections)
+
+    def _record_snapshot(self, projections):
+        try:
+            from backtest import record_snapshot
+            record_snapshot(self.snapshot_dir, projections)
+        except Exception as e:
+            print(f"Error recording board snapshot: {e}")
+
+    def _save_player_index(self, index):
+        try:
+            index.save()
+        except Exception as e:
+            print(f"Error saving player index: {e}")
+
+    def game_store(self):
+        """Return the shared on-disk game-log store"""
+        with self._lock:
+            if self._game_store is None:
+                self._game_store = GameLogStore(os.getenv('GAME_STORE_PATH', 'data/game_logs.sqlite3'))
+            return self._game_store
+
+    def feature_index(self):
+        """Return the shared per-player rolling-feature index"""
+        with self._lock:
+            if self._feature_index is None:
+                self._feature_index = FeatureIndex()
+            return self._feature_index
+
+    def player_index(self):
+        """Return the shared player crosswalk, loaded from disk on first use"""
+        with self._lock:
+            if self._player_index is None:
+                self._player_index = PlayerIndex()
+                self._player_index.load()
+            return self._player_index
+
+    def http_session(self):
+        """Return the shared aiohttp session; only valid on the shared loop"""
+        if asyncio.get_running_loop() is not self._loop:
+            raise RuntimeError("http_session() must be used from ResourceManager.loop")
+        import aiohttp
+
+        if self._http_session is None or self._http_session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.http_limit,
+                limit_per_host=self.http_limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            self._http_session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"Accept-Encoding": ACCEPT_ENCODING},
+            )
+        return self._http_session
+
+    async def pace(self, host):
+        """Wait for the host's rate limiter to hand out the next request slot"""
+        waited = await self.rate_limiter(host).wait()
+        if waited:
+            metrics.inc('prizepicks_ratelimit_wait_seconds_total', waited, host=host)
+
+    async def http_get(self, url, headers=None, as_json=False, paced=False):
+        """
+        GET through the pooled session, retrying 429/5xx and dropped connections
+
+        Every attempt waits for the host's rate limiter, except the first one
+        when paced is set because the caller already did (see pace).
+        """
+        import aiohttp
+
+        session = self.http_session()
+        host = urlsplit(url).hostname
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            if attempt or not paced:
+                await self.pace(host)
+            try:
+                async with session.get(url, headers=headers) as response:
+                    metrics.inc('prizepicks_http_responses_total', host=host, status=response.status)
+                    if response.status in RETRY_STATUSES and attempt < self.max_retries:
+                        retry_after = response.headers.get("Retry-After")
+                    elif response.status != 200:
+                        return HttpResponse(response.status, response.headers, None)
+                    elif as_json:
+                        body = await response.json(content_type=None)
+                        return HttpResponse(response.status, response.headers, body)
+                    else:
+                        return HttpResponse(response.status, response.headers, await response.text())
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError):
+                metrics.inc('prizepicks_http_responses_total', host=host, status='connection_error')
+                if attempt >= self.max_retries:
+                    raise
+            metrics.inc('prizepicks_http_retries_total', host=host)
+            await asyncio.sleep(retry_delay(attempt, retry_after=retry_after))
+
+    async def _drain_loop(self):
+        """Cancel in-flight fetches and close the session before the loop stops"""
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._http_session is not None:
+            await self._http_session.close()
+
+    def shutdown(self):
+        """Close every resource that has been created"""
+        metrics.remove_collector(self.collect_metrics)
+        self.drivers.close()
+        with self._lock:
+            loop, thread = self._loop, self._loop_thread
+            owns_loop, self._owns_loop = self._owns_loop, True
+            executor, self._executor = self._executor, None
+            process_pool, self._process_pool = self._process_pool, None
+            self._loop = self._loop_thread = None
+            self._espn_clients = {}
+            self._boards = {}
+            store, self._game_store = self._game_store, None
+            self._feature_index = None
+            player_index, self._player_index = self._player_index, None
+
+        # An adopted loop belongs to the server, which closes the session itself
+        if loop is not None and owns_loop:
+            closing = asyncio.run_coroutine_threadsafe(self._drain_loop(), loop)
+            try:
+                closing.result(5)
+            except Exception as e:
+                print(f"Error shutting down fetcher loop: {e}")
+            self._http_session = None
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(5)
+            if not loop.is_running():
+                loop.close()
+
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if process_pool is not None:
+            process_pool.shutdown(wait=False, cancel_futures=True)
+
+        if store is not None:
+            store.close()
+        if player_index is not None:
+            self._save_player_index(player_index)
+
+
+_shared_resources = None
+_shared_lock = threading.Lock()
+
+
+def _shutdown_shared():
+    """Shut down whichever manager is process-wide at exit (replaced ones were shut down already)"""
+    with _shared_lock:
+        manager = _shared_resources
+    if manager is not None:
+        manager.shutdown()
+
+
+atexit.register(_shutdown_shared)
+
+
+def set_resources(manager):
+    """Install a ResourceManager (e.g. a replay stand-in) as the process-wide one"""
+    global _shared_resources
+    with _shared_lock:
+        previous, _shared_resources = _shared_resources, manager
+    if previous is not None and previous is not manager:
+        previous.shutdown()
+    return manager
+
+
+def get_resources():
+    """Return the process-wide ResourceManager, shut down automatically at exit"""
+    global _shared_resources
+    with _shared_lock:
+        if _shared_resources is None:
+            _shared_resources = ResourceManager()
+        return _shared_resources
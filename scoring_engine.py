@@ -0,0 +1,175 @@
+"""
+Parallel scoring for large boards
+
+Each player's merged games from the feature index are packed into one
+float64 array (games x stat fields) and placed in shared memory; props are
+partitioned by player across the shared process pool, so workers read the
+logs in place instead of unpickling lists of game dicts. Each prop is scored
+through stat_defs.prop_metrics, like StatFeatures.score, and results are merged back by
+prop index.
+"""
+import asyncio
+import os
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from stat_defs import RECENT_GAMES, STAT_COMPONENTS, prop_metrics
+
+# Every game-log field any stat type is built from, one array column each
+FIELDS = sorted({field for components in STAT_COMPONENTS.values() for field in components})
+FIELD_INDEX = {field: i for i, field in enumerate(FIELDS)}
+
+# Below this many props a batch is scored inline; process fan-out costs more than it saves
+PARALLEL_MIN_PROPS = int(os.getenv('PARALLEL_SCORE_MIN_PROPS', '256'))
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def pack_game_logs(players):
+    """
+    Flatten every player's game logs into one array
+
+    :param players: {key: games}, each player's games most recent first (PlayerFeatures.history)
+    :return: (values, spans) where values has one row per game (NaN for missing
+             fields) and spans maps key -> (first row, number of games)
+    """
+    spans = {}
+    games = []
+    for key, player_logs in players.items():
+        spans[key] = (len(games), len(player_logs))
+        games.extend(player_logs)
+
+    values = np.empty((len(games), len(FIELDS)), dtype=np.float64)
+    for i, field in enumerate(FIELDS):
+        column = [game.get(field) for game in games]
+        try:
+            # None becomes NaN; only odd values (e.g. '-' placeholders) need the slow path
+            values[:, i] = np.array(column, dtype=np.float64)
+        except (TypeError, ValueError):
+            values[:, i] = [_to_float(value) for value in column]
+    return values, spans
+
+
+def stat_totals(values, start, count, columns):
+    """One player's per-game totals for a stat, most recent first, games missing a component dropped"""
+    totals = values[start:start + count][:, columns].sum(axis=1)
+    return totals[~np.isnan(totals)]
+
+
+def score_props(values, props):
+    """
+    Score props against packed game logs
+
+    :param props: (prop, first row, games, column indices, line) tuples
+    :return: (prop, metrics) pairs; props with no usable games are left out
+    """
+    scored = []
+    for prop, start, count, columns, line in props:
+        totals = stat_totals(values, start, count, columns)
+        if not len(totals):
+            continue
+        recent = totals[:RECENT_GAMES]
+        scored.append((prop, prop_metrics(
+            line, len(totals), float(totals.mean()), float((totals > line).mean()), float(recent.mean()),
+            float(totals[:10].mean()), float(recent.std()), float(recent[0] - recent[-1])
+        )))
+    return scored
+
+
+def _score_shared(name, shape, props):
+    """Worker entry point: score props against game logs in a shared memory block"""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        return score_props(np.ndarray(shape, dtype=np.float64, buffer=shm.buf), props)
+    finally:
+        shm.close()
+
+
+def partition(players, parts):
+    """Split per-player prop lists into at most parts chunks, keeping each player's props together, balanced by games scored"""
+    chunks = [[] for _ in range(parts)]
+    loads = [0] * parts
+    for player_props in sorted(players, key=lambda p: -p[0][2] * len(p)):
+        lightest = loads.index(min(loads))
+        chunks[lightest].extend(player_props)
+        loads[lightest] += player_props[0][2] * len(player_props)
+    return [chunk for chunk in chunks if chunk]
+
+
+class ScoringEngine:
+    """Scores big batches across the shared process pool"""
+
+    def __init__(self, resources, min_props=None):
+        self.resources = resources
+        self.min_props = PARALLEL_MIN_PROPS if min_props is None else min_props
+
+    def wants(self, props):
+        """Whether a batch of this many props is worth fanning out"""
+        return props >= self.min_props
+
+    def score(self, players, lines):
+        """
+        Score a batch, blocking until the workers are done
+
+        :param players: {key: games}, each player's games most recent first
+        :param lines: Dicts with prop, key, stat_type and line
+        :return: {prop: metrics} with the same fields as StatFeatures.score
+        """
+        with self._fan_out(players, lines) as (scored, futures):
+            for future in futures:
+                scored.update(future.result())
+            return scored
+
+    async def score_async(self, players, lines):
+        """score for code on the event loop: the workers are awaited, so other tasks keep running"""
+        with self._fan_out(players, lines) as (scored, futures):
+            for chunk in await asyncio.gather(*(asyncio.wrap_future(future) for future in futures)):
+                scored.update(chunk)
+            return scored
+
+    @contextmanager
+    def _fan_out(self, players, lines):
+        """
+        Pack a batch into shared memory and submit it to the pool by player
+
+        Yields (scored, futures): small batches come back already scored with
+        no futures. The block is released when the context exits, so the
+        futures must be collected inside it.
+        """
+        values, spans = pack_game_logs(players)
+        by_player = {}
+        for line in lines:
+            by_player.setdefault(line['key'], []).append(
+                (line['prop'], *spans[line['key']],
+                 [FIELD_INDEX[field] for field in STAT_COMPONENTS[line['stat_type']]], line['line'])
+            )
+        workers = min(self.resources.max_processes, len(by_player))
+        if workers < 2 or not values.size:
+            yield dict(score_props(values, [prop for props in by_player.values() for prop in props])), []
+            return
+
+        shm = shared_memory.SharedMemory(create=True, size=values.nbytes)
+        futures = []
+        try:
+            shared = np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf)
+            shared[:] = values
+            del shared
+            futures = [
+                self.resources.process_pool.submit(_score_shared, shm.name, values.shape, chunk)
+                for chunk in partition(by_player.values(), workers)
+            ]
+            yield {}, futures
+        finally:
+            # After a cancellation, chunks not yet started are dropped rather than
+            # left to open a block that is gone
+            for future in futures:
+                future.cancel()
+            shm.close()
+            shm.unlink()
@@ -0,0 +1,58 @@
+# PrizePicks stat type -> game-log fields summed to produce it
+STAT_COMPONENTS = {
+    'points': ('points',),
+    'rebounds': ('rebounds',),
+    'assists': ('assists',),
+    'pts+rebs': ('points', 'rebounds'),
+    'pts+asts': ('points', 'assists'),
+    'rebs+asts': ('rebounds', 'assists'),
+    'pts+rebs+asts': ('points', 'rebounds', 'assists'),
+    'passing yards': ('passing_yards',),
+    'rushing yards': ('rushing_yards',),
+    'receiving yards': ('receiving_yards',),
+    'receptions': ('receptions',),
+    'pass+rush yds': ('passing_yards', 'rushing_yards'),
+    'rush+rec yds': ('rushing_yards', 'receiving_yards'),
+    'touchdowns': ('touchdowns',),
+}
+
+# Which sources contribute game logs for each sport, in priority order
+GAME_LOG_SOURCES = {
+    'basketball': ('yahoo_stats', 'espn_stats'),
+    'football': ('espn_stats',),
+}
+
+RECENT_GAMES = 5
+
+
+def confidence_score(consistency, trend):
+    """
+    Heuristic confidence (0-100) in a prop's recommendation
+
+    Steady recent games (a low spread) and a rising recent trend raise it.
+    Every scoring engine and the backtest score through this one formula.
+    """
+    bonus = 20 / consistency if consistency > 0 else 0.0
+    return min(max(50 + bonus + (10 if trend > 0 else -10), 0.0), 100.0)
+
+
+def recommends_over(avg_performance, line):
+    """Whether the heuristic takes the over; elementwise on arrays"""
+    return avg_performance > line
+
+
+def prop_metrics(line, games, avg_performance, hit_rate, avg_last_5, avg_last_10, consistency, trend):
+    """One scored prop's fields from its game statistics"""
+    return {
+        'line': line,
+        'games': games,
+        'avg_performance': avg_performance,
+        'hit_rate': hit_rate,
+        'avg_last_5': avg_last_5,
+        'avg_last_10': avg_last_10,
+        'consistency': consistency,
+        'trend': trend,
+        'confidence': confidence_score(consistency, trend),
+        'recommendation': 'Over' if recommends_over(avg_performance, line) else 'Under',
+        'performance_diff': avg_performance - line,
+    }
@@ -1,53 +1,64 @@
-document.getElementById('analyzeForm').addEventListener('submit', async (e) => {
+// Live stream for the current analysis; replaced on every submit
+let activeStream = null;
+
+document.getElementById('analyzeForm').addEventListener('submit', (e) => {
     e.preventDefault();
-    
+
     // Show loading indicator
     document.getElementById('loading').classList.remove('hidden');
     document.getElementById('results').classList.add('hidden');
-    
+    document.getElementById('resultsContent').innerHTML = '';
+
     // Get form data
-    const formData = {
+    const params = new URLSearchParams({
         sport: document.getElementById('sport').value,
         player: document.getElementById('player').value,
         line: document.getElementById('line').value
-    };
-    
-    try {
-        // Send analysis request
-        const response = await fetch('/analyze', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify(formData)
-        });
-        
-        const data = await response.json();
-        
-        // Hide loading indicator
+    });
+
+    // Results arrive per source and keep updating as the board or injuries change
+    if (activeStream) {
+        activeStream.close();
+    }
+    activeStream = new EventSource(`/analyze/stream?${params}`);
+
+    activeStream.addEventListener('result', (event) => {
         document.getElementById('loading').classList.add('hidden');
-        
-        // Display results
-        displayResults(data);
-    } catch (error) {
-        console.error('Error:', error);
+        renderCard(JSON.parse(event.data));
+    });
+
+    activeStream.addEventListener('done', () => {
         document.getElementById('loading').classList.add('hidden');
-        alert('An error occurred while analyzing. Please try again.');
-    }
+    });
+
+    activeStream.onerror = () => {
+        // EventSource reconnects on its own; only report if nothing has arrived yet
+        if (!document.getElementById('resultsContent').children.length) {
+            console.error('Error: analysis stream failed');
+            document.getElementById('loading').classList.add('hidden');
+            activeStream.close();
+            alert('An error occurred while analyzing. Please try again.');
+        }
+    };
 });
 
-function displayResults(data) {
+function renderCard(data) {
     const resultsDiv = document.getElementById('results');
     const resultsContent = document.getElementById('resultsContent');
-    
-    // Clear previous results
-    resultsContent.innerHTML = '';
-    
+
+    // Update the prop's card in place instead of redrawing everything
+    const cardId = `prop-${data.id}`;
+    let card = document.getElementById(cardId);
+    if (!card) {
+        card = document.createElement('div');
+        card.id = cardId;
+        resultsContent.appendChild(card);
+    }
+    card.innerHTML = '';
+
     if (data.success) {
-        // Create result card
-        const card = document.createElement('div');
-        card.className = 'result-card';
-        
+        card.className = data.partial ? 'result-card partial' : 'result-card';
+
         // Add result items
         const items = [
             ['Player', data.player_name],
@@ -55,7 +66,10 @@ function displayResults(data) {
             ['Betting Line', data.betting_line],
             ['Performance Difference', data.performance_diff.toFixed(2)]
         ];
-        
+        if (data.board_line !== null && data.board_line !== data.betting_line) {
+            items.push(['Board Line', data.board_line]);
+        }
+
         items.forEach(([label, value]) => {
             const item = document.createElement('div');
             item.className = 'result-item';
@@ -65,21 +79,20 @@ function displayResults(data) {
             `;
             card.appendChild(item);
         });
-        
+
         // Add recommendation
         const recommendation = document.createElement('div');
         recommendation.className = `recommendation ${data.recommendation.toLowerCase()}`;
         recommendation.textContent = `Recommendation: ${data.recommendation}`;
         card.appendChild(recommendation);
-        
-        resultsContent.appendChild(card);
-    } else {
-        resultsContent.innerHTML = `
+    } else if (!data.partial) {
+        card.className = '';
+        card.innerHTML = `
             <div class="bg-red-100 text-red-800 p-4 rounded-lg">
                 Error: ${data.error}
             </div>
         `;
     }
-    
+
     resultsDiv.classList.remove('hidden');
 }
@@ -1,7 +1,9 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-from analyze import PrizePicskAnalyzer
+from analyze import PrizePicskAnalyzer, unknown_player
+from prizepicks_board import normalize_player_name
+from prefetch import start_prefetch
 import plotly.express as px
 import asyncio
 from datetime import datetime
@@ -69,102 +71,192 @@ with st.sidebar:
     
     analyze_button = st.button("Analyze Player")
 
-# Main content
-if analyze_button and player_name:
-    with st.spinner('Fetching real-time data and analyzing player performance...'):
-        analyzer = PrizePicskAnalyzer(sport)
-        result = analyzer.analyze_player(player_name, betting_line)
+@st.cache_resource
+def get_cached_analyzer(sport):
+    """One analyzer (and fetcher) per sport for the life of the server"""
+    return PrizePicskAnalyzer(sport)
+
+@st.cache_resource
+def background_prefetch():
+    """Keep every board player's data warm for the life of the server"""
+    return start_prefetch()
+
+background_prefetch()
+
+def render_metrics(container, result):
+    with container.container():
+        # Create three columns for metrics
+        col1, col2, col3 = st.columns(3)
         
-        if result['success']:
-            # Create three columns for metrics
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                st.metric(
-                    label="Average Performance",
-                    value=f"{result['avg_performance']:.2f}",
-                    delta=f"{result['performance_diff']:.2f} vs Line"
-                )
-            
-            with col2:
-                confidence = result['confidence_score']
-                confidence_color = (
-                    'confidence-high' if confidence >= 70
-                    else 'confidence-medium' if confidence >= 40
-                    else 'confidence-low'
-                )
-                st.markdown(f"""
-                    <div class="metric-card">
-                        <h3>Confidence Score</h3>
-                        <p class="{confidence_color}" style="font-size: 24px; font-weight: bold;">
-                            {confidence:.1f}%
-                        </p>
-                    </div>
-                """, unsafe_allow_html=True)
-            
-            with col3:
-                recommendation_color = "green" if result['recommendation'] == "Over" else "red"
-                st.markdown(f"""
-                    <div class="metric-card">
-                        <h3>Recommendation</h3>
-                        <p style="color: {recommendation_color}; font-size: 24px; font-weight: bold;">
-                            {result['recommendation']}
-                        </p>
-                    </div>
-                """, unsafe_allow_html=True)
-            
-            # Injury and Matchup Information
-            st.markdown("---")
-            st.subheader("Game Context")
-            
-            context_col1, context_col2 = st.columns(2)
-            
-            with context_col1:
-                st.markdown("### 🏥 Injury Status")
-                injury = result['injury_status']
-                st.markdown(f"""
-                    - **Status:** {injury['status']}
-                    - **Details:** {injury['details']}
-                    - **Last Updated:** {injury['last_updated']}
-                """)
-            
-            with context_col2:
-                st.markdown("### 🏟️ Matchup Analysis")
-                matchup = result['matchup_analysis']
-                st.markdown(f"""
-                    - **Opponent:** {matchup['opponent']}
-                    - **Opponent Rank:** {matchup['opponent_rank']}
-                    - **Location:** {matchup['home_away']}
-                    - **Rest Days:** {matchup['rest_days']}
-                """)
-            
-            # Performance History
-            st.markdown("---")
-            st.subheader("Recent Performance")
+        with col1:
+            st.metric(
+                label="Average Performance",
+                value=f"{result['avg_performance']:.2f}",
+                delta=f"{result['performance_diff']:.2f} vs Line"
+            )
+        
+        with col2:
+            confidence = result['confidence_score']
+            confidence_color = (
+                'confidence-high' if confidence >= 70
+                else 'confidence-medium' if confidence >= 40
+                else 'confidence-low'
+            )
+            st.markdown(f"""
+                <div class="metric-card">
+                    <h3>Confidence Score</h3>
+                    <p class="{confidence_color}" style="font-size: 24px; font-weight: bold;">
+                        {confidence:.1f}%
+                    </p>
+                </div>
+            """, unsafe_allow_html=True)
+        
+        with col3:
+            recommendation_color = "green" if result['recommendation'] == "Over" else "red"
+            st.markdown(f"""
+                <div class="metric-card">
+                    <h3>Recommendation</h3>
+                    <p style="color: {recommendation_color}; font-size: 24px; font-weight: bold;">
+                        {result['recommendation']}
+                    </p>
+                </div>
+            """, unsafe_allow_html=True)
+
+def render_context(container, result):
+    # Injury and Matchup Information
+    with container.container():
+        st.markdown("---")
+        st.subheader("Game Context")
+        
+        context_col1, context_col2 = st.columns(2)
+        
+        with context_col1:
+            st.markdown("### 🏥 Injury Status")
+            injury = result['injury_status']
+            st.markdown(f"""
+                - **Status:** {injury['status']}
+                - **Details:** {injury['details']}
+                - **Last Updated:** {injury['last_updated']}
+            """)
+        
+        with context_col2:
+            st.markdown("### 🏟️ Matchup Analysis")
+            matchup = result['matchup_analysis']
+            st.markdown(f"""
+                - **Opponent:** {matchup['opponent']}
+                - **Opponent Rank:** {matchup['opponent_rank']}
+                - **Location:** {matchup['home_away']}
+                - **Rest Days:** {matchup['rest_days']}
+            """)
+
+def render_history(container, result, betting_line):
+    with container.container():
+        # Performance History
+        st.markdown("---")
+        st.subheader("Recent Performance")
+        
+        # Create performance history dataframe
+        recent_games = result['recent_games']
+        if recent_games:
+            df = pd.DataFrame(recent_games)
             
-            # Create performance history dataframe
-            recent_games = result['recent_games']
-            if recent_games:
-                df = pd.DataFrame(recent_games)
-                
-                # Create line chart
-                fig = px.line(df, x=range(len(df)), y='points', 
-                             title='Recent Game Performance')
-                fig.add_hline(y=betting_line, line_dash="dash", 
-                             line_color="red", annotation_text="Betting Line")
-                
-                st.plotly_chart(fig, use_container_width=True)
-                
-                # Show detailed game log
-                st.markdown("### Detailed Game Log")
-                st.dataframe(df)
+            # Create line chart
+            fig = px.line(df, x=range(len(df)), y='points', 
+                         title='Recent Game Performance')
+            fig.add_hline(y=betting_line, line_dash="dash", 
+                         line_color="red", annotation_text="Betting Line")
             
-            # Data freshness indicator
-            st.markdown("---")
-            st.markdown(f"*Data last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*")
+            st.plotly_chart(fig, use_container_width=True)
             
-        else:
-            st.error(f"Error: {result.get('error', 'Could not analyze player')}")
+            # Show detailed game log
+            st.markdown("### Detailed Game Log")
+            st.dataframe(df)
+
+def resolve_player(analyzer, player_name, refresh=False):
+    """
+    Crosswalk record and suggestions for a typed name, exactly as /analyze resolves it
+
+    Kept in the session per (sport, name), so reruns from other widgets (the
+    betting-line slider) never refresh the board; pressing Analyze does.
+    """
+    resolved = st.session_state.setdefault('resolved_players', {})
+    key = (analyzer.sport, normalize_player_name(player_name))
+    if refresh or key not in resolved:
+        resolved[key] = analyzer.data_fetcher.resources.run(analyzer.resolve_player(player_name))
+    return resolved[key]
+
+def stream_player_data(analyzer, player_name, player, betting_line, metrics_slot, context_slot):
+    """Fetch every source, rendering metrics from the first stats source to arrive"""
+    fetcher = analyzer.data_fetcher
+    sources = fetcher.iter_player_data(player_name, analyzer.sport, player)
+    
+    data, timings = {}, {}
+    # iterate() closes the generator (cancelling unfinished sources) however the loop ends
+    for name, source_data, status in fetcher.resources.iterate(sources):
+        data[name], timings[name] = source_data, status
+        if source_data is None or name == 'prizepicks':
+            continue
+        partial = fetcher.combine_player_data(player_name, analyzer.sport, data, timings)
+        result = analyzer.score_player_data(player_name, partial, betting_line)
+        if result['success']:
+            render_metrics(metrics_slot, result)
+            if name == 'espn':
+                render_context(context_slot, result)
+    
+    return fetcher.combine_player_data(player_name, analyzer.sport, data, timings)
+
+# Remember what is being analyzed so slider changes keep showing (and rescoring) it
+if analyze_button and player_name:
+    st.session_state['active_analysis'] = (sport, player_name)
+active = st.session_state.get('active_analysis')
+showing = active and active == (sport, player_name)
+
+player, suggestions = None, []
+if showing:
+    analyzer = get_cached_analyzer(sport)
+    player, suggestions = resolve_player(analyzer, player_name, refresh=analyze_button)
+
+# Main content
+if showing and player is None and suggestions:
+    # Close to known players but not one of them: nothing is fetched
+    st.error(f"Error: {unknown_player(player_name, suggestions)['error']}")
+    st.markdown("Did you mean: " + ", ".join(suggestions))
+elif showing:
+    name = player['name'] if player else player_name
+    # Only the session's current analysis is kept; freshness across sessions
+    # comes from the shared source cache's TTLs, which Analyze fetches through
+    loaded = st.session_state.get('loaded_analysis')
+    
+    metrics_slot = st.empty()
+    context_slot = st.empty()
+    history_slot = st.empty()
+    
+    if analyze_button or loaded is None or loaded['key'] != active:
+        context_slot.info("Loading injury and matchup data...")
+        with st.spinner('Fetching real-time data and analyzing player performance...'):
+            player_data = stream_player_data(
+                analyzer, name, player, betting_line, metrics_slot, context_slot
+            )
+        loaded = st.session_state['loaded_analysis'] = {
+            'key': active, 'player_data': player_data, 'fetched_at': datetime.now()
+        }
+    player_data, fetched_at = loaded['player_data'], loaded['fetched_at']
+    
+    # Line-dependent scoring only: no fetch happens here
+    result = analyzer.score_player_data(name, player_data, betting_line)
+    
+    if result['success']:
+        render_metrics(metrics_slot, result)
+        render_context(context_slot, result)
+        render_history(history_slot, result, betting_line)
+        
+        # Data freshness indicator
+        st.markdown("---")
+        st.markdown(f"*Data last updated: {fetched_at.strftime('%Y-%m-%d %H:%M:%S')}*")
+        
+    else:
+        context_slot.empty()
+        st.error(f"Error: {result.get('error', 'Could not analyze player')}")
 else:
     # Show welcome message when no analysis is running
     st.info("👈 Enter player details in the sidebar to start analysis")
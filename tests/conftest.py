@@ -0,0 +1,36 @@
+"""
+Shared test setup
+
+The modules under test are flat files in the repository root. Every test
+runs without network access, and the game-log store, crosswalk and
+background prefetcher are kept away from data/.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_scratch = tempfile.mkdtemp(prefix='prizepicks-tests-')
+os.environ['GAME_STORE_PATH'] = os.path.join(_scratch, 'game_logs.sqlite3')
+os.environ['PLAYER_INDEX_PATH'] = os.path.join(_scratch, 'player_index.json')
+os.environ['PREFETCH_ENABLED'] = '0'
+
+import pytest  # noqa: E402
+
+import analyze  # noqa: E402
+from resources import ResourceManager, set_resources  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+
+
+@pytest.fixture
+def resources(tmp_path, monkeypatch):
+    """A fresh process-wide ResourceManager with its own store, and no cached analyzers"""
+    monkeypatch.setenv('GAME_STORE_PATH', str(tmp_path / 'game_logs.sqlite3'))
+    analyze._analyzers.clear()
+    manager = set_resources(ResourceManager())
+    yield manager
+    analyze._analyzers.clear()
+    manager.shutdown()
@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+import asgi
+
+
+class Client:
+    """ASGI receive/send pair whose client disconnects once `leave_after` body chunks arrived"""
+
+    def __init__(self, body=b'', leave_after=1):
+        self.requests = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        self.leave_after = leave_after
+        self.sent = []
+        self.left = asyncio.Event()
+
+    async def receive(self):
+        if self.requests:
+            return self.requests.pop(0)
+        await self.left.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        self.sent.append(message)
+        chunks = [m for m in self.sent if m['type'] == 'http.response.body' and m.get('body')]
+        if len(chunks) >= self.leave_after:
+            self.left.set()
+
+    def chunks(self):
+        return [m['body'] for m in self.sent if m['type'] == 'http.response.body' and m.get('body')]
+
+
+def endless(first, closed):
+    """An async generator that yields once, then blocks until it is cancelled or closed"""
+    async def generate(*args, **kwargs):
+        try:
+            yield first
+            await asyncio.Event().wait()
+        finally:
+            closed.append(True)
+    return generate
+
+
+def test_batch_client_disconnect_closes_the_results_cleanly(monkeypatch):
+    closed = []
+    monkeypatch.setattr(asgi, 'analyze_many_async', endless({'player_name': 'A', 'success': True}, closed))
+    client = Client(json.dumps({'props': [{'player': 'A'}, {'player': 'B'}]}).encode())
+
+    asyncio.run(asyncio.wait_for(asgi.analyze_batch({}, client.receive, client.send), 5))
+
+    assert [json.loads(chunk) for chunk in client.chunks()] == [{'player_name': 'A', 'success': True}]
+    assert closed == [True]
+
+
+def test_stream_client_disconnect_closes_the_events_cleanly(monkeypatch):
+    closed = []
+    monkeypatch.setattr(asgi, 'stream_props', endless(('result', {'index': 0, 'player_name': 'A'}), closed))
+    monkeypatch.setattr(asgi, 'parse_stream_request', lambda query: ([{'player': 'A'}], True))
+    client = Client()
+
+    asyncio.run(asyncio.wait_for(asgi.analyze_stream({'query_string': b''}, client.receive, client.send), 5))
+
+    assert client.sent[0]['headers'][0] == (b'content-type', b'text/event-stream')
+    assert client.chunks()[0].startswith(b'event: result\n')
+    assert closed == [True]
@@ -0,0 +1,134 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import resources as resources_module
+from cache import SourceCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    # Only the cache's clock: the event loop keeps real time
+    monkeypatch.setattr('cache.time', SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def counting_fetch(values):
+    calls = []
+
+    async def fetch():
+        calls.append(len(calls))
+        await asyncio.sleep(0.01)
+        return values[min(len(calls), len(values)) - 1]
+    return fetch, calls
+
+
+def test_concurrent_misses_share_one_fetch():
+    async def scenario():
+        cache = SourceCache()
+        fetch, calls = counting_fetch(['data'])
+        results = await asyncio.gather(*(cache.get_or_fetch('key', fetch, ttl=60) for _ in range(5)))
+        return cache, calls, results
+
+    cache, calls, results = asyncio.run(scenario())
+    assert results == ['data'] * 5
+    assert len(calls) == 1
+    assert cache.stats()['misses'] == 1
+    assert cache.stats()['coalesced'] == 4
+
+
+def test_fresh_entries_are_hits_until_the_ttl(clock):
+    async def scenario():
+        cache = SourceCache()
+        fetch, calls = counting_fetch(['first', 'second'])
+        first = await cache.get_or_fetch('key', fetch, ttl=60)
+        clock.now += 59
+        cached = await cache.get_or_fetch('key', fetch, ttl=60)
+        clock.now += 2
+        refetched = await cache.get_or_fetch('key', fetch, ttl=60)
+        return first, cached, refetched, calls
+
+    first, cached, refetched, calls = asyncio.run(scenario())
+    assert (first, cached, refetched) == ('first', 'first', 'second')
+    assert len(calls) == 2
+
+
+def test_stale_entries_are_served_while_one_refresh_runs(clock):
+    async def scenario():
+        cache = SourceCache()
+        fetch, calls = counting_fetch(['old', 'new'])
+        await cache.get_or_fetch('key', fetch, ttl=60, stale_ttl=300)
+        clock.now += 120
+        stale = [await cache.get_or_fetch('key', fetch, ttl=60, stale_ttl=300) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        return stale, cache.peek('key'), calls, cache.stats()
+
+    stale, latest, calls, stats = asyncio.run(scenario())
+    assert stale == ['old'] * 3
+    assert latest == 'new'
+    assert len(calls) == 2
+    assert stats['stale_hits'] == 3
+    assert stats['refreshes'] == 1
+
+
+def test_failed_fetches_are_not_cached():
+    async def scenario():
+        cache = SourceCache()
+        fetch, calls = counting_fetch([None, 'data'])
+        missing = await cache.get_or_fetch('key', fetch, ttl=60)
+        found = await cache.get_or_fetch('key', fetch, ttl=60)
+        return missing, found, calls
+
+    missing, found, calls = asyncio.run(scenario())
+    assert (missing, found) == (None, 'data')
+    assert len(calls) == 2
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = SourceCache(max_entries=2)
+    cache.set('a', 1, ttl=60)
+    cache.set('b', 2, ttl=60)
+    asyncio.run(cache.get_or_fetch('a', None, ttl=60))  # a hit moves 'a' to the recent end
+    cache.set('c', 3, ttl=60)
+    assert cache.peek('b') is None
+    assert cache.peek('a') == 1 and cache.peek('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_byte_bound_evicts_and_skips_oversized_values():
+    cache = SourceCache(max_bytes=2000)
+    cache.set('big', 'x' * 5000, ttl=60)
+    assert cache.peek('big') is None
+    cache.set('a', 'x' * 900, ttl=60)
+    cache.set('b', 'x' * 900, ttl=60)
+    cache.set('c', 'x' * 900, ttl=60)
+    assert cache.peek('a') is None
+    assert cache.total_bytes <= 2000
+
+
+class CountingManager:
+    def __init__(self):
+        self.shutdowns = 0
+
+    def shutdown(self):
+        self.shutdowns += 1
+
+
+def test_replaced_managers_are_shut_down_once_and_exit_only_closes_the_current(monkeypatch):
+    monkeypatch.setattr(resources_module, '_shared_resources', None)
+    first, second = CountingManager(), CountingManager()
+    resources_module.set_resources(first)
+    resources_module.set_resources(second)
+    resources_module._shutdown_shared()
+    assert first.shutdowns == 1
+    assert second.shutdowns == 1
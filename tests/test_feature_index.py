@@ -0,0 +1,81 @@
+import random
+from datetime import date, timedelta
+
+from feature_index import FeatureIndex, PlayerFeatures
+
+STAT_TYPES = ('points', 'rebounds', 'pts+rebs+asts')
+
+
+def season(count, seed=0):
+    """Basketball games with integer stats, so running and bulk sums agree exactly"""
+    rng = random.Random(seed)
+    day = date(2023, 10, 24)
+    games = []
+    for _ in range(count):
+        day += timedelta(days=rng.choice((1, 2, 3, 5)))
+        games.append({'date': day.isoformat(), 'points': rng.randint(5, 40), 'rebounds': rng.randint(0, 15),
+                      'assists': rng.randint(0, 12), 'location': rng.choice(('home', 'away'))})
+    return games
+
+
+def features_of(player):
+    return {
+        stat_type: (player.score(stat_type, 20.5), player.summary(stat_type), player.values(stat_type),
+                    player.recent_games(stat_type))
+        for stat_type in STAT_TYPES
+    }
+
+
+def rebuilt(sources):
+    player = PlayerFeatures('basketball')
+    for source, games in sources.items():
+        player.add_games(source, games)
+    return player
+
+
+def test_games_added_one_at_a_time_match_a_rebuild():
+    games = season(30)
+    player = PlayerFeatures('basketball')
+    player.add_games('yahoo', games[:12])
+    for game in games[12:]:
+        player.add_games('yahoo', [game])
+    assert player.games == rebuilt({'yahoo': games}).games
+    assert features_of(player) == features_of(rebuilt({'yahoo': games}))
+
+
+def test_backfilled_and_corrected_games_match_a_rebuild():
+    games = season(25, seed=1)
+    player = PlayerFeatures('basketball')
+    player.add_games('yahoo', games[:10] + games[12:])
+    version = player.version
+    # An older game arrives late, then one game's box score is corrected
+    player.add_games('yahoo', games[10:12])
+    corrected = {**games[5], 'points': games[5]['points'] + 7}
+    player.add_games('yahoo', [corrected])
+    assert player.version != version
+    expected = rebuilt({'yahoo': games[:5] + [corrected] + games[6:]})
+    assert features_of(player) == features_of(expected)
+
+
+def test_second_source_merges_like_a_rebuild():
+    yahoo, espn = season(20, seed=2), season(20, seed=2)
+    for game in espn:
+        game['points'] += 1  # Yahoo wins where the sources disagree
+        game['minutes'] = 30
+    player = PlayerFeatures('basketball')
+    player.add_games('yahoo', yahoo[:15])
+    player.add_games('espn', espn)
+    player.add_games('yahoo', yahoo[15:])
+    expected = rebuilt({'yahoo': yahoo, 'espn': espn})
+    assert features_of(player) == features_of(expected)
+    assert player.score('points', 20.5) == rebuilt({'yahoo': yahoo}).score('points', 20.5)
+
+
+def test_index_ignores_games_until_the_source_is_seeded():
+    games = season(8, seed=3)
+    index = FeatureIndex()
+    index.add_games('basketball', 'Jane Doe', 'yahoo', games[-1:])
+    assert index.player('basketball', 'jane doe').games == []
+    player = index.seed('basketball', 'Jane Doe', {'yahoo_stats': {'recent_games': games[:-1]}})
+    index.add_games('basketball', 'JANE DOE', 'yahoo', games[-1:])
+    assert features_of(player) == features_of(rebuilt({'yahoo': games}))
@@ -0,0 +1,55 @@
+import os
+import sys
+
+import pytest
+
+import analyze
+from conftest import ROOT
+from live import stream_props
+from resources import set_resources
+
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+from bench_pipeline import ReplayResources, load_fixtures  # noqa: E402
+
+
+@pytest.fixture
+def replay():
+    """Resources whose upstreams are the recorded fixtures"""
+    analyze._analyzers.clear()
+    manager = set_resources(ReplayResources(load_fixtures()))
+    yield manager
+    analyze._analyzers.clear()
+    manager.shutdown()
+
+
+def listed_player(board):
+    return next(p for p in board['projections'] if p['league'] == 'NBA')
+
+
+def test_stream_resolves_names_through_the_analyzer(replay):
+    listed = listed_player(replay.board)
+    misspelled = listed['player_name'][:-1] + 'q'
+    props = [
+        {'id': 'a', 'sport': 'basketball', 'player': listed['player_name'].upper(), 'stat': listed['stat_type']},
+        {'id': 'b', 'sport': 'basketball', 'player': misspelled, 'stat': 'points', 'line': 20.5},
+    ]
+    events = list(replay.iterate(stream_props(props, follow=False)))
+
+    unknown = [payload for event, payload in events if event == 'result' and payload['id'] == 'b']
+    assert unknown == [{'id': 'b', 'index': 1, 'sport': 'basketball', 'player': misspelled, 'stat': 'points',
+                        **analyze.unknown_player(misspelled, [listed['player_name']])}]
+    final = [payload for event, payload in events if event == 'result' and payload['id'] == 'a'][-1]
+    assert final['success'] and not final['partial']
+    # Scored under the crosswalk's name, against the board's line
+    assert final['player_name'] == listed['player_name']
+    assert final['board_line'] == final['betting_line'] == listed['line']
+    assert ('done', {'players': 1}) in events
+    assert not any(event == 'source' and payload['player'] == misspelled for event, payload in events)
+
+
+def test_stream_of_unknown_names_still_finishes(replay):
+    listed = listed_player(replay.board)
+    misspelled = listed['player_name'][:-1] + 'q'
+    events = list(replay.iterate(stream_props([{'sport': 'basketball', 'player': misspelled}], follow=False)))
+    assert [event for event, _ in events] == ['result', 'done']
+    assert events[0][1]['suggestions'] == [listed['player_name']]
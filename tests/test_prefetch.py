@@ -0,0 +1,62 @@
+import os
+import sys
+
+import analyze
+from conftest import ROOT
+from prefetch import PrefetchScheduler, injury_interval, INJURY_REFRESH
+from prizepicks_board import LEAGUE_SPORTS, normalize_player_name
+
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+from bench_pipeline import ReplayResources, load_fixtures  # noqa: E402
+
+
+def test_run_once_reads_the_board_through_its_own_resources(resources):
+    # The process-wide manager (`resources`) has no board; the scheduler's own one does
+    replay = ReplayResources(load_fixtures())
+    projections = replay.board['projections'][:6]
+    replay.board = {'projections': projections}
+    try:
+        scheduler = PrefetchScheduler(replay)
+        fetched = []
+
+        async def prefetch(key, now):
+            fetched.append(key)
+        scheduler.prefetch = prefetch
+
+        assert replay.run(scheduler.run_once()) == len(fetched)
+        expected = {(LEAGUE_SPORTS[p['league']], normalize_player_name(p['player_name'])) for p in projections}
+        assert set(fetched) == set(scheduler.players) == expected
+        # No analyzer (or board) was created on the process-wide manager along the way
+        assert analyze._analyzers == {}
+        assert resources._boards == {}
+    finally:
+        replay.shutdown()
+
+
+def test_prefetch_fetches_and_scores_through_its_own_resources(resources):
+    replay = ReplayResources(load_fixtures())
+    names = list(dict.fromkeys(p['player_name'] for p in replay.board['projections'] if p['league'] == 'NBA'))[:3]
+    replay.board = {'projections': [p for p in replay.board['projections'] if p['player_name'] in names]}
+    try:
+        scheduler = PrefetchScheduler(replay)
+        assert replay.run(scheduler.run_once()) == len(names)
+        assert scheduler.counters['fetches'] == len(names)
+        assert scheduler.counters['errors'] == 0
+        # Games were cached and indexed on the scheduler's manager...
+        assert len(replay.source_cache)
+        for name in names:
+            assert replay.feature_index().player('basketball', name).history()
+        # ...and nothing was created on the process-wide one
+        assert analyze._analyzers == {}
+        assert resources._boards == {}
+        assert resources._feature_index is None and resources._game_store is None
+        assert len(resources.source_cache) == 0
+    finally:
+        replay.shutdown()
+
+
+def test_injury_refreshes_speed_up_towards_the_start():
+    assert injury_interval(None) == INJURY_REFRESH[0][1]
+    intervals = [injury_interval(hours * 3600) for hours in (12, 4, 1, 0.25, 0)]
+    assert intervals == sorted(intervals, reverse=True)
+    assert intervals[-1] == INJURY_REFRESH[-1][1]
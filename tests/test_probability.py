@@ -0,0 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from probability import ProbabilityModel
+
+
+def requests(count):
+    rng = np.random.default_rng(7)
+    return {(i, 'points'): (rng.integers(5, 35, size=20).astype(float), 'points') for i in range(count)}
+
+
+def test_seeded_models_draw_the_same_sequence():
+    first, second = ProbabilityModel(draws=2000, seed=3), ProbabilityModel(draws=2000, seed=3)
+    for model in (first, second):
+        model.distributions(requests(4))
+    a, b = first.distributions(requests(8)), second.distributions(requests(8))
+    for key in a:
+        assert a[key][0] == b[key][0]
+        assert np.array_equal(a[key][1], b[key][1])
+    legs = [(a[(0, 'points')][1], 20.5, 'over', 'g'), (a[(1, 'points')][1], 18.5, 'under', 'g')]
+    assert first.entry_probability(legs) == second.entry_probability(legs)
+
+
+def test_threads_share_a_model_without_sharing_a_generator():
+    model = ProbabilityModel(draws=2000, max_entries=10000, seed=1)
+    batches = [{(batch, key): request for key, request in requests(16).items()} for batch in range(16)]
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(model.distributions, batches))
+    for batch, found in zip(batches, results):
+        assert set(found) == set(batch)
+        for _, samples in found.values():
+            assert len(samples) == 2000 and np.all(np.diff(samples) >= 0)
@@ -0,0 +1,144 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from data_fetcher import SportDataFetcher, SOURCE_CACHE_TTLS
+from ratelimit import CircuitBreaker, CircuitOpenError, TokenBucket, CLOSED, OPEN, HALF_OPEN
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    # Only the limiter's clock: the event loop keeps real time
+    monkeypatch.setattr('ratelimit.time', SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def test_token_bucket_spends_the_burst_then_queues_callers(clock):
+    bucket = TokenBucket(rate=10, burst=2)
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, pytest.approx(0.1), pytest.approx(0.2)]
+    # Reservations already handed out are owed before new tokens count
+    clock.now += 0.35
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.05)
+
+
+def test_token_bucket_refills_up_to_the_burst(clock):
+    bucket = TokenBucket(rate=10, burst=2)
+    bucket.reserve()
+    bucket.reserve()
+    clock.now += 60
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, pytest.approx(0.1)]
+
+
+def test_breaker_opens_at_the_error_rate_after_min_calls(clock):
+    breaker = CircuitBreaker('yahoo', error_rate=0.5, min_calls=4, reset_timeout=30)
+    for success in (False, False, True):
+        breaker.record(success)
+    assert breaker.state == CLOSED
+    breaker.record(False)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.blocked()
+
+
+def test_breaker_lets_one_probe_through_after_the_reset_timeout(clock):
+    breaker = CircuitBreaker('yahoo', min_calls=1, reset_timeout=30)
+    breaker.record(False)
+    clock.now += 30
+    # Looking does not take the probe
+    assert not breaker.blocked()
+    assert breaker.state == OPEN
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    assert breaker.blocked()
+    breaker.record(True)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_and_lost_probe_expires(clock):
+    breaker = CircuitBreaker('yahoo', min_calls=1, reset_timeout=30)
+    breaker.record(False)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == OPEN
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+    # The probe never reports back: another one is let through a reset timeout later
+    clock.now += 30
+    assert breaker.allow()
+
+
+def test_rate_limit_wait_does_not_count_towards_the_timeout(resources):
+    fetcher = SportDataFetcher(resources, source_timeouts={'yahoo': 0.05})
+    host = fetcher._host('yahoo')
+    resources._rate_limiters[host] = TokenBucket(rate=10, burst=1)
+    resources.rate_limiter(host).reserve()
+    breaker = resources._breakers['yahoo'] = CircuitBreaker('yahoo', min_calls=1)
+
+    async def fast():
+        return 'stats'
+
+    async def slow():
+        await asyncio.sleep(0.2)
+
+    # The token is only free in 0.1s, twice the timeout
+    assert resources.run(fetcher._upstream('yahoo', fast)) == 'stats'
+    assert breaker.state == CLOSED
+    with pytest.raises(asyncio.TimeoutError):
+        resources.run(fetcher._upstream('yahoo', slow))
+    assert breaker.state == OPEN
+
+
+def test_cache_hits_do_not_close_a_half_open_circuit(resources):
+    fetcher = SportDataFetcher(resources)
+    breaker = resources._breakers['yahoo'] = CircuitBreaker('yahoo', min_calls=1, reset_timeout=0.0)
+    breaker.record(False)
+    resources.source_cache.set(('yahoo', 'basketball', 'jane doe'), {'recent_games': []},
+                               *SOURCE_CACHE_TTLS['yahoo'])
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return {'recent_games': []}
+
+    def cached():
+        return fetcher._cached('yahoo', 'Jane Doe', 'basketball', lambda: fetcher._upstream('yahoo', fetch))
+
+    result, status = resources.run(fetcher._run_source('yahoo', cached()))
+    assert result == {'recent_games': []} and not status['circuit_open']
+    assert calls == [] and breaker.state == OPEN
+    # The probe is still there for a real upstream call
+    assert resources.run(fetcher._upstream('yahoo', fetch)) == {'recent_games': []}
+    assert breaker.state == CLOSED
+
+
+def test_open_circuit_serves_the_fallback(resources):
+    fetcher = SportDataFetcher(resources)
+    breaker = resources._breakers['yahoo'] = CircuitBreaker('yahoo', min_calls=1, reset_timeout=60)
+    breaker.record(False)
+
+    async def fetch():
+        raise AssertionError('upstream called while the circuit is open')
+
+    with pytest.raises(CircuitOpenError):
+        resources.run(fetcher._upstream('yahoo', fetch))
+    result, status = resources.run(fetcher._run_source(
+        'yahoo', fetcher._upstream('yahoo', fetch), fallback=lambda: 'stale'
+    ))
+    assert result == 'stale'
+    assert status['circuit_open'] and status['error'] is None
@@ -0,0 +1,44 @@
+import asyncio
+import concurrent.futures
+
+from resources import EspnHttpClient, get_resources
+
+
+def test_nothing_is_created_until_first_use(resources):
+    assert resources._executor is None
+    assert resources._loop is None
+    assert resources._http_session is None
+    assert resources._game_store is None
+
+
+def test_clients_are_created_once_and_shared(resources):
+    executor = resources.executor
+    assert isinstance(executor, concurrent.futures.ThreadPoolExecutor)
+    assert resources.executor is executor
+    assert resources.loop is resources.loop
+    assert resources.game_store() is resources.game_store()
+    assert get_resources() is resources
+
+
+def test_espn_clients_are_shared_per_sport_and_endpoint(resources):
+    client = resources.espn_client('basketball', 'http://127.0.0.1:9/espn')
+    assert isinstance(client, EspnHttpClient)
+    assert resources.espn_client('basketball', 'http://127.0.0.1:9/espn') is client
+    assert resources.espn_client('football', 'http://127.0.0.1:9/espn') is not client
+
+
+def test_run_executes_on_the_shared_loop(resources):
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    assert resources.run(current_loop()) is resources.loop
+
+
+def test_shutdown_closes_and_allows_lazy_restart(resources):
+    resources.executor
+    resources.loop
+    resources.shutdown()
+    assert resources._executor is None
+    assert resources._loop is None
+    # A shut-down manager starts its clients again on demand
+    assert resources.executor is not None
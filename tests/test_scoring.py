@@ -0,0 +1,111 @@
+import asyncio
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from analyze import PrizePicskAnalyzer
+
+NUMERIC_FIELDS = ('avg_performance', 'performance_diff', 'confidence_score', 'hit_rate', 'avg_last_5', 'avg_last_10')
+
+
+def player_data(name, seed, games=30):
+    """Yahoo and ESPN logs for one player; ESPN misses some games and adds minutes"""
+    rng = random.Random(seed)
+    day = date(2023, 10, 24)
+    yahoo, espn = [], []
+    for _ in range(games):
+        day += timedelta(days=rng.choice((1, 2, 3)))
+        game = {'date': day.isoformat(), 'points': rng.randint(4, 38), 'rebounds': rng.randint(0, 14),
+                'assists': rng.randint(0, 11), 'location': rng.choice(('home', 'away'))}
+        if rng.random() < 0.8:
+            yahoo.append(game)
+        if rng.random() < 0.7:
+            espn.append({**game, 'points': game['points'] + rng.choice((0, 0, 1)), 'minutes': rng.uniform(18, 38)})
+    return {
+        'player_name': name,
+        'yahoo_stats': {'recent_games': yahoo[::-1]},
+        'espn_stats': {'recent_games': espn[::-1]},
+        'prizepicks_odds': None,
+        'source_timings': {},
+    }
+
+
+def entries(count):
+    players = [player_data(f'Player {i}', seed=i) for i in range(8)]
+    rng = random.Random(count)
+    return [
+        (player['player_name'], player, rng.choice((8.5, 15.5, 22.5, 30.5)),
+         rng.choice(('points', 'rebounds', 'assists', 'pts+rebs+asts', 'rebs+asts')))
+        for player in (rng.choice(players) for _ in range(count))
+    ]
+
+
+@pytest.fixture(params=['frame', 'parallel'])
+def engine(request, resources, monkeypatch):
+    if request.param == 'parallel':
+        # Fan every batch out to two workers, even on one core
+        monkeypatch.setattr('scoring_engine.PARALLEL_MIN_PROPS', 1)
+        resources.max_processes = 2
+    return request.param
+
+
+def test_engines_agree_with_the_index(resources, engine):
+    batch = entries(60) + [('Nobody', None, 10.5, 'points'), ('Player 0', player_data('Player 0', 0), 3.5, 'blocks')]
+    expected = PrizePicskAnalyzer('basketball').score_many(batch)
+    results = PrizePicskAnalyzer('basketball', scoring_engine=engine).score_many(batch)
+    assert [r['success'] for r in results] == [r['success'] for r in expected]
+    assert not expected[-1]['success'] and not expected[-2]['success']
+    for result, want in zip(results, expected):
+        assert {k: v for k, v in result.items() if k not in NUMERIC_FIELDS} == \
+            {k: v for k, v in want.items() if k not in NUMERIC_FIELDS}
+        for field in NUMERIC_FIELDS:
+            if field in want:
+                assert result[field] == pytest.approx(want[field])
+
+
+def test_engines_report_props_without_games(resources, engine):
+    football = {'player_name': 'Jane Doe', 'espn_stats': {'recent_games': [{'date': '2023-09-10', 'passing_yards': 250}]},
+                'source_timings': {}}
+    analyzer = PrizePicskAnalyzer('football', scoring_engine=engine)
+    result = analyzer.score_many([('Jane Doe', football, 50.5, 'receptions')])[0]
+    assert result == {'error': 'No games with receptions for Jane Doe', 'success': False}
+
+
+def test_every_engine_scores_a_slate_identically(resources, monkeypatch):
+    monkeypatch.setattr('scoring_engine.PARALLEL_MIN_PROPS', 1)
+    resources.max_processes = 2
+    batch = entries(120)
+    index, frame, parallel = (PrizePicskAnalyzer('basketball', scoring_engine=engine).score_many(batch)
+                              for engine in ('index', 'frame', 'parallel'))
+    assert all(result['success'] for result in index)
+    for results in (frame, parallel):
+        # Spreads come from running moments in the index and numpy elsewhere, so they may differ in the last bit
+        assert [{**result, 'confidence_score': pytest.approx(result['confidence_score'], rel=1e-12)}
+                for result in results] == index
+
+
+def test_parallel_batches_on_the_loop_leave_it_free(resources, monkeypatch):
+    monkeypatch.setattr('scoring_engine.PARALLEL_MIN_PROPS', 1)
+    resources.max_processes = 2
+    analyzer = PrizePicskAnalyzer('basketball', scoring_engine='parallel')
+    batch = entries(60)
+
+    async def score_while_ticking():
+        ticks = []
+
+        async def tick():
+            while True:
+                ticks.append(None)
+                await asyncio.sleep(0)
+        ticker = asyncio.ensure_future(tick())
+        await asyncio.sleep(0)
+        before = len(ticks)
+        results = await analyzer.score_many_async(batch)
+        ticker.cancel()
+        return results, len(ticks) - before
+
+    results, ticks = resources.run(score_while_ticking())
+    # Other tasks ran while the workers scored
+    assert ticks > 0
+    assert results == analyzer.score_many(batch)
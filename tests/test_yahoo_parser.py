@@ -0,0 +1,61 @@
+import glob
+import os
+
+import pytest
+
+from conftest import FIXTURES
+from yahoo_parser import PARSERS, YahooStatsParser, get_parser, parse_yahoo_stats, stats_fragment
+
+PAGES = sorted(glob.glob(os.path.join(FIXTURES, 'yahoo', '*.html')))
+INSTALLED = [name for name, parser in PARSERS.items() if parser.available()]
+
+
+def read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('page', PAGES, ids=os.path.basename)
+def test_backends_agree_on_the_recorded_pages(page):
+    html = read(page)
+    results = {name: parse_yahoo_stats(html, 'basketball', backend=name) for name in INSTALLED}
+    reference = results[INSTALLED[-1]]
+    assert reference['recent_games']
+    for name, stats in results.items():
+        assert stats == reference, name
+
+
+@pytest.mark.parametrize('page', PAGES, ids=os.path.basename)
+def test_fragment_parses_like_the_whole_page(page):
+    html = read(page)
+    parser = get_parser(INSTALLED[0])
+    assert parser.table_rows(stats_fragment(html)) == parser.table_rows(html)
+
+
+@pytest.mark.parametrize('name', INSTALLED)
+def test_limited_rows_match_the_full_table(name):
+    parser = get_parser(name)
+    html = stats_fragment(read(PAGES[0]))
+    rows = parser.table_rows(html)
+    assert len(rows) > 3
+    assert parser.table_rows(html, 3) == rows[:3]
+
+
+def test_games_are_typed_and_located():
+    stats = parse_yahoo_stats(read(PAGES[0]), 'basketball')
+    game = stats['recent_games'][0]
+    assert set(game) == {'date', 'location', 'points', 'rebounds', 'assists'}
+    assert game['location'] in ('home', 'away')
+    assert all(isinstance(game[stat], float) for stat in ('points', 'rebounds', 'assists'))
+
+
+def test_football_pages_have_no_yahoo_stats():
+    assert parse_yahoo_stats(read(PAGES[0]), 'football') == {}
+
+
+def test_a_backend_without_table_rows_fails_when_created():
+    class Incomplete(YahooStatsParser):
+        name = 'incomplete'
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,142 @@
+import importlib.util
+import os
+from abc import ABC, abstractmethod
+
+# Basketball game-log table: column index -> stat name
+BASKETBALL_COLUMNS = {2: 'points', 3: 'rebounds', 4: 'assists'}
+RECENT_ROWS = 5
+
+
+def _to_float(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def stats_fragment(html):
+    """
+    Cut the page down to the player-stats table before parsing
+
+    Yahoo player pages are mostly navigation and scripts; only the table
+    matters, so parsing just this slice is far cheaper with any backend.
+    Falls back to the full page if the markers are not found.
+    """
+    marker = html.find('player-stats')
+    if marker == -1:
+        return html
+    start = html.rfind('<div', 0, marker)
+    end = html.find('</table>', marker)
+    if start == -1 or end == -1:
+        return html
+    return html[start:end] + '</table></div>'
+
+
+class YahooStatsParser(ABC):
+    """Turns a Yahoo player page into typed game rows; subclasses pick the HTML backend"""
+
+    name = None
+    module = None
+
+    @classmethod
+    def available(cls):
+        return cls.module is None or importlib.util.find_spec(cls.module) is not None
+
+    @abstractmethod
+    def table_rows(self, html, limit=None):
+        """Cell texts for the first limit rows (default all) of the player-stats table, header included"""
+
+    def parse(self, html, sport):
+        """
+        Parse Yahoo Sports HTML for player stats
+
+        Only the header and the RECENT_ROWS rows that are kept have their text
+        read, so a full season's table costs no more than a week's. Each kept
+        stat cell is then read once and converted once: HTML carries no typed
+        values, and for the 15 numbers a page yields, a bulk (numpy) conversion
+        would cost more to set up, and to import into every parser process,
+        than the floats it replaces.
+        """
+        stats = {}
+        if sport != "basketball":
+            return stats
+
+        recent_games = []
+        for cells in self.table_rows(stats_fragment(html), RECENT_ROWS + 1)[1:]:
+            if len(cells) <= max(BASKETBALL_COLUMNS):
+                continue
+            game_stats = {'date': cells[0], 'location': 'away' if cells[1].startswith('@') else 'home'}
+            for index, stat in BASKETBALL_COLUMNS.items():
+                game_stats[stat] = _to_float(cells[index])
+            recent_games.append(game_stats)
+
+        stats['recent_games'] = recent_games
+        if recent_games:
+            for stat in BASKETBALL_COLUMNS.values():
+                values = [g[stat] for g in recent_games if g[stat] is not None]
+                if values:
+                    stats[f'avg_{stat}'] = sum(values) / len(values)
+        return stats
+
+
+class SoupParser(YahooStatsParser):
+    """Pure-Python fallback: BeautifulSoup with html.parser, limited to the stats div"""
+
+    name = 'html.parser'
+    module = 'bs4'
+
+    def table_rows(self, html, limit=None):
+        from bs4 import BeautifulSoup, SoupStrainer
+        table = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('div', class_='player-stats'))
+        return [
+            [td.get_text(strip=True) for td in row.find_all('td')]
+            for row in table.find_all('tr', limit=limit)
+        ]
+
+
+class LxmlParser(YahooStatsParser):
+    name = 'lxml'
+    module = 'lxml'
+
+    def table_rows(self, html, limit=None):
+        from lxml import html as lxml_html
+        document = lxml_html.fromstring(html)
+        rows = document.xpath(
+            "//div[contains(concat(' ', normalize-space(@class), ' '), ' player-stats ')]//tr"
+        )
+        return [[td.text_content().strip() for td in row.iterfind('td')] for row in rows[:limit]]
+
+
+class SelectolaxParser(YahooStatsParser):
+    name = 'selectolax'
+    module = 'selectolax'
+
+    def table_rows(self, html, limit=None):
+        from selectolax.lexbor import LexborHTMLParser
+        table = LexborHTMLParser(html).css_first('div.player-stats')
+        if table is None:
+            return []
+        return [[td.text(strip=True) for td in row.css('td')] for row in table.css('tr')[:limit]]
+
+
+# Fastest first
+PARSERS = {parser.name: parser for parser in (SelectolaxParser, LxmlParser, SoupParser)}
+
+
+def get_parser(name=None):
+    """Return the named parser, or YAHOO_PARSER, or the fastest one installed"""
+    name = name or os.getenv('YAHOO_PARSER')
+    if name:
+        parser = PARSERS[name]
+        if not parser.available():
+            raise ImportError(f"Yahoo parser backend '{name}' is not installed")
+        return parser()
+    for parser in PARSERS.values():
+        if parser.available():
+            return parser()
+    raise ImportError("No HTML parser backend is installed")
+
+
+def parse_yahoo_stats(html, sport, backend=None):
+    """Module-level entry point so pages can be parsed in a process pool"""
+    return get_parser(backend).parse(html, sport)